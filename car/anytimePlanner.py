@@ -0,0 +1,153 @@
+'''
+Extended by Peggy Wang @PeggyYuchunWang
+Licensing Information: Please do not distribute or publish solutions to this
+project. You are free to use and extend Driverless Car for educational
+purposes. The Driverless Car project was developed at Stanford, primarily by
+Chris Piech (piech@cs.stanford.edu). It was inspired by the Pacman projects.
+'''
+import heapq
+import time
+
+INF = float('inf')
+
+# Class: Anytime Planner
+# ---------------------
+# Anytime Repairing A* (Likhachev, Gordon and Thrun) over a
+# graphIndex.GraphIndex. A query is started with start() and then refined
+# with improve(budget), which works for at most |budget| seconds and returns
+# the best path found so far. Each refinement runs weighted A* with
+# inflation epsilon, starting at INITIAL_EPSILON and lowered by EPSILON_STEP
+# after every solution down to 1 (optimal), reusing the previous search
+# instead of starting over. Work left when the budget runs out is picked up
+# by the next improve call.
+#
+# Edge u -> v costs its length plus riskWeight * risks[v], with the risks
+# (indexed like graphIndex.nodeIds) fixed for the whole query; the heuristic
+# is the road distance to the goal. getBound gives the suboptimality bound
+# of the current path and getTimeSpent the planning time of the query.
+class AnytimePlanner(object):
+
+    INITIAL_EPSILON = 3.0
+    EPSILON_STEP = 0.5
+
+    def __init__(self, graphIndex, riskWeight):
+        self.graphIndex = graphIndex
+        self.riskWeight = riskWeight
+        self.done = True
+        self.bestPath = None
+        self.bound = INF
+        self.timeSpent = 0.0
+
+    # Function: Start
+    # ---------------------
+    # Begins a new query from |start| to |goal| under |risks|.
+    def start(self, start, goal, risks):
+        self.startNode = start
+        self.goal = goal
+        self.risks = risks
+        self.goalDistances = self.graphIndex.goalDistanceField(goal)
+        self.epsilon = self.INITIAL_EPSILON
+        self.g = {start: 0.0}
+        self.parents = {start: None}
+        self.openKeys = dict()
+        self.pq = []
+        self.counter = 0
+        self.closed = set()
+        self.incons = set()
+        self.done = False
+        self.bestPath = None
+        self.bound = INF
+        self.timeSpent = 0.0
+        self.push(start)
+
+    def heuristic(self, nodeId):
+        return self.goalDistances[self.graphIndex.index[nodeId]]
+
+    def cost(self, fromId, toId):
+        risk = self.risks[self.graphIndex.index[toId]]
+        return self.graphIndex.distance(fromId, toId) + self.riskWeight * risk
+
+    def push(self, nodeId):
+        key = self.g[nodeId] + self.epsilon * self.heuristic(nodeId)
+        self.openKeys[nodeId] = key
+        self.counter += 1
+        heapq.heappush(self.pq, (key, self.counter, nodeId))
+
+    # Pops stale heap entries (lazy deletion) and returns the smallest key.
+    def minKey(self):
+        while self.pq:
+            (key, _, nodeId) = self.pq[0]
+            if self.openKeys.get(nodeId) == key:
+                return key
+            heapq.heappop(self.pq)
+        return INF
+
+    # Function: Improve
+    # ---------------------
+    # Refines the current query for at most |budget| seconds (None: until
+    # the optimal path is known) and returns the best path so far, or None.
+    def improve(self, budget = None):
+        began = time.time()
+        deadline = INF if budget is None else began + budget
+        while not self.done and self.improvePath(deadline):
+            self.publish()
+            # Inconsistent states can still improve the path once reopened,
+            # so the query is only over at epsilon 1 or with nothing left.
+            if self.epsilon <= 1.0 or not (self.openKeys or self.incons):
+                self.done = True
+            else:
+                self.epsilon = max(1.0, self.epsilon - self.EPSILON_STEP)
+                self.reopen()
+        self.timeSpent += time.time() - began
+        return self.bestPath
+
+    # Expands states until the goal can no longer be improved at the current
+    # epsilon (returns True) or the deadline passes (returns False).
+    def improvePath(self, deadline):
+        while self.g.get(self.goal, INF) > self.minKey():
+            if time.time() >= deadline:
+                return False
+            nodeId = heapq.heappop(self.pq)[2]
+            del self.openKeys[nodeId]
+            self.closed.add(nodeId)
+            for nextId in self.graphIndex.successors[nodeId]:
+                cost = self.g[nodeId] + self.cost(nodeId, nextId)
+                if cost < self.g.get(nextId, INF):
+                    self.g[nextId] = cost
+                    self.parents[nextId] = nodeId
+                    if nextId in self.closed:
+                        self.incons.add(nextId)
+                    else:
+                        self.push(nextId)
+        if self.g.get(self.goal, INF) == INF:
+            # The goal is unreachable.
+            self.done = True
+            return False
+        return True
+
+    def reopen(self):
+        for nodeId in list(self.openKeys) + list(self.incons):
+            self.push(nodeId)
+        self.incons = set()
+        self.closed = set()
+
+    def publish(self):
+        path = []
+        nodeId = self.goal
+        while nodeId is not None:
+            path.append(nodeId)
+            nodeId = self.parents[nodeId]
+        path.reverse()
+        self.bestPath = path
+        lowerBound = min([self.g[n] + self.heuristic(n) for n in list(self.openKeys) + list(self.incons)] or [INF])
+        goalCost = self.g[self.goal]
+        self.bound = max(1.0, min(self.epsilon, goalCost / lowerBound if lowerBound > 0 else INF))
+
+    def isDone(self):
+        return self.done
+
+    def getBound(self):
+        return self.bound
+
+    def getTimeSpent(self):
+        return self.timeSpent
@@ -8,6 +8,7 @@ Chris Piech (piech@cs.stanford.edu). It was inspired by the Pacman projects.
 from engine.model.car.junior import Junior
 from engine.model.car.car import Car
 
+import graphIndex
 import util
 import random
 import heapq
@@ -34,26 +35,26 @@ class AutoDriver(Junior):
         self.pq = []
 
     def getTerminalState(self, agentGraph):
-        for n in agentGraph.nodeMap:
-            if agentGraph.isTerminal(n):
-                self.terminalState = n
-                print self.terminalState
-                break
+        terminals = graphIndex.getGraphIndex(agentGraph).terminals
+        if terminals:
+            self.terminalState = terminals[0]
+            print self.terminalState
 
+    # Squared road distance to the terminal state, read from the layout's
+    # precomputed goal distance field, or inf if the terminal cannot be
+    # reached from the node.
     def distanceHeuristic(self, agentGraph, nodeId):
         if self.terminalState == None:
             return -1
-        terminalX = agentGraph.getNodeX(self.terminalState)
-        terminalY = agentGraph.getNodeY(self.terminalState)
-        nodeX = agentGraph.getNodeX(nodeId)
-        nodeY = agentGraph.getNodeY(nodeId)
-        dist = (terminalX - nodeX) **2 + (terminalY - nodeY) ** 2
-        return dist
+        dist = graphIndex.getGraphIndex(agentGraph).goalDistance(nodeId, self.terminalState)
+        if dist == float('inf'):
+            return dist
+        return dist ** 2
 
-    def combinedHeuristic(self, beliefOfOtherCars, agentGraph, nodeId):
+    # |probability| is the belief that another car is at the node, read from
+    # the risk array that choseNextId gathers for all successors at once.
+    def combinedHeuristic(self, probability, agentGraph, nodeId):
         distance = self.distanceHeuristic(agentGraph, nodeId)
-        print(distance)
-        probability = self.nodeCarProb(beliefOfOtherCars, agentGraph, nodeId)
         return distance + 1000000 * probability
 
     # Function: Get Autonomous Actions
@@ -107,26 +108,11 @@ class AutoDriver(Junior):
     # Given the current belief about where other cars are decides if
     # there is a car in the spot where we are about to drive.
     def isNodeCloseToOtherCar(self, beliefOfOtherCars, agentGraph, nodeId):
-        newPos = agentGraph.getNodePos(nodeId)
-        row = util.yToRow(newPos.y)
-        if row >= beliefOfOtherCars.getNumRows():
-            row = beliefOfOtherCars.getNumRows() - 1
-        col = util.xToCol(newPos.x)
-        if col >= beliefOfOtherCars.getNumCols():
-            col = beliefOfOtherCars.getNumCols() - 1
-        p = beliefOfOtherCars.getProb(row, col)
+        p = self.nodeCarProb(beliefOfOtherCars, agentGraph, nodeId)
         return p > AutoDriver.MIN_PROB
 
     def nodeCarProb(self, beliefOfOtherCars, agentGraph, nodeId):
-        newPos = agentGraph.getNodePos(nodeId)
-        row = util.yToRow(newPos.y)
-        if row >= beliefOfOtherCars.getNumRows():
-            row = beliefOfOtherCars.getNumRows() - 1
-        col = util.xToCol(newPos.x)
-        if col >= beliefOfOtherCars.getNumCols():
-            col = beliefOfOtherCars.getNumCols() - 1
-        p = beliefOfOtherCars.getProb(row, col)
-        return p
+        return graphIndex.getGraphIndex(agentGraph).nodeRisks(beliefOfOtherCars, [nodeId])[0]
 
     # Function: Chose Next Id
     # ---------------------
@@ -138,8 +124,9 @@ class AutoDriver(Junior):
             self.nextId = None
         else:
             self.pq = []
-            for n in nextIds:
-                heuristicVal = self.combinedHeuristic(beliefOfOtherCars, agentGraph, n)
+            risks = graphIndex.getGraphIndex(agentGraph).nodeRisks(beliefOfOtherCars, nextIds)
+            for n, risk in zip(nextIds, risks):
+                heuristicVal = self.combinedHeuristic(risk, agentGraph, n)
                 # print(heuristicVal)
                 heapq.heappush(self.pq, (heuristicVal, n))
             self.nextId = heapq.heappop(self.pq)[1]
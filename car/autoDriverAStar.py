@@ -8,9 +8,18 @@ Chris Piech (piech@cs.stanford.edu). It was inspired by the Pacman projects.
 from engine.model.car.junior import Junior
 from engine.model.car.car import Car
 
+from incrementalPlanner import DStarLite
+from anytimePlanner import AnytimePlanner
+import graphIndex
+import particleEngine
+import pathCache
+import contractionHierarchy
+
 import util
 import random
 import heapq
+import time
+import numpy
 
 # Class: AutoDriver
 # ---------------------
@@ -20,6 +29,29 @@ class AutoDriver(Junior):
 
     MIN_PROB = 0.02
     THRESHOLD_PROB = 0.05
+    # Extra cost of driving onto a node, per unit of belief that another car
+    # is on it.
+    RISK_WEIGHT = 1000.0
+    # Replan with D* Lite, repairing the previous search, instead of running
+    # aStar from scratch on every node arrival.
+    INCREMENTAL = True
+    # Number of future ticks the space-time planner looks ahead.
+    PREDICTION_STEPS = 30
+    # The space-time planner checks its PLANNING_BUDGET deadline once every
+    # this many expansions.
+    DEADLINE_CHECK = 64
+    # Planning time budget per tick in seconds. When set, paths come from an
+    # anytime planner that returns the best path found within the budget and
+    # keeps refining it on the following ticks.
+    PLANNING_BUDGET = None
+    # Reuse paths from the process wide pathCache while the belief along them
+    # has barely changed, instead of searching on every node arrival.
+    PATH_CACHE = True
+    # Plan with the contraction hierarchy of the layout, searching the raw
+    # risk-weighted graph only within LOCAL_RADIUS of the car. Meant for
+    # layouts much larger than lombard.
+    HIERARCHICAL = False
+    LOCAL_RADIUS = 300.0
 
     # Funciton: Init
     # ---------------------
@@ -31,35 +63,49 @@ class AutoDriver(Junior):
         self.nextNode = None
         self.burnInIterations = 30
         self.terminalState = None
-        self.startState = None
         self.pq = []
+        self.planner = None
+        self.occupancyPredictor = None
+        self.anytime = None
+        # Whether the space-time planner chose to wait at self.nodeId.
+        self.waiting = False
 
     def getTerminalState(self, agentGraph):
-        for n in agentGraph.nodeMap:
-            if agentGraph.isTerminal(n):
-                self.terminalState = n
-                print self.terminalState
-                break
+        terminals = graphIndex.getGraphIndex(agentGraph).terminals
+        if terminals:
+            self.terminalState = terminals[0]
+            print self.terminalState
 
+    # Function: Goal Heuristic
+    # ---------------------
+    # Road distance from a node to the terminal state, read from the
+    # precomputed goal distance field of the layout. It is exact when no
+    # other cars are around and never overestimates the edge costs below,
+    # so A* stays optimal.
     def goalHeuristic(self, agentGraph, nodeId):
         if self.terminalState == None:
-            return -1
-        terminalX = agentGraph.getNodeX(self.terminalState)
-        terminalY = agentGraph.getNodeY(self.terminalState)
-        nodeX = agentGraph.getNodeX(nodeId)
-        nodeY = agentGraph.getNodeY(nodeId)
-        dist = (terminalX - nodeX)**2 + (terminalY - nodeY)** 2
-        return dist
-
-    def startCost(self, agentGraph, nodeId):
-        if self.startState == None:
-            return -1
-        terminalX = agentGraph.getNodeX(self.startState)
-        terminalY = agentGraph.getNodeY(self.startState)
-        nodeX = agentGraph.getNodeX(nodeId)
-        nodeY = agentGraph.getNodeY(nodeId)
-        dist = (terminalX - nodeX)**2 + (terminalY - nodeY)** 2
-        return dist
+            return 0
+        return graphIndex.getGraphIndex(agentGraph).goalDistance(nodeId, self.terminalState)
+
+    def nodeDistance(self, agentGraph, fromId, toId):
+        return graphIndex.getGraphIndex(agentGraph).distance(fromId, toId)
+
+    # Function: Edge Cost
+    # ---------------------
+    # Cost of driving from fromId to its successor toId: the length of the
+    # edge plus RISK_WEIGHT times the belief that another car is at toId.
+    # |risks| is the per-node risk vector from getNodeRisks.
+    def edgeCost(self, risks, agentGraph, fromId, toId):
+        index = graphIndex.getGraphIndex(agentGraph)
+        risk = risks[index.index[toId]]
+        return index.distance(fromId, toId) + self.RISK_WEIGHT * risk
+
+    # Function: Get Node Risks
+    # ---------------------
+    # The belief that another car is at each node, as one array indexed like
+    # the layout's GraphIndex.nodeIds.
+    def getNodeRisks(self, beliefOfOtherCars, agentGraph):
+        return graphIndex.getGraphIndex(agentGraph).nodeRisks(beliefOfOtherCars)
 
     # Function: Get Autonomous Actions
     # ---------------------
@@ -69,8 +115,6 @@ class AutoDriver(Junior):
     def getAutonomousActions(self, beliefOfOtherCars, agentGraph):
         if self.terminalState == None:
             self.getTerminalState(agentGraph)
-        if self.startState == None:
-            self.startState = self.nodeId
         # Chose a next node to drive towards. Note that you can ask
         # a if its a terminal using node.isTerminal()
         if self.nodeId == None:
@@ -80,6 +124,8 @@ class AutoDriver(Junior):
         if agentGraph.atNode(self.nextId, self.pos):
             self.nodeId = self.nextId
             self.choseNextId(agentGraph, beliefOfOtherCars)
+        elif self.anytime is not None and not self.anytime.isDone():
+            self.refinePlan()
 
         # given a next node, drive towards that node. Stop if you
         # are too close to another car
@@ -90,54 +136,270 @@ class AutoDriver(Junior):
         actions = {
             Car.TURN_WHEEL: wheelAngle
         }
-        actions[Car.DRIVE_FORWARD] = 1.0
+        actions[Car.DRIVE_FORWARD] = 0.0 if self.waiting else 1.0
         return actions
 
     def nodeCarProb(self, beliefOfOtherCars, agentGraph, nodeId):
-        newPos = agentGraph.getNodePos(nodeId)
-        row = util.yToRow(newPos.y)
-        if row >= beliefOfOtherCars.getNumRows():
-            row = beliefOfOtherCars.getNumRows() - 1
-        col = util.xToCol(newPos.x)
-        if col >= beliefOfOtherCars.getNumCols():
-            col = beliefOfOtherCars.getNumCols() - 1
-        p = beliefOfOtherCars.getProb(row, col)
-        return p
+        return graphIndex.getGraphIndex(agentGraph).nodeRisks(beliefOfOtherCars, [nodeId])[0]
 
     # Function: Chose Next Id
     # ---------------------
     # You have arrived at self.nodeId. Chose a next node to drive
-    # towards.
+    # towards: the next node on the planned path to the terminal state, or a
+    # random successor if the terminal state cannot be reached. The path
+    # comes from the first planner that applies:
+    #
+    # 1. spaceTimeAStar, when an occupancy predictor is set (opt in, see
+    #    setOccupancyPredictor). It takes PLANNING_BUDGET as its deadline and
+    #    may decide to wait at self.nodeId.
+    # 2. anytimePlan, when PLANNING_BUDGET is set.
+    # 3. cachedPlan: the path cache if PATH_CACHE, then hierarchicalPlan if
+    #    HIERARCHICAL, incrementalPlan if INCREMENTAL, aStar otherwise.
     def choseNextId(self, agentGraph, beliefOfOtherCars):
-        nextIds = agentGraph.getNextNodeIds(self.nodeId)
-        if nextIds == []:
-            self.nextId = None
+        self.waiting = False
+        if self.occupancyPredictor is not None:
+            path = self.spaceTimeAStar(agentGraph, beliefOfOtherCars)
+        elif self.PLANNING_BUDGET is not None:
+            path = self.anytimePlan(agentGraph, beliefOfOtherCars)
         else:
-            self.nextId = random.choice(nextIds)
-        path = self.aStar(agentGraph, beliefOfOtherCars)
+            path = self.cachedPlan(agentGraph, beliefOfOtherCars)
         if len(path) > 1:
             self.nextId = path[1]
-        else:
+            self.waiting = path[1] == self.nodeId
+            return
+        nextIds = agentGraph.getNextNodeIds(self.nodeId)
+        if self.nodeId == self.terminalState or nextIds == []:
             self.nextId = self.nodeId
+        else:
+            self.nextId = random.choice(nextIds)
+
+    # Function: Cached Plan
+    # ---------------------
+    # Path from self.nodeId to the terminal state, taken from the path cache
+    # if it holds one that is still valid under the current belief and
+    # planned with hierarchicalPlan, incrementalPlan or aStar (and cached)
+    # otherwise.
+    def cachedPlan(self, agentGraph, beliefOfOtherCars):
+        index = graphIndex.getGraphIndex(agentGraph)
+        cache = pathCache.getPathCache() if self.PATH_CACHE else None
+        if cache is not None:
+            path = cache.get(self.nodeId, self.terminalState, index, beliefOfOtherCars)
+            if path is not None:
+                return path
+        if self.HIERARCHICAL:
+            path = self.hierarchicalPlan(agentGraph, beliefOfOtherCars)
+        elif self.INCREMENTAL:
+            path = self.incrementalPlan(agentGraph, beliefOfOtherCars)
+        else:
+            path = self.aStar(agentGraph, beliefOfOtherCars)
+        if cache is not None:
+            cache.put(self.terminalState, path, index, beliefOfOtherCars)
+        return path
+
+    # Function: Anytime Plan
+    # ---------------------
+    # Starts a new anytime query from self.nodeId and refines it for one
+    # PLANNING_BUDGET. If no path was found in time, heads for the successor
+    # with the lowest edge cost plus heuristic.
+    def anytimePlan(self, agentGraph, beliefOfOtherCars):
+        index = graphIndex.getGraphIndex(agentGraph)
+        if self.anytime is None:
+            self.anytime = AnytimePlanner(index, self.RISK_WEIGHT)
+        risks = self.getNodeRisks(beliefOfOtherCars, agentGraph)
+        self.anytime.start(self.nodeId, self.terminalState, risks)
+        path = self.anytime.improve(self.PLANNING_BUDGET)
+        if path is None and not self.anytime.isDone():
+            nextIds = index.successors[self.nodeId]
+            if nextIds:
+                best = min(nextIds, key=lambda n: self.edgeCost(risks, agentGraph, self.nodeId, n) +
+                           self.goalHeuristic(agentGraph, n))
+                return [self.nodeId, best]
+        return path or [self.nodeId]
+
+    # Function: Refine Plan
+    # ---------------------
+    # Spends one more PLANNING_BUDGET on the current anytime query and
+    # follows the improved path if there is one.
+    def refinePlan(self):
+        path = self.anytime.improve(self.PLANNING_BUDGET)
+        if path and len(path) > 1 and path[0] == self.nodeId:
+            self.nextId = path[1]
+
+    # Function: Get Planning Stats
+    # ---------------------
+    # (suboptimality bound, seconds spent) of the current anytime query.
+    def getPlanningStats(self):
+        if self.anytime is None:
+            return None
+        return (self.anytime.getBound(), self.anytime.getTimeSpent())
+
+    # Function: Set Occupancy Predictor
+    # ---------------------
+    # Plans against forward-predicted occupancy instead of the current belief
+    # snapshot. |predictor| is anything with a predictOccupancy(steps) method,
+    # such as the MultiTargetTracker of the other cars; None switches back.
+    def setOccupancyPredictor(self, predictor):
+        self.occupancyPredictor = predictor
+
+    # Function: Incremental Plan
+    # ---------------------
+    # Same path as aStar, from a D* Lite planner that is kept between calls
+    # and only repairs the nodes on belief tiles that changed.
+    def incrementalPlan(self, agentGraph, beliefOfOtherCars):
+        index = graphIndex.getGraphIndex(agentGraph)
+        if self.planner is None or self.planner.goal != self.terminalState or \
+           self.planner.graphIndex is not index:
+            self.planner = DStarLite(index, self.terminalState, self.RISK_WEIGHT,
+                                     beliefOfOtherCars.getNumRows(), beliefOfOtherCars.getNumCols())
+        return self.planner.plan(self.nodeId, particleEngine.beliefProbs(beliefOfOtherCars))
+
+    # Function: Hierarchical Plan
+    # ---------------------
+    # Dijkstra with edgeCost over the raw road graph, restricted to the nodes
+    # within LOCAL_RADIUS of self.nodeId, where the belief of other cars
+    # matters. Every node reached becomes a source of one contraction
+    # hierarchy query, weighted by its local cost, for the rest of the way to
+    # the terminal state. Returns the combined path, or [self.nodeId] if the
+    # terminal state is unreachable.
+    def hierarchicalPlan(self, agentGraph, beliefOfOtherCars):
+        index = graphIndex.getGraphIndex(agentGraph)
+        hierarchy = contractionHierarchy.getHierarchy(agentGraph)
+        risks = self.getNodeRisks(beliefOfOtherCars, agentGraph)
+        (x, y) = index.positions[index.index[self.nodeId]]
+        maxDist = self.LOCAL_RADIUS ** 2
+        costs = {self.nodeId: 0.0}
+        parents = {self.nodeId: None}
+        closed = set()
+        pq = [(0.0, self.nodeId)]
+        while len(pq) != 0:
+            (cost, nodeId) = heapq.heappop(pq)
+            if nodeId in closed:
+                continue
+            closed.add(nodeId)
+            for nextId in index.successors[nodeId]:
+                (nextX, nextY) = index.positions[index.index[nextId]]
+                if nextId in closed or (nextX - x) ** 2 + (nextY - y) ** 2 > maxDist:
+                    continue
+                nextCost = cost + self.edgeCost(risks, agentGraph, nodeId, nextId)
+                if nextCost < costs.get(nextId, float('inf')):
+                    costs[nextId] = nextCost
+                    parents[nextId] = nodeId
+                    heapq.heappush(pq, (nextCost, nextId))
+        (_, path) = hierarchy.query(costs, self.terminalState)
+        if path is None:
+            return [self.nodeId]
+        return self.reconstructPath(parents, path[0]) + path[1:]
 
+    # Function: A Star
+    # ---------------------
+    # A* over the road graph from self.nodeId to self.terminalState with
+    # edgeCost and goalHeuristic. Expands only the successors given by
+    # agentGraph.getNextNodeIds, keeps g-scores and parent pointers instead
+    # of whole paths and never expands a node twice, so a query costs
+    # O(E log V). Returns the path as a list of node ids, or [self.nodeId]
+    # if the terminal state is unreachable.
     def aStar(self, agentGraph, beliefOfOtherCars):
-        current = self.nodeId
+        start = self.nodeId
         goal = self.terminalState
-        allNodes = agentGraph.getAllNodes()
-        newPath = [current]
-        pq = []
-        heapq.heappush(pq, (self.goalHeuristic(agentGraph, current), newPath))
-        seen = set()
+        risks = self.getNodeRisks(beliefOfOtherCars, agentGraph)
+        gScores = {start: 0.0}
+        parents = {start: None}
+        closed = set()
+        counter = 0
+        pq = [(self.goalHeuristic(agentGraph, start), counter, start)]
         while len(pq) != 0:
-            currentPath = heapq.heappop(pq)[1]
-            currentState = currentPath[-1]
+            currentState = heapq.heappop(pq)[2]
+            if currentState in closed:
+                continue
             if currentState == goal:
-                return currentPath
-            if currentState in seen:
+                return self.reconstructPath(parents, goal)
+            closed.add(currentState)
+            currentCost = gScores[currentState]
+            for nextState in agentGraph.getNextNodeIds(currentState):
+                if nextState in closed:
+                    continue
+                cost = currentCost + self.edgeCost(risks, agentGraph, currentState, nextState)
+                if cost < gScores.get(nextState, float('inf')):
+                    gScores[nextState] = cost
+                    parents[nextState] = currentState
+                    counter += 1
+                    priority = cost + self.goalHeuristic(agentGraph, nextState)
+                    heapq.heappush(pq, (priority, counter, nextState))
+        return [start]
+
+    def reconstructPath(self, parents, nodeId):
+        path = []
+        while nodeId is not None:
+            path.append(nodeId)
+            nodeId = parents[nodeId]
+        path.reverse()
+        return path
+
+    # Function: Space Time A Star
+    # ---------------------
+    # A* over (node, time step) states. Driving an edge takes its length at
+    # Car.MAX_SPEED per tick, and waiting at a node takes one tick and costs
+    # Car.MAX_SPEED (the distance the tick could have covered), so waiting
+    # only pays off to let another car pass. Time steps are capped at
+    # PREDICTION_STEPS, and the risk of being on a node is read from the
+    # predicted occupancy for that step instead of the current belief. The
+    # occupancy stack is cached by the predictor for the tick and turned
+    # into a (steps x nodes) risk matrix with one gather.
+    #
+    # With a PLANNING_BUDGET the search stops at the deadline and returns the
+    # path to the expanded state nearest to the terminal state. Returns the
+    # path as a list of node ids, with a node repeated for every tick spent
+    # waiting on it, or [self.nodeId] if the terminal state is unreachable.
+    def spaceTimeAStar(self, agentGraph, beliefOfOtherCars):
+        deadline = None if self.PLANNING_BUDGET is None else time.time() + self.PLANNING_BUDGET
+        index = graphIndex.getGraphIndex(agentGraph)
+        occupancy = self.occupancyPredictor.predictOccupancy(self.PREDICTION_STEPS)
+        tiles = index.nodeTiles(beliefOfOtherCars.getNumRows(), beliefOfOtherCars.getNumCols())
+        risks = numpy.minimum(occupancy[:, tiles], 1.0).tolist()
+        lastStep = len(risks) - 1
+        start = (self.nodeId, 0)
+        goal = self.terminalState
+        gScores = {start: 0.0}
+        times = {start: 0.0}
+        parents = {start: None}
+        closed = set()
+        best = (self.goalHeuristic(agentGraph, self.nodeId), start)
+        counter = 0
+        pq = [(best[0], counter, start)]
+        while len(pq) != 0:
+            currentState = heapq.heappop(pq)[2]
+            if currentState in closed:
                 continue
-            seen.add(currentState)
-            for nextState in allNodes:
-                if self.nodeCarProb(beliefOfOtherCars, agentGraph, nextState) < self.MIN_PROB:
-                    path = currentPath.append(nextState)
-                    cost = self.startCost(agentGraph, currentState) + self.goalHeuristic(agentGraph, currentState)
-                    heapq.heappush(pq, (self.startCost(agentGraph, currentState) + cost, newPath))
+            (currentNode, currentStep) = currentState
+            if currentNode == goal:
+                return [state[0] for state in self.reconstructPath(parents, currentState)]
+            closed.add(currentState)
+            heuristic = self.goalHeuristic(agentGraph, currentNode)
+            if heuristic < best[0]:
+                best = (heuristic, currentState)
+            if deadline is not None and len(closed) % self.DEADLINE_CHECK == 0 and time.time() >= deadline:
+                break
+            # (node, arrival time in ticks, length) of every move.
+            moves = []
+            for nextNode in index.successors[currentNode]:
+                length = index.distance(currentNode, nextNode)
+                moves.append((nextNode, times[currentState] + length / Car.MAX_SPEED, length))
+            if currentStep < lastStep:
+                moves.append((currentNode, times[currentState] + 1.0, Car.MAX_SPEED))
+            for (nextNode, nextTime, length) in moves:
+                step = min(int(nextTime), lastStep)
+                nextState = (nextNode, step)
+                if nextState in closed:
+                    continue
+                risk = risks[step][index.index[nextNode]]
+                cost = gScores[currentState] + length + self.RISK_WEIGHT * risk
+                if cost < gScores.get(nextState, float('inf')):
+                    gScores[nextState] = cost
+                    times[nextState] = nextTime
+                    parents[nextState] = currentState
+                    counter += 1
+                    priority = cost + self.goalHeuristic(agentGraph, nextNode)
+                    heapq.heappush(pq, (priority, counter, nextState))
+        if best[1] == start:
+            return [self.nodeId]
+        return [state[0] for state in self.reconstructPath(parents, best[1])]
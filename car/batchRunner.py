@@ -0,0 +1,223 @@
+'''
+Extended by Peggy Wang @PeggyYuchunWang
+Licensing Information: Please do not distribute or publish solutions to this
+project. You are free to use and extend Driverless Car for educational
+purposes. The Driverless Car project was developed at Stanford, primarily by
+Chris Piech (piech@cs.stanford.edu). It was inspired by the Pacman projects.
+'''
+import fastForward
+import importlib, itertools, multiprocessing, optparse, os, sys, traceback
+import numpy
+
+
+# Results file
+# ---------------------
+# Episodes are stored as a numpy .npz archive with one array per column,
+# so a column can be read without touching the others. The layout,
+# inference and driver columns hold strings. While a batch runs, its
+# episodes are written in shards next to the results file (see
+# ResultsWriter).
+
+LAYOUTS = ['lombard', 'small']
+INFERENCES = ['particleFilter', 'exactInference', 'none']
+DRIVERS = ['autoDriver', 'autoDriverAStar', 'autoDriverOriginal']
+
+COLUMNS = [
+    ('layout', str),
+    ('inference', str),
+    ('driver', str),
+    ('seed', 'i8'),
+    ('failed', '?'),
+    ('collided', '?'),
+    ('reachedGoal', '?'),
+    ('ticks', 'i8'),
+    ('timeToGoal', 'f8'),
+    ('seconds', 'f8'),
+    ('meanPlanningTime', 'f8'),
+    ('maxPlanningTime', 'f8'),
+    ('meanInferenceTime', 'f8'),
+    ('maxInferenceTime', 'f8'),
+    ('meanPlanningBound', 'f8'),
+    ('maxPlanningBound', 'f8'),
+    ('pathCacheHits', 'i8'),
+    ('pathCacheMisses', 'i8'),
+    ('pathCacheInvalidations', 'i8'),
+    ('pathCacheHitRate', 'f8')
+]
+
+# Writes |columns| (a dict from column name to array) to the archive
+# |path| through a temporary file, so |path| is always a complete archive.
+def saveColumns(path, columns):
+    tmpPath = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmpPath, 'wb') as f:
+        numpy.savez(f, **columns)
+    os.rename(tmpPath, path)
+
+# The shards of the results file |path|, in the order they were written.
+def shardPaths(path):
+    prefix = os.path.basename(path) + '.part'
+    names = os.listdir(os.path.dirname(path) or os.curdir)
+    return sorted(os.path.join(os.path.dirname(path), name) for name in names
+                  if name.startswith(prefix) and name.endswith('.npz'))
+
+# Class: Results Writer
+# ---------------------
+# Collects episode rows (dicts keyed by column name) and writes every
+# SAVE_INTERVAL of them to a shard of their own next to |path|, so that
+# each row is written once however long the batch runs. close writes the
+# remaining rows and merges the shards into |path| in one pass. Shards and
+# a results file left at |path| by an earlier batch are removed first.
+class ResultsWriter(object):
+
+    SAVE_INTERVAL = 256
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = []
+        self.numRows = 0
+        self.numShards = 0
+        for stale in shardPaths(path) + ([path] if os.path.exists(path) else []):
+            os.remove(stale)
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.SAVE_INTERVAL:
+            self.save()
+
+    # Writes the collected rows to the next shard.
+    def save(self):
+        columns = dict((name, numpy.array([row[name] for row in self.rows], dtype=dtype))
+                       for (name, dtype) in COLUMNS)
+        saveColumns('%s.part%06d.npz' % (self.path, self.numShards), columns)
+        self.numShards += 1
+        self.numRows += len(self.rows)
+        self.rows = []
+
+    def close(self):
+        if self.rows or self.numShards == 0:
+            self.save()
+        shards = shardPaths(self.path)
+        saveColumns(self.path, loadResults(self.path))
+        for shard in shards:
+            os.remove(shard)
+
+# Function: Load Results
+# ---------------------
+# Reads a results file into a dict from column name to numpy array. Until
+# the batch writing it has closed, the columns are read from its shards.
+def loadResults(path):
+    paths = [path] if os.path.exists(path) else shardPaths(path)
+    parts = []
+    for partPath in paths:
+        with numpy.load(partPath) as data:
+            parts.append(dict((name, data[name]) for name in data.files))
+    return dict((name, numpy.concatenate([part[name] for part in parts]))
+                for name in (parts[0] if parts else []))
+
+# Function: Run Episode
+# ---------------------
+# Runs one seeded headless episode with junior driven by the AutoDriver of
+# module |driver| (one of DRIVERS) and returns its results row. A failing
+# episode is recorded as failed instead of stopping the batch.
+def runEpisode(episode):
+    (driver, layout, inference, seed, ticks) = episode
+    row = {
+        'layout': layout, 'inference': inference, 'driver': driver, 'seed': seed,
+        'failed': False, 'collided': False, 'reachedGoal': False, 'ticks': 0,
+        'timeToGoal': float('nan'), 'seconds': float('nan'),
+        'meanPlanningTime': float('nan'), 'maxPlanningTime': float('nan'),
+        'meanInferenceTime': float('nan'), 'maxInferenceTime': float('nan'),
+        'meanPlanningBound': float('nan'), 'maxPlanningBound': float('nan'),
+        'pathCacheHits': 0, 'pathCacheMisses': 0, 'pathCacheInvalidations': 0,
+        'pathCacheHitRate': float('nan')
+    }
+    try:
+        driverClass = importlib.import_module(driver).AutoDriver
+        stats = fastForward.runHeadless(layout, inference, ticks, seed, driverClass=driverClass)
+    except Exception:
+        traceback.print_exc()
+        row['failed'] = True
+        return row
+    for (name, dtype) in COLUMNS:
+        if name in stats:
+            row[name] = stats[name]
+    if stats['reachedGoal']:
+        row['timeToGoal'] = stats['ticks']
+    return row
+
+# Function: Run Batch
+# ---------------------
+# Runs |numEpisodes| episodes (seeds firstSeed, firstSeed + 1, ...) for
+# every combination of drivers, layouts and inference modes on a pool of
+# |processes| workers, and writes the rows to |path| as they finish. Every
+# combination sees the same seeds.
+def runBatch(path, drivers = DRIVERS, layouts = LAYOUTS, inferences = INFERENCES,
+             numEpisodes = 100, ticks = fastForward.DEFAULT_TICKS, firstSeed = 0, processes = None):
+    episodes = [(driver, layout, inference, seed, ticks) for (driver, layout, inference, seed) in
+                itertools.product(drivers, layouts, inferences, range(firstSeed, firstSeed + numEpisodes))]
+    writer = ResultsWriter(path)
+    pool = multiprocessing.Pool(processes)
+    try:
+        for row in pool.imap_unordered(runEpisode, episodes):
+            writer.write(row)
+    finally:
+        pool.close()
+        pool.join()
+        writer.close()
+    return writer.numRows
+
+# The mean of the non-nan values of column |name| in the rows of |mask|,
+# nan if there are none (or the results predate the column).
+def knownMean(results, name, mask):
+    values = results[name][mask] if name in results else numpy.zeros(0)
+    values = values[~numpy.isnan(values)]
+    return values.mean() if len(values) else float('nan')
+
+# Function: Summarize
+# ---------------------
+# Prints one line per (driver, layout, inference) of a results file.
+def summarize(path):
+    results = loadResults(path)
+    print('%-20s %-8s %-15s %6s %7s %8s %10s %12s %12s %7s %8s' % (
+        'driver', 'layout', 'inference', 'runs', 'goal %', 'crash %', 'ticks', 'plan (ms)', 'infer (ms)',
+        'bound', 'cache %'))
+    keys = sorted(set(zip(results['driver'], results['layout'], results['inference'])))
+    for (driver, layout, inference) in keys:
+        mask = (results['driver'] == driver) & (results['layout'] == layout) & \
+               (results['inference'] == inference) & ~results['failed']
+        if not mask.any():
+            continue
+        reached = results['timeToGoal'][mask]
+        reached = reached[~numpy.isnan(reached)]
+        print('%-20s %-8s %-15s %6d %7.1f %8.1f %10.1f %12.3f %12.3f %7.2f %8.1f' % (
+            driver, layout, inference, mask.sum(),
+            100.0 * results['reachedGoal'][mask].mean(),
+            100.0 * results['collided'][mask].mean(),
+            reached.mean() if len(reached) else float('nan'),
+            1000 * results['meanPlanningTime'][mask].mean(),
+            1000 * results['meanInferenceTime'][mask].mean(),
+            knownMean(results, 'meanPlanningBound', mask),
+            100.0 * knownMean(results, 'pathCacheHitRate', mask)))
+
+#   python batchRunner.py -n 1000 -t 2000 -o results.npz
+#   python batchRunner.py -s results.npz
+if __name__ == '__main__':
+    parser = optparse.OptionParser()
+    parser.add_option('-d', '--drivers', dest='drivers', default=','.join(DRIVERS))
+    parser.add_option('-l', '--layouts', dest='layouts', default=','.join(LAYOUTS))
+    parser.add_option('-i', '--inferences', dest='inferences', default=','.join(INFERENCES))
+    parser.add_option('-n', '--episodes', dest='episodes', type='int', default=100)
+    parser.add_option('-t', '--ticks', dest='ticks', type='int', default=fastForward.DEFAULT_TICKS)
+    parser.add_option('-f', '--first-seed', dest='firstSeed', type='int', default=0)
+    parser.add_option('-p', '--processes', dest='processes', type='int', default=None)
+    parser.add_option('-o', '--output', dest='output', default='results.npz')
+    parser.add_option('-s', '--summarize', dest='summarize', default=None)
+    (options, args) = parser.parse_args()
+    if options.summarize:
+        summarize(options.summarize)
+        sys.exit(0)
+    numRows = runBatch(options.output, options.drivers.split(','), options.layouts.split(','),
+                       options.inferences.split(','), options.episodes, options.ticks,
+                       options.firstSeed, options.processes)
+    print('wrote %d episodes to %s' % (numRows, options.output))
+    summarize(options.output)
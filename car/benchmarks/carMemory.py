@@ -0,0 +1,150 @@
+'''
+Benchmark: memory and allocations of 1,000 cars.
+
+Compares the original Car layout (a __dict__ per car holding its own Vec2d
+position, velocity and direction, with getBounds building its corners from
+scratch) with the current one (__slots__ plus the fleet arrays and bounds
+cache). Reports the bytes per car, and the Vec2d objects created and the
+time taken per getBounds and per collides call.
+
+Usage: python benchmarks/carMemory.py  (from the car directory)
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from engine.model.car.car import Car
+from engine.model.fleet import Fleet
+from engine.vector import Vec2d
+import math, random, time
+
+NUM_CARS = 1000
+
+# Class: Legacy Car
+# ---------------------
+# The attributes and bounds / collision code of the original Car.
+class LegacyCar(object):
+
+    def __init__(self, pos, direction, velocity):
+        self.initialPos = Vec2d(pos.x, pos.y)
+        self.pos = pos
+        self.velocity = velocity
+        self.dir = direction
+        self.wheelAngle = 0
+        self.maxSpeed = Car.MAX_SPEED
+        self.friction = Car.FRICTION
+        self.maxWheelAngle = Car.MAX_WHEEL_ANGLE
+
+    def getBounds(self):
+        normalDir = self.dir.normalized()
+        perpDir = normalDir.perpendicular()
+        return [
+            self.pos + normalDir * Car.LENGTH / 2 + perpDir * Car.WIDTH / 2,
+            self.pos + normalDir * Car.LENGTH / 2 - perpDir * Car.WIDTH / 2,
+            self.pos - normalDir * Car.LENGTH / 2 + perpDir * Car.WIDTH / 2,
+            self.pos - normalDir * Car.LENGTH / 2 - perpDir * Car.WIDTH / 2
+        ]
+
+    def collides(self, otherPos, otherBounds):
+        diff = otherPos - self.pos
+        if diff.get_length() > Car.RADIUS * 2: return False
+        bounds = self.getBounds()
+        vec1 = bounds[0] - bounds[1]
+        vec2 = otherBounds[0] - otherBounds[1]
+        for vec in [vec1, vec1.perpendicular(), vec2, vec2.perpendicular()]:
+            (minA, maxA) = Vec2d.projectPoints(bounds, vec)
+            (minB, maxB) = Vec2d.projectPoints(otherBounds, vec)
+            if maxA < minB or maxB < minA: return False
+        return True
+
+# Counts Vec2d constructions while installed.
+class VectorCounter(object):
+
+    def __init__(self):
+        self.count = 0
+        self.init = Vec2d.__init__
+
+    def __enter__(self):
+        counter = self
+        init = self.init
+        def countingInit(vector, *args, **kwargs):
+            counter.count += 1
+            init(vector, *args, **kwargs)
+        Vec2d.__init__ = countingInit
+        return self
+
+    def __exit__(self, *args):
+        Vec2d.__init__ = self.init
+
+# Rough deep size of an object: itself, its __dict__ and any Vec2d it holds.
+def deepSize(obj):
+    size = sys.getsizeof(obj)
+    values = []
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+        values = list(obj.__dict__.values())
+    else:
+        for cls in type(obj).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if name != '__weakref__' and hasattr(obj, name):
+                    values.append(getattr(obj, name))
+    for value in values:
+        if isinstance(value, Vec2d):
+            size += sys.getsizeof(value)
+            if hasattr(value, '__dict__'):
+                size += sys.getsizeof(value.__dict__)
+    return size
+
+def fleetBytes(fleet):
+    arrays = [fleet.pos, fleet.velocity, fleet.dir, fleet.wheelAngle, fleet.maxSpeed,
+              fleet.friction, fleet.maxWheelAngle, fleet.active, fleet.bounds, fleet.boundsValid]
+    return sum(a.nbytes for a in arrays)
+
+def makePoses():
+    random.seed(0)
+    poses = []
+    for i in range(NUM_CARS):
+        angle = random.uniform(0, 2 * math.pi)
+        poses.append((random.uniform(0, 1000), random.uniform(0, 1000), math.cos(angle), math.sin(angle)))
+    return poses
+
+# Returns (Vec2d allocations, seconds) per call of fn(car) over all cars.
+def measure(cars, fn):
+    with VectorCounter() as counter:
+        start = time.time()
+        for car in cars:
+            fn(car)
+        elapsed = time.time() - start
+    return (float(counter.count) / len(cars), elapsed / len(cars))
+
+def main():
+    poses = makePoses()
+    legacyCars = [LegacyCar(Vec2d(x, y), Vec2d(dx, dy), Vec2d(0, 0)) for (x, y, dx, dy) in poses]
+    Car.FLEET = Fleet()
+    cars = []
+    for (x, y, dx, dy) in poses:
+        car = Car(Vec2d(x, y), 'north', Vec2d(0, 0))
+        car.dir = Vec2d(dx, dy)
+        cars.append(car)
+
+    legacySize = sum(deepSize(car) for car in legacyCars) / float(NUM_CARS)
+    size = (sum(deepSize(car) for car in cars) + fleetBytes(Car.FLEET)) / float(NUM_CARS)
+    print('%d cars' % NUM_CARS)
+    print('%-28s %12s %12s' % ('', 'legacy', 'current'))
+    print('%-28s %12.0f %12.0f' % ('bytes per car', legacySize, size))
+
+    legacyBounds = measure(legacyCars, lambda car: car.getBounds())
+    measure(cars, lambda car: car.getBoundsArray())
+    bounds = measure(cars, lambda car: car.getBoundsArray())
+    print('%-28s %12.1f %12.1f' % ('Vec2d per getBounds', legacyBounds[0], bounds[0]))
+    print('%-28s %12.2f %12.2f' % ('us per getBounds', legacyBounds[1] * 1e6, bounds[1] * 1e6))
+
+    # Every car against its neighbour in the list, a pair within the radius.
+    legacyOther = [(car.pos + Vec2d(10, 0), car.getBounds()) for car in legacyCars]
+    other = [(car.pos + Vec2d(10, 0), car.getBoundsArray() + (10, 0)) for car in cars]
+    legacyCollides = measure(range(NUM_CARS), lambda i: legacyCars[i].collides(*legacyOther[i]))
+    collides = measure(range(NUM_CARS), lambda i: cars[i].collides(*other[i]))
+    print('%-28s %12.1f %12.1f' % ('Vec2d per collides', legacyCollides[0], collides[0]))
+    print('%-28s %12.2f %12.2f' % ('us per collides', legacyCollides[1] * 1e6, collides[1] * 1e6))
+
+if __name__ == '__main__':
+    main()
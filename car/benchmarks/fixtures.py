@@ -0,0 +1,122 @@
+'''
+Fixtures shared by the benchmarks and the tests: agents that need no
+layout or model, a synthetic grid road network for the planners and a
+synthetic transition model for the filters.
+
+Usage (from the car directory, or a script that put it on sys.path):
+  from benchmarks.fixtures import makeAgents, GridGraph, makeTransProb
+'''
+from engine.const import Const
+from engine.model.car.agent import Agent
+from engine.model.car.car import Car
+from engine.vector import Vec2d
+import math, random
+
+DIR_NAMES = ['north', 'south', 'east', 'west']
+# Map area per car made by makeAgents, in square pixels.
+AREA_PER_CAR = 200.0 ** 2
+
+# Class: Agent Comm
+# ---------------------
+# The part of the agent communication object the agents use.
+class AgentComm(object):
+
+    def __init__(self):
+        self.agents = []
+
+    def getAgents(self):
+        return self.agents
+
+# Function: Make Agents
+# ---------------------
+# Builds |numCars| standing agents sharing one AgentComm, at random
+# positions on a square map of AREA_PER_CAR per car, so the traffic density
+# stays the same for every count. Agent.__init__ is bypassed so that no
+# layout, graph or model is needed.
+def makeAgents(numCars):
+    side = math.sqrt(numCars * AREA_PER_CAR)
+    agentComm = AgentComm()
+    for i in range(numCars):
+        agent = Agent.__new__(Agent)
+        pos = Vec2d(random.uniform(0, side), random.uniform(0, side))
+        Car.__init__(agent, pos, random.choice(DIR_NAMES), Vec2d(0, 0))
+        agent.agentComm = agentComm
+        agentComm.agents.append(agent)
+    return agentComm.agents
+
+# Class: Grid Node / Graph
+# ---------------------
+# A grid road network with a node at the centre of every belief tile, roads
+# between neighbouring tiles and the far corner as the terminal. With a
+# |dropRate|, that fraction of the roads is missing (making others one
+# way), drawn from |seed|. Implements the parts of agentGraph the planners
+# use; nextIds may be edited to build dead ends.
+class GridNode(object):
+
+    def __init__(self, nodeId, x, y):
+        self.nodeId = nodeId
+        self.pos = Vec2d(x, y)
+
+    def getId(self):
+        return self.nodeId
+
+    def getPos(self):
+        return self.pos
+
+class GridGraph(object):
+
+    def __init__(self, numRows, numCols, dropRate = 0.0, seed = 0):
+        rng = random.Random(seed)
+        self.numRows = numRows
+        self.numCols = numCols
+        self.nodeMap = dict()
+        self.nextIds = dict()
+        for r in range(numRows):
+            for c in range(numCols):
+                nodeId = r * numCols + c
+                self.nodeMap[nodeId] = GridNode(nodeId, (c + 0.5) * Const.BELIEF_TILE_SIZE,
+                                                (r + 0.5) * Const.BELIEF_TILE_SIZE)
+                self.nextIds[nodeId] = []
+                for (dr, dc) in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+                    if 0 <= r + dr < numRows and 0 <= c + dc < numCols and rng.random() >= dropRate:
+                        self.nextIds[nodeId].append((r + dr) * numCols + c + dc)
+        self.terminal = numRows * numCols - 1
+
+    def getNextNodeIds(self, nodeId):
+        return self.nextIds[nodeId]
+
+    def getNode(self, nodeId):
+        return self.nodeMap[nodeId]
+
+    def getNodeX(self, nodeId):
+        return self.nodeMap[nodeId].pos.x
+
+    def getNodeY(self, nodeId):
+        return self.nodeMap[nodeId].pos.y
+
+    def isTerminal(self, nodeId):
+        return nodeId == self.terminal
+
+    def getNearestNode(self, pos):
+        r = min(max(int(pos.y / Const.BELIEF_TILE_SIZE), 0), self.numRows - 1)
+        c = min(max(int(pos.x / Const.BELIEF_TILE_SIZE), 0), self.numCols - 1)
+        return r * self.numCols + c
+
+    def atNode(self, nodeId, pos):
+        node = self.nodeMap[nodeId].pos
+        return math.hypot(node.x - pos.x, node.y - pos.y) < Const.BELIEF_TILE_SIZE / 2.0
+
+# Function: Make Trans Prob
+# ---------------------
+# Synthetic transProb ((oldTile, newTile) -> prob) over a grid: every tile
+# moves to itself or a neighbour. Drawn from |seed|, or from the global
+# random stream without one.
+def makeTransProb(numRows, numCols, seed = None):
+    rng = random if seed is None else random.Random(seed)
+    transProb = dict()
+    for r in range(numRows):
+        for c in range(numCols):
+            for (dr, dc) in [(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)]:
+                if 0 <= r + dr < numRows and 0 <= c + dc < numCols:
+                    transProb[((r, c), (r + dr, c + dc))] = rng.random()
+    return transProb
@@ -0,0 +1,64 @@
+'''
+Benchmark: Car.update versus the vectorized Fleet step.
+
+Times one physics tick for growing car counts, once by calling update on
+every car and once with Car.updateAll, which advances the whole fleet with
+one Fleet.step. Both runs start from the same random poses, velocities and
+wheel angles, and the final positions are compared.
+
+Usage: python benchmarks/fleetPhysics.py  (from the car directory)
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.fixtures import DIR_NAMES
+from engine.model.car.car import Car
+from engine.model.fleet import Fleet
+from engine.vector import Vec2d
+import random, time
+import numpy
+
+CAR_COUNTS = [10, 100, 500, 1000, 5000]
+TICKS = 20
+
+# Function: Make Cars
+# ---------------------
+# Builds |numCars| moving cars in a fresh fleet, seeded so that every call
+# with the same count gives the same cars.
+def makeCars(numCars):
+    random.seed(numCars)
+    Car.FLEET = Fleet()
+    cars = []
+    for i in range(numCars):
+        pos = Vec2d(random.uniform(0, 1000), random.uniform(0, 1000))
+        car = Car(pos, random.choice(DIR_NAMES), Vec2d(0, 0))
+        car.accelerate(random.uniform(0, Car.MAX_ACCELERATION))
+        car.setWheelAngle(random.uniform(-20, 20))
+        cars.append(car)
+    return cars
+
+def runTicks(cars, update):
+    start = time.time()
+    for tick in range(TICKS):
+        update(cars)
+    return (time.time() - start) / TICKS
+
+def updateEach(cars):
+    for car in cars:
+        car.update()
+
+def main():
+    print('%8s %16s %16s %10s %12s' % ('cars', 'update (ms)', 'updateAll (ms)', 'speedup', 'max diff'))
+    for numCars in CAR_COUNTS:
+        cars = makeCars(numCars)
+        eachTime = runTicks(cars, updateEach)
+        eachPos = numpy.array([(car.pos.x, car.pos.y) for car in cars])
+        cars = makeCars(numCars)
+        fleetTime = runTicks(cars, Car.updateAll)
+        fleetPos = numpy.array([(car.pos.x, car.pos.y) for car in cars])
+        print('%8d %16.3f %16.3f %9.1fx %12.2e' % (numCars, eachTime * 1000, fleetTime * 1000,
+                                                 eachTime / fleetTime,
+                                                 numpy.abs(eachPos - fleetPos).max()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+'''
+Benchmark: Agent.isCloseToOtherCar broad phase.
+
+Times one simulation tick (every agent runs isCloseToOtherCar and then
+moves) with the original all-pairs loop over agentComm.getAgents() and with
+the per-agentComm SpatialHash, for growing car counts. Cars are placed at
+random on a square map whose area grows with the car count, so the traffic
+density stays the same.
+
+Usage: python benchmarks/spatialHash.py  (from the car directory)
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.fixtures import makeAgents
+from engine.model.car.agent import Agent
+from engine.model.car.car import Car
+from engine.vector import Vec2d
+from engine.const import Const
+import random, time
+
+CAR_COUNTS = [25, 50, 100, 200, 400, 800]
+TICKS = 10
+
+# Function: Legacy Is Close To Other Car
+# ---------------------
+# The original Agent.isCloseToOtherCar, testing against every agent.
+def legacyIsCloseToOtherCar(agent):
+    newBounds = []
+    offset = agent.dir.normalized() * 1.5 * Car.LENGTH
+    for bound in agent.getBounds():
+        bound += offset
+        newBounds.append(bound)
+    newPos = agent.pos + offset
+    for other in agent.agentComm.getAgents():
+        if other.collides(newPos, newBounds): return True
+    return False
+
+# Function: Run Ticks
+# ---------------------
+# Runs TICKS ticks in which every agent tests for nearby cars, accelerates
+# if the way is free and moves with |update|. Returns the mean tick time and
+# the number of blocked agents.
+def runTicks(agents, isCloseToOtherCar, update):
+    blocked = 0
+    start = time.time()
+    for tick in range(TICKS):
+        for agent in agents:
+            if isCloseToOtherCar(agent):
+                blocked += 1
+                agent.velocity = Vec2d(0, 0)
+            else:
+                agent.accelerate(Agent.ACCELERATION)
+            update(agent)
+    return ((time.time() - start) / TICKS, blocked)
+
+def main():
+    Const.CARS_PARKED = False
+    print('%8s %14s %14s %10s' % ('cars', 'legacy (ms)', 'hash (ms)', 'speedup'))
+    for numCars in CAR_COUNTS:
+        random.seed(numCars)
+        (legacyTime, legacyBlocked) = runTicks(makeAgents(numCars), legacyIsCloseToOtherCar,
+                                               Car.update)
+        random.seed(numCars)
+        (hashTime, hashBlocked) = runTicks(makeAgents(numCars), Agent.isCloseToOtherCar, Agent.update)
+        if legacyBlocked != hashBlocked:
+            raise Exception('broad phase changed the result')
+        print('%8d %14.3f %14.3f %9.1fx' % (numCars, legacyTime * 1000, hashTime * 1000,
+                                          legacyTime / hashTime))
+
+if __name__ == '__main__':
+    main()
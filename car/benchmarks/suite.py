@@ -0,0 +1,317 @@
+'''
+Benchmark suite: inference, planning and physics hot paths.
+
+Micro-benchmarks, each swept over the parameter that drives its cost:
+
+  ParticleFilter.observe / elapseTime / updateBelief   particles x map size
+  MultiTargetTracker.observe / elapseTime / getBeliefs particles x cars x map size
+  AutoDriver.aStar / choseNextId                       map size
+  Car.collides                                         (single pair)
+  Agent.isCloseToOtherCar, Car.collidesAny,            car count
+  Car.updateAll
+
+Inference runs on a synthetic transition model (every tile moves to itself
+or a neighbour) compiled into a temporary directory, and planning on a
+synthetic grid road network, so the micro-benchmarks need no learned data.
+The macro-benchmarks fast-forward the shipped layouts headless with every
+inference mode and report ticks per second.
+
+Results are written as JSON; --compare prints the ratio between two result
+files for every benchmark they share, flagging the ones that got slower.
+
+Usage (from the car directory):
+  python benchmarks/suite.py [-o results.json] [--quick] [--no-macro]
+  python benchmarks/suite.py --compare old.json new.json
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.fixtures import GridGraph, makeAgents, makeTransProb
+from engine.const import Const
+from engine.model.car.car import Car
+from engine.vector import Vec2d
+from inference import ParticleFilter, MultiTargetTracker
+import autoDriverAStar
+import fastForward
+import particleEngine
+import transitionModel
+import json, optparse, platform, random, shutil, subprocess, tempfile, time
+import numpy
+
+PARTICLE_COUNTS = [500, 5000, 50000]
+MAP_SIZES = [(20, 30), (60, 90), (150, 200)]
+CAR_COUNTS = [25, 100, 400, 800]
+TRACKED_CAR_COUNTS = [5, 20]
+LAYOUTS = ['small', 'lombard']
+INFERENCES = ['none', 'exactInference', 'particleFilter']
+MACRO_TICKS = 500
+# Start nodes per planning measurement.
+NUM_STARTS = 20
+# Tiles holding another car in each planning belief.
+BELIEF_CARS = 10
+
+# Smaller sweeps for --quick.
+QUICK_PARTICLE_COUNTS = [500, 5000]
+QUICK_MAP_SIZES = [(20, 30), (60, 90)]
+QUICK_CAR_COUNTS = [25, 100]
+QUICK_TRACKED_CAR_COUNTS = [5]
+QUICK_MACRO_TICKS = 100
+
+# Each measurement repeats a batch of calls REPEATS times; the batch is
+# sized to take at least MIN_TIME seconds.
+REPEATS = 5
+MIN_TIME = 0.05
+# --compare flags benchmarks that got slower by more than this ratio.
+REGRESSION_RATIO = 1.1
+
+# Function: Measure
+# ---------------------
+# Times fn() and returns the best and mean seconds per call. One call warms
+# up any caches, and the calibration batch is not counted.
+def measure(fn):
+    fn()
+    number = 1
+    while True:
+        start = time.time()
+        for i in range(number):
+            fn()
+        if time.time() - start >= MIN_TIME or number >= 1 << 20:
+            break
+        number *= 2
+    times = []
+    for r in range(REPEATS):
+        start = time.time()
+        for i in range(number):
+            fn()
+        times.append((time.time() - start) / number)
+    return {'seconds': min(times), 'mean': sum(times) / len(times), 'calls': number * REPEATS}
+
+# Times fn() and records the seconds per operation, for fn doing |count|.
+def record(results, name, params, fn, count = 1):
+    result = measure(fn)
+    result['seconds'] /= count
+    result['mean'] /= count
+    result['name'] = name
+    result['params'] = params
+    results.append(result)
+    print('%-28s %-36s %12.3f us' % (name, json.dumps(params, sort_keys=True), result['seconds'] * 1e6))
+
+def mapName(numRows, numCols):
+    return '%dx%d' % (numRows, numCols)
+
+# Function: Random Belief
+# ---------------------
+# A faint random belief over every tile, plus |numCars| random tiles that
+# hold another car with high probability.
+def randomBelief(numRows, numCols, numCars = 0):
+    belief = particleEngine.ArrayBelief(numRows, numCols, 0.0)
+    belief.probs[:] = numpy.random.random(numRows * numCols) * 0.01
+    cars = numpy.random.randint(numRows * numCols, size=numCars)
+    belief.probs[cars] = numpy.random.uniform(0.5, 1.0, numCars)
+    return belief
+
+# Function: Bench Particle Filter
+# ---------------------
+# ParticleFilter.observe, elapseTime and updateBelief with a fixed number
+# of particles (ADAPTIVE off), for every particle count and map size, and
+# the same for the MultiTargetTracker of |trackedCarCounts| cars.
+def benchParticleFilter(results, particleCounts, mapSizes, trackedCarCounts):
+    learnedDir = transitionModel.LEARNED_DIR
+    transitionModel.LEARNED_DIR = tempfile.mkdtemp()
+    try:
+        for (numRows, numCols) in mapSizes:
+            Const.LAYOUT = 'benchmark' + mapName(numRows, numCols)
+            transitionModel.installModel(Const.LAYOUT, numRows, numCols, makeTransProb(numRows, numCols))
+            agentX = numCols * Const.BELIEF_TILE_SIZE / 2.0
+            agentY = numRows * Const.BELIEF_TILE_SIZE / 2.0
+            for numParticles in particleCounts:
+                pf = ParticleFilter(numRows, numCols)
+                pf.ADAPTIVE = False
+                pf.NUM_PARTICLES = numParticles
+                pf.initParticles()
+                params = {'particles': numParticles, 'map': mapName(numRows, numCols)}
+                record(results, 'ParticleFilter.observe', params,
+                       lambda: pf.observe(agentX, agentY, random.uniform(0, agentX)))
+                record(results, 'ParticleFilter.elapseTime', params, pf.elapseTime)
+                record(results, 'ParticleFilter.updateBelief', params, pf.updateBelief)
+                benchTracker(results, numRows, numCols, numParticles, trackedCarCounts)
+    finally:
+        shutil.rmtree(transitionModel.LEARNED_DIR)
+        transitionModel.LEARNED_DIR = learnedDir
+
+# Function: Bench Tracker
+# ---------------------
+# MultiTargetTracker.observe, elapseTime and getBeliefs (with every belief
+# stale) for a fixed |numParticles| particles per car (ADAPTIVE off) and
+# every tracked car count, timed per call covering all cars.
+def benchTracker(results, numRows, numCols, numParticles, trackedCarCounts):
+    agentX = numCols * Const.BELIEF_TILE_SIZE / 2.0
+    agentY = numRows * Const.BELIEF_TILE_SIZE / 2.0
+    defaults = (MultiTargetTracker.NUM_PARTICLES, MultiTargetTracker.ADAPTIVE)
+    MultiTargetTracker.NUM_PARTICLES = numParticles
+    MultiTargetTracker.ADAPTIVE = False
+    try:
+        for numCars in trackedCarCounts:
+            tracker = MultiTargetTracker(numRows, numCols)
+            for i in range(numCars):
+                tracker.addTarget()
+            params = {'particles': numParticles, 'cars': numCars, 'map': mapName(numRows, numCols)}
+            record(results, 'MultiTargetTracker.observe', params,
+                   lambda: tracker.observe(agentX, agentY, numpy.random.uniform(0, agentX, numCars)))
+            record(results, 'MultiTargetTracker.elapseTime', params, tracker.elapseTime)
+
+            def getBeliefs():
+                tracker.dirty[:] = True
+                tracker.getBeliefs()
+            record(results, 'MultiTargetTracker.getBeliefs', params, getBeliefs)
+    finally:
+        (MultiTargetTracker.NUM_PARTICLES, MultiTargetTracker.ADAPTIVE) = defaults
+
+# Function: Bench Planning
+# ---------------------
+# AutoDriver.aStar, and choseNextId as configured but without the path
+# cache, per query from the same NUM_STARTS random start nodes. Every start
+# has its own belief with BELIEF_CARS other cars, so incremental replanning
+# has risks to repair on every query rather than reusing the last search.
+def benchPlanning(results, mapSizes):
+    for (numRows, numCols) in mapSizes:
+        agentGraph = GridGraph(numRows, numCols)
+        driver = autoDriverAStar.AutoDriver()
+        driver.PATH_CACHE = False
+        driver.getTerminalState(agentGraph)
+        starts = [(random.randrange(numRows * numCols), randomBelief(numRows, numCols, BELIEF_CARS))
+                  for i in range(NUM_STARTS)]
+        params = {'map': mapName(numRows, numCols)}
+
+        def aStar():
+            for (nodeId, belief) in starts:
+                driver.nodeId = nodeId
+                driver.aStar(agentGraph, belief)
+        record(results, 'AutoDriver.aStar', params, aStar, NUM_STARTS)
+
+        def choseNextId():
+            for (nodeId, belief) in starts:
+                driver.nodeId = nodeId
+                driver.choseNextId(agentGraph, belief)
+        record(results, 'AutoDriver.choseNextId', params, choseNextId, NUM_STARTS)
+
+# Function: Bench Cars
+# ---------------------
+# Car.collides on one overlapping pair, and for every car count
+# Agent.isCloseToOtherCar per agent, Car.collidesAny of one car against all
+# of them (the collision check of a fast-forward tick) and Car.updateAll
+# per tick of all cars.
+def benchCars(results, carCounts):
+    (car, other) = makeAgents(2)
+    car.pos = Vec2d(100, 100)
+    other.pos = Vec2d(110, 100)
+    otherBounds = other.getBoundsArray().copy()
+    record(results, 'Car.collides', {}, lambda: car.collides(other.pos, otherBounds))
+    for numCars in carCounts:
+        agents = makeAgents(numCars)
+        for agent in agents:
+            agent.accelerate(random.uniform(0, Car.MAX_ACCELERATION))
+        params = {'cars': numCars}
+        record(results, 'Agent.isCloseToOtherCar', params,
+               lambda: [agent.isCloseToOtherCar() for agent in agents], numCars)
+        record(results, 'Car.collidesAny', params,
+               lambda: Car.collidesAny(agents, car.pos, car.getBoundsArray()))
+        record(results, 'Car.updateAll', params, lambda: Car.updateAll(agents))
+
+# Function: Bench Macro
+# ---------------------
+# Headless ticks per second on the shipped layouts. A configuration that
+# cannot run (e.g. missing layout data) is recorded with its error.
+def benchMacro(results, ticks):
+    for layout in LAYOUTS:
+        for inference in INFERENCES:
+            result = {'name': 'fastForward', 'params': {'layout': layout, 'inference': inference,
+                                                        'ticks': ticks}}
+            try:
+                stats = fastForward.runHeadless(layout, inference, ticks, seed=0)
+                result['ticksPerSecond'] = stats['ticksPerSecond']
+                result['seconds'] = stats['seconds'] / max(stats['ticks'], 1)
+                result['ticks'] = stats['ticks']
+                print('%-28s %-36s %12.1f ticks/s' % ('fastForward', layout + ' ' + inference,
+                                                     stats['ticksPerSecond']))
+            except Exception as e:
+                result['error'] = repr(e)
+                print('%-28s %-36s %s' % ('fastForward', layout + ' ' + inference, repr(e)))
+            results.append(result)
+
+def gitCommit():
+    try:
+        with open(os.devnull, 'w') as devnull:
+            return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=devnull).decode('utf-8').strip()
+    except Exception:
+        return None
+
+# Function: Compare
+# ---------------------
+# Prints old / new seconds per call and their ratio for every benchmark in
+# both result files.
+def compare(oldPath, newPath):
+    def load(path):
+        with open(path) as f:
+            data = json.load(f)
+        entries = data['micro'] + data['macro']
+        return dict(((e['name'], json.dumps(e['params'], sort_keys=True)), e)
+                    for e in entries if 'seconds' in e)
+    old = load(oldPath)
+    new = load(newPath)
+    print('%-28s %-36s %12s %12s %8s' % ('benchmark', 'params', 'old (us)', 'new (us)', 'ratio'))
+    for key in sorted(set(old) & set(new)):
+        ratio = new[key]['seconds'] / old[key]['seconds']
+        flag = '  slower' if ratio > REGRESSION_RATIO else ''
+        print('%-28s %-36s %12.3f %12.3f %7.2fx%s' % (key[0], key[1], old[key]['seconds'] * 1e6,
+                                                     new[key]['seconds'] * 1e6, ratio, flag))
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-o', '--output', dest='output', default='benchmarkResults.json')
+    parser.add_option('-q', '--quick', action='store_true', dest='quick', default=False)
+    parser.add_option('--no-macro', action='store_false', dest='macro', default=True)
+    parser.add_option('--compare', action='store_true', dest='compare', default=False)
+    (options, args) = parser.parse_args()
+    if options.compare:
+        compare(args[0], args[1])
+        return
+
+    random.seed(0)
+    numpy.random.seed(0)
+    # The inference benchmarks install their own layouts.
+    layout = getattr(Const, 'LAYOUT', None)
+    micro = []
+    macro = []
+    try:
+        if options.quick:
+            benchParticleFilter(micro, QUICK_PARTICLE_COUNTS, QUICK_MAP_SIZES, QUICK_TRACKED_CAR_COUNTS)
+            benchPlanning(micro, QUICK_MAP_SIZES)
+            benchCars(micro, QUICK_CAR_COUNTS)
+        else:
+            benchParticleFilter(micro, PARTICLE_COUNTS, MAP_SIZES, TRACKED_CAR_COUNTS)
+            benchPlanning(micro, MAP_SIZES)
+            benchCars(micro, CAR_COUNTS)
+    finally:
+        Const.LAYOUT = layout
+    if options.macro:
+        benchMacro(macro, QUICK_MACRO_TICKS if options.quick else MACRO_TICKS)
+
+    data = {
+        'meta': {
+            'commit': gitCommit(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': numpy.__version__,
+            'machine': platform.machine(),
+            'quick': options.quick
+        },
+        'micro': micro,
+        'macro': macro
+    }
+    with open(options.output, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    print('wrote ' + options.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+'''
+Benchmark: ParticleFilter.elapseTime transition sampling.
+
+Compares the original dict based elapseTime (one util.weightedRandomChoice
+linear scan per particle) with particleEngine.TransitionSampler (one batched
+alias table draw) across particle counts and map sizes. The transition model
+is synthetic: every tile moves to itself or one of its four neighbours.
+
+Usage: python benchmarks/transitionSampler.py  (from the car directory)
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util
+import particleEngine
+import collections, random, time
+import numpy
+
+PARTICLE_COUNTS = [500, 5000, 50000]
+MAP_SIZES = [(20, 30), (60, 90), (150, 200)]
+REPEATS = 5
+
+# Function: Make Trans Prob Dict
+# ---------------------
+# Builds a synthetic transProbDict over a (numRows x numCols) grid.
+def makeTransProbDict(numRows, numCols):
+    transProbDict = dict()
+    for r in range(numRows):
+        for c in range(numCols):
+            row = collections.defaultdict(int)
+            for (dr, dc) in [(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)]:
+                if 0 <= r + dr < numRows and 0 <= c + dc < numCols:
+                    row[(r + dr, c + dc)] = random.random()
+            transProbDict[(r, c)] = row
+    return transProbDict
+
+# Function: Legacy Elapse Time
+# ---------------------
+# The original ParticleFilter.elapseTime over a particle count defaultdict.
+def legacyElapseTime(transProbDict, particles, numParticles):
+    newParticles = collections.defaultdict(int)
+    for oldTile in particles:
+        weightDict = collections.defaultdict(int)
+        numPar = particles[oldTile]
+        if oldTile not in transProbDict:
+            continue
+        for newTile in transProbDict[oldTile]:
+            weightDict[newTile] = transProbDict[oldTile][newTile] * float(numPar)/float(numParticles)
+        for i in range(numPar):
+            newParticles[util.weightedRandomChoice(weightDict)] += 1
+    return newParticles
+
+def timeIt(fn):
+    best = float('inf')
+    for i in range(REPEATS):
+        start = time.time()
+        fn()
+        best = min(best, time.time() - start)
+    return best
+
+def main():
+    random.seed(0)
+    numpy.random.seed(0)
+    print('%10s %10s %14s %14s %10s' % ('map', 'particles', 'legacy (ms)', 'alias (ms)', 'speedup'))
+    for (numRows, numCols) in MAP_SIZES:
+        transProbDict = makeTransProbDict(numRows, numCols)
+        sampler = particleEngine.buildTransitionSampler(transProbDict, numRows, numCols)
+        tiles = list(transProbDict.keys())
+        for numParticles in PARTICLE_COUNTS:
+            particles = numpy.array([particleEngine.tileId(random.choice(tiles), numCols)
+                                     for i in range(numParticles)], dtype=numpy.int64)
+            counts = collections.defaultdict(int)
+            for p in particles:
+                counts[particleEngine.tileFromId(p, numCols)] += 1
+            aliasTime = timeIt(lambda: sampler.sample(particles))
+            legacyTime = timeIt(lambda: legacyElapseTime(transProbDict, counts, numParticles))
+            print('%10s %10d %14.3f %14.3f %9.1fx' % ('%dx%d' % (numRows, numCols), numParticles,
+                                                     legacyTime * 1000, aliasTime * 1000,
+                                                     legacyTime / aliasTime))
+
+if __name__ == '__main__':
+    main()
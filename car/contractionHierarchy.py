@@ -0,0 +1,284 @@
+'''
+Extended by Peggy Wang @PeggyYuchunWang
+Licensing Information: Please do not distribute or publish solutions to this
+project. You are free to use and extend Driverless Car for educational
+purposes. The Driverless Car project was developed at Stanford, primarily by
+Chris Piech (piech@cs.stanford.edu). It was inspired by the Pacman projects.
+'''
+import graphIndex
+import heapq
+import os
+import numpy
+
+INF = float('inf')
+LEARNED_DIR = 'learned'
+
+_hierarchies = dict()
+
+# Function: Hierarchy Path
+# ---------------------
+# Where the contraction hierarchy of the road graph with GraphIndex
+# |fingerprint| is stored.
+def hierarchyPath(fingerprint):
+    return os.path.join(LEARNED_DIR, '%sHierarchy.npz' % fingerprint)
+
+# Function: Get Hierarchy
+# ---------------------
+# Returns the ContractionHierarchy of the road graph |agentGraph|. It is
+# loaded from disk if a hierarchy for the same road graph was saved before,
+# and otherwise built and saved. Hierarchies are keyed on the fingerprint of
+# the graph's GraphIndex, so a changed road graph never reuses a stale one.
+def getHierarchy(agentGraph):
+    index = graphIndex.getGraphIndex(agentGraph)
+    if index.fingerprint not in _hierarchies:
+        path = hierarchyPath(index.fingerprint)
+        hierarchy = None
+        if os.path.exists(path):
+            hierarchy = ContractionHierarchy.load(index, path)
+        if hierarchy is None:
+            hierarchy = ContractionHierarchy.build(index)
+            hierarchy.save(path)
+        _hierarchies[index.fingerprint] = hierarchy
+    return _hierarchies[index.fingerprint]
+
+
+# Class: Contraction Hierarchy
+# ---------------------
+# Contraction hierarchy (Geisberger et al.) of the road graph weighted by
+# edge length. Nodes are contracted one by one in order of importance (edge
+# difference plus number of contracted neighbours); whenever removing a node
+# would lengthen a shortest path between two of its neighbours, a shortcut
+# edge is added. A query is then a bidirectional Dijkstra search that only
+# relaxes edges leading to higher ranked nodes, which settles a few hundred
+# nodes even on large graphs.
+#
+# Nodes are referred to by their position in graphIndex.nodeIds. The upward
+# edges of the forward search and the reversed downward edges of the
+# backward search are kept as CSR arrays, and every shortcut remembers the
+# node it skips so paths can be unpacked to raw road graph nodes.
+class ContractionHierarchy(object):
+
+    # Settled node limit of the witness searches during contraction. Lower
+    # values build faster but add more (unnecessary) shortcuts.
+    WITNESS_LIMIT = 64
+
+    def __init__(self, graphIndex, rank, up, down, middles):
+        self.graphIndex = graphIndex
+        self.rank = rank
+        (self.upOffsets, self.upTargets, self.upWeights) = up
+        (self.downOffsets, self.downSources, self.downWeights) = down
+        self.middles = middles
+        self.adjacency = [self.adjacencyLists(up), self.adjacencyLists(down)]
+
+    @staticmethod
+    def adjacencyLists(csr):
+        (offsets, targets, weights) = [numpy.asarray(a).tolist() for a in csr]
+        return [list(zip(targets[offsets[i]:offsets[i + 1]], weights[offsets[i]:offsets[i + 1]]))
+                for i in range(len(offsets) - 1)]
+
+    # Function: Build
+    # ---------------------
+    # Contracts the road graph of |graphIndex|.
+    @staticmethod
+    def build(graphIndex):
+        numNodes = graphIndex.getNumNodes()
+        index = graphIndex.index
+        outEdges = [dict() for _ in range(numNodes)]
+        inEdges = [dict() for _ in range(numNodes)]
+        for (i, nodeId) in enumerate(graphIndex.nodeIds):
+            for nextId in graphIndex.successors[nodeId]:
+                j = index[nextId]
+                if i != j:
+                    weight = graphIndex.distance(nodeId, nextId)
+                    if weight < outEdges[i].get(j, INF):
+                        outEdges[i][j] = weight
+                        inEdges[j][i] = weight
+        edges = dict(((i, j), w) for i in range(numNodes) for (j, w) in outEdges[i].items())
+        middles = dict()
+        contracted = numpy.zeros(numNodes, dtype=bool)
+        deleted = numpy.zeros(numNodes, dtype=numpy.int64)
+        rank = numpy.zeros(numNodes, dtype=numpy.int64)
+
+        def shortcuts(v):
+            found = []
+            targets = [w for w in outEdges[v] if not contracted[w]]
+            for u in inEdges[v]:
+                if contracted[u]:
+                    continue
+                bound = dict((w, inEdges[v][u] + outEdges[v][w]) for w in targets if w != u)
+                if not bound:
+                    continue
+                witness = ContractionHierarchy.witnessSearch(outEdges, contracted, u, v, max(bound.values()))
+                for (w, weight) in bound.items():
+                    if witness.get(w, INF) > weight:
+                        found.append((u, w, weight))
+            return found
+
+        def importance(v):
+            degree = len([u for u in inEdges[v] if not contracted[u]]) + \
+                     len([w for w in outEdges[v] if not contracted[w]])
+            return len(shortcuts(v)) - degree + deleted[v]
+
+        pq = [(importance(v), v) for v in range(numNodes)]
+        heapq.heapify(pq)
+        order = 0
+        while pq:
+            (_, v) = heapq.heappop(pq)
+            if contracted[v]:
+                continue
+            # Lazy update: contract v only if it is still the least important.
+            priority = importance(v)
+            if pq and priority > pq[0][0]:
+                heapq.heappush(pq, (priority, v))
+                continue
+            for (u, w, weight) in shortcuts(v):
+                if weight < outEdges[u].get(w, INF):
+                    outEdges[u][w] = weight
+                    inEdges[w][u] = weight
+                    edges[(u, w)] = weight
+                    middles[(u, w)] = v
+            contracted[v] = True
+            rank[v] = order
+            order += 1
+            for neighbour in list(inEdges[v]) + list(outEdges[v]):
+                deleted[neighbour] += 1
+
+        upEdges = [[] for _ in range(numNodes)]
+        downEdges = [[] for _ in range(numNodes)]
+        for ((u, w), weight) in edges.items():
+            if rank[w] > rank[u]:
+                upEdges[u].append((w, weight))
+            else:
+                downEdges[w].append((u, weight))
+        return ContractionHierarchy(graphIndex, rank, ContractionHierarchy.toCsr(upEdges),
+                                    ContractionHierarchy.toCsr(downEdges), middles)
+
+    # Dijkstra from |source| that ignores |skipped| and contracted nodes, up
+    # to distance |bound| or WITNESS_LIMIT settled nodes.
+    @staticmethod
+    def witnessSearch(outEdges, contracted, source, skipped, bound):
+        distances = {source: 0.0}
+        pq = [(0.0, source)]
+        settled = 0
+        while pq and settled < ContractionHierarchy.WITNESS_LIMIT:
+            (dist, u) = heapq.heappop(pq)
+            if dist > distances[u]:
+                continue
+            if dist > bound:
+                break
+            settled += 1
+            for (w, weight) in outEdges[u].items():
+                if w == skipped or contracted[w]:
+                    continue
+                newDist = dist + weight
+                if newDist < distances.get(w, INF):
+                    distances[w] = newDist
+                    heapq.heappush(pq, (newDist, w))
+        return distances
+
+    @staticmethod
+    def toCsr(adjacency):
+        offsets = numpy.zeros(len(adjacency) + 1, dtype=numpy.int64)
+        offsets[1:] = numpy.cumsum([len(edges) for edges in adjacency])
+        targets = numpy.array([t for edges in adjacency for (t, _) in edges], dtype=numpy.int64)
+        weights = numpy.array([w for edges in adjacency for (_, w) in edges], dtype=float)
+        return (offsets, targets, weights)
+
+    # Function: Save
+    # ---------------------
+    # Writes the hierarchy to |path|, along with the node coordinates it was
+    # built for.
+    def save(self, path):
+        middles = numpy.array([(u, w, v) for ((u, w), v) in self.middles.items()], dtype=numpy.int64)
+        tmpPath = '%s.%d.tmp.npz' % (path[:-len('.npz')], os.getpid())
+        numpy.savez(tmpPath, fingerprint=self.graphIndex.fingerprint, rank=self.rank,
+                    upOffsets=self.upOffsets, upTargets=self.upTargets, upWeights=self.upWeights,
+                    downOffsets=self.downOffsets, downSources=self.downSources,
+                    downWeights=self.downWeights, middles=middles.reshape(-1, 3))
+        os.rename(tmpPath, path)
+
+    # Function: Load
+    # ---------------------
+    # Reads a hierarchy saved by save, or returns None if it was built for a
+    # different road graph than the one of |graphIndex| (or before the
+    # fingerprint was stored).
+    @staticmethod
+    def load(graphIndex, path):
+        data = numpy.load(path)
+        if 'fingerprint' not in data.files or str(data['fingerprint']) != graphIndex.fingerprint:
+            return None
+        middles = dict(((u, w), v) for (u, w, v) in data['middles'].tolist())
+        up = (data['upOffsets'], data['upTargets'], data['upWeights'])
+        down = (data['downOffsets'], data['downSources'], data['downWeights'])
+        return ContractionHierarchy(graphIndex, data['rank'], up, down, middles)
+
+    # Function: Query
+    # ---------------------
+    # Shortest road path to node |goal| from any of the |sources|, a dict
+    # from node id to the cost already spent reaching it. Returns
+    # (cost, path as a list of node ids starting at one of the sources), or
+    # (inf, None) if the goal cannot be reached.
+    def query(self, sources, goal):
+        index = self.graphIndex.index
+        distances = [dict(), dict()]
+        parents = [dict(), dict()]
+        pqs = [[], []]
+        for (nodeId, cost) in sources.items():
+            i = index[nodeId]
+            if cost < distances[0].get(i, INF):
+                distances[0][i] = cost
+                parents[0][i] = None
+                pqs[0].append((cost, i))
+        heapq.heapify(pqs[0])
+        distances[1][index[goal]] = 0.0
+        parents[1][index[goal]] = None
+        pqs[1].append((0.0, index[goal]))
+        (best, meeting) = (INF, None)
+        # Alternate between the forward and the backward search, always
+        # advancing the one with the smaller key, until neither can improve.
+        while True:
+            keys = [pq[0][0] if pq else INF for pq in pqs]
+            side = 0 if keys[0] <= keys[1] else 1
+            if keys[side] >= best:
+                break
+            (dist, u) = heapq.heappop(pqs[side])
+            if dist > distances[side][u]:
+                continue
+            total = dist + distances[1 - side].get(u, INF)
+            if total < best:
+                (best, meeting) = (total, u)
+            for (w, weight) in self.adjacency[side][u]:
+                newDist = dist + weight
+                if newDist < distances[side].get(w, INF):
+                    distances[side][w] = newDist
+                    parents[side][w] = u
+                    heapq.heappush(pqs[side], (newDist, w))
+        if meeting is None:
+            return (INF, None)
+        return (best, self.unpack(parents, meeting))
+
+    # Turns the meeting point of the two searches into a raw road graph path.
+    def unpack(self, parents, meeting):
+        hierarchyPath = []
+        u = meeting
+        while u is not None:
+            hierarchyPath.append(u)
+            u = parents[0][u]
+        hierarchyPath.reverse()
+        u = parents[1][meeting]
+        while u is not None:
+            hierarchyPath.append(u)
+            u = parents[1][u]
+        path = [hierarchyPath[0]]
+        for (u, w) in zip(hierarchyPath, hierarchyPath[1:]):
+            stack = [(u, w)]
+            while stack:
+                (a, b) = stack.pop()
+                v = self.middles.get((a, b))
+                if v is None:
+                    path.append(b)
+                else:
+                    stack.append((v, b))
+                    stack.append((a, v))
+        nodeIds = self.graphIndex.nodeIds
+        return [nodeIds[i] for i in path]
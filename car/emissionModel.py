@@ -0,0 +1,87 @@
+'''
+Extended by Peggy Wang @PeggyYuchunWang
+Licensing Information: Please do not distribute or publish solutions to this
+project. You are free to use and extend Driverless Car for educational
+purposes. The Driverless Car project was developed at Stanford, primarily by
+Chris Piech (piech@cs.stanford.edu). It was inspired by the Pacman projects.
+'''
+import particleEngine
+import collections
+import numpy
+
+
+_models = dict()
+
+# Function: Get Emission Model
+# ---------------------
+# Returns the EmissionModel shared by every filter on a (numRows x numCols)
+# grid whose sensor has standard deviation |std|.
+def getEmissionModel(numRows, numCols, std):
+    key = (numRows, numCols, std)
+    if key not in _models:
+        _models[key] = EmissionModel(numRows, numCols, std)
+    return _models[key]
+
+
+# Class: Emission Model
+# ---------------------
+# Lookup tables for the distance sensor likelihood log pdf(d, std, observed):
+#
+# - tile centre coordinates (shared with particleEngine.tileCenters),
+# - the Gaussian log likelihood quantized to RESOLUTION entries per
+#   standard deviation of |observed - d|, out to TABLE_SIGMAS deviations
+#   (larger residuals read the last entry),
+# - optionally (USE_DISTANCE_FIELDS) the distance from every tile centre to
+#   the agent, cached for the MAX_DISTANCE_FIELDS most recently used agent
+#   positions quantized to POSITION_STEP.
+#
+# Evaluating the emission of N particles is then one or two table gathers.
+class EmissionModel(object):
+
+    RESOLUTION = 32
+    TABLE_SIGMAS = 64
+    USE_DISTANCE_FIELDS = False
+    POSITION_STEP = 1.0
+    MAX_DISTANCE_FIELDS = 64
+
+    def __init__(self, numRows, numCols, std):
+        self.tileXs, self.tileYs = particleEngine.tileCenters(numRows, numCols)
+        self.step = float(abs(std)) / self.RESOLUTION
+        residuals = numpy.arange(self.RESOLUTION * self.TABLE_SIGMAS + 1) * self.step
+        self.logTable = particleEngine.gaussianLogPdf(0.0, std, residuals)
+        self.distanceFields = collections.OrderedDict()
+
+    # Function: Distances
+    # ---------------------
+    # Distance from the centre of every tile in |tiles| (any shape) to the
+    # agent. agentX / agentY broadcast against |tiles|.
+    def distances(self, tiles, agentX, agentY):
+        if self.USE_DISTANCE_FIELDS and numpy.ndim(agentX) == 0 and numpy.ndim(agentY) == 0:
+            return self.distanceField(agentX, agentY)[tiles]
+        dx = self.tileXs[tiles] - agentX
+        dy = self.tileYs[tiles] - agentY
+        return numpy.sqrt(dx * dx + dy * dy)
+
+    # Function: Distance Field
+    # ---------------------
+    # Distances from every tile centre to the agent position quantized to
+    # POSITION_STEP, computed once per position and kept in an LRU cache.
+    def distanceField(self, agentX, agentY):
+        key = (int(round(agentX / self.POSITION_STEP)), int(round(agentY / self.POSITION_STEP)))
+        if key in self.distanceFields:
+            field = self.distanceFields.pop(key)
+        else:
+            dx = self.tileXs - key[0] * self.POSITION_STEP
+            dy = self.tileYs - key[1] * self.POSITION_STEP
+            field = numpy.sqrt(dx * dx + dy * dy)
+            if len(self.distanceFields) >= self.MAX_DISTANCE_FIELDS:
+                self.distanceFields.popitem(last=False)
+        self.distanceFields[key] = field
+        return field
+
+    # Function: Log Likelihood
+    # ---------------------
+    # Table lookup of log util.pdf(distances, std, observedDist).
+    def logLikelihood(self, distances, observedDist):
+        index = (numpy.abs(distances - observedDist) / self.step + 0.5).astype(numpy.int64)
+        return self.logTable[numpy.minimum(index, len(self.logTable) - 1)]
@@ -4,12 +4,14 @@ Created on Jun 11, 2013
 @author: chrispiech
 '''
 from engine.model.car.car import Car
-from engine.view.display import Display
+from engine.model.spatialHash import SpatialHash
 from engine.vector import Vec2d
-from submission import ParticleFilter, ExactInference
+from submission import ExactInference
+from inference import MultiTargetTracker
 from none import NoInference
 from engine.const import Const
 import random
+import weakref
 
 class Agent(Car):
     
@@ -17,6 +19,15 @@ class Agent(Car):
     MAX_SPEED_STD = 2.0
     
     colorCounter = 0
+
+    # The attributes Agent itself sets are slots; __dict__ keeps any other
+    # attribute that code outside Agent puts on an agent assignable.
+    __slots__ = ('agentGraph', 'model', 'agentComm', 'goalNode', 'goalNodeId', 'goalPos',
+                 'hasInference', 'inference', 'color', 'inIntersection', 'claimedIntersection',
+                 '__dict__')
+    
+    # One MultiTargetTracker per model, shared by all of its agents.
+    trackers = weakref.WeakKeyDictionary()
     
     def __init__(self, startNode, agentGraph, model, agentComm):
         self.agentGraph = agentGraph
@@ -33,7 +44,11 @@ class Agent(Car):
         self.inIntersection = True
         self.claimedIntersection = None
     
+    # The display stack is only imported when there is a display; headless
+    # runs (Const.HEADLESS) leave agents without a colour.
     def initColor(self):
+        if getattr(Const, 'HEADLESS', False): return None
+        from engine.view.display import Display
         colors = Display.COLORS
         index = Agent.colorCounter % len(colors)
         Agent.colorCounter += 1
@@ -47,18 +62,50 @@ class Agent(Car):
 
     def update(self):
         if Const.CARS_PARKED: return
-        return super(Agent, self).update()
+        result = super(Agent, self).update()
+        self.getSpatialHash().update(self)
+        return result
+
+    # Same as calling update on each of |agents|, with the physics of all of
+    # them advanced in one vectorized step. This is also where the spatial
+    # hash of every agentComm catches up with the agents that joined or left
+    # it, once per tick.
+    @staticmethod
+    def updateAll(agents):
+        if Const.CARS_PARKED: return
+        Car.updateAll(agents)
+        moved = dict()
+        for agent in agents:
+            moved.setdefault(id(agent.agentComm), []).append(agent)
+        for group in moved.values():
+            spatialHash = group[0].getSpatialHash()
+            if not spatialHash.sync(group[0].agentComm.getAgents()):
+                for agent in group:
+                    spatialHash.update(agent)
 
+    # Function: Get Spatial Hash
+    # ---------------------
+    # The SpatialHash of the agent positions of this agent's agentComm. It
+    # is kept on the agentComm, so it goes away with the agents it holds.
+    # Cells are as wide as the collides radius check, so isCloseToOtherCar
+    # only needs the 3 x 3 cells around the point it tests.
+    def getSpatialHash(self):
+        spatialHash = getattr(self.agentComm, 'spatialHash', None)
+        if spatialHash is None:
+            spatialHash = SpatialHash(2 * Car.RADIUS)
+            self.agentComm.spatialHash = spatialHash
+        return spatialHash
+
+    # The hash is brought up to date by update and updateAll; it is only
+    # rebuilt here if this agent joined the agentComm since.
     def isCloseToOtherCar(self):
-        newBounds = []
         offset = self.dir.normalized() * 1.5 * Car.LENGTH
-        for bound in self.getBounds():
-            bound += offset
-            newBounds.append(bound)
+        newBounds = self.getBoundsArray() + (offset.x, offset.y)
         newPos = self.pos + offset
-        for agent in self.agentComm.getAgents():
-            if agent.collides(newPos, newBounds): return True
-        return False
+        spatialHash = self.getSpatialHash()
+        if self not in spatialHash.carCells:
+            spatialHash.sync(self.agentComm.getAgents())
+        return Car.collidesAny(spatialHash.nearby(newPos), newPos, newBounds)
 
     def driveToGoal(self):
         if self.isCloseToOtherCar():
@@ -129,7 +176,7 @@ class Agent(Car):
             rows = self.model.getBeliefRows()
             cols = self.model.getBeliefCols()
             if Const.INFERENCE == 'particleFilter':
-                self.inference = ParticleFilter(rows, cols)
+                self.inference = self.getTracker(rows, cols).addTarget()
             elif Const.INFERENCE == 'exactInference':
                 self.inference = ExactInference(rows, cols)
             elif Const.INFERENCE == 'none':
@@ -139,6 +186,11 @@ class Agent(Car):
             self.hasInference = True
         return self.inference
     
+    def getTracker(self, rows, cols):
+        if self.model not in Agent.trackers:
+            Agent.trackers[self.model] = MultiTargetTracker(rows, cols)
+        return Agent.trackers[self.model]
+    
     def action(self):
         vectorToGoal = (self.goalPos - self.pos)
         self.getAcceleratorAction(vectorToGoal)
@@ -1,9 +1,47 @@
 from engine.vector import Vec2d
 from engine.model.observation import SonarObservation
+from engine.model import collision
+from engine.model.fleet import Fleet
 from engine.const import Const
 
 import random
 import math
+import numpy
+
+# Class: Fleet Vector
+# ---------------------
+# A Vec2d whose x and y are the row of |car| in the (capacity, 2) array
+# |name| of the car's fleet. In place changes (+=, rotate, set_length) move
+# the car, and a vector kept from car.pos follows it as it moves. Changing
+# pos or dir invalidates the car's cached bounds. Copies and pickles are
+# plain Vec2d snapshots.
+class FleetVector(Vec2d):
+
+    # |car| is only held to keep its slot from being released.
+    __slots__ = ('car', 'fleet', 'slot', 'name')
+
+    def __init__(self, car, name):
+        self.car = car
+        self.fleet = car.fleet
+        self.slot = car.slot
+        self.name = name
+
+    def __reduce__(self):
+        return (Vec2d, (self.x, self.y))
+
+    def getX(self):
+        return getattr(self.fleet, self.name).item(self.slot, 0)
+
+    def getY(self):
+        return getattr(self.fleet, self.name).item(self.slot, 1)
+
+    def setComponent(self, i, value):
+        getattr(self.fleet, self.name)[self.slot, i] = value
+        if self.name != 'velocity':
+            self.fleet.invalidate(self.slot)
+
+    x = property(getX, lambda self, value: self.setComponent(0, value))
+    y = property(getY, lambda self, value: self.setComponent(1, value))
 
 class Car(object):
 
@@ -21,6 +59,23 @@ class Car(object):
     WIDTH = 15.0
     RADIUS = math.sqrt(LENGTH ** 2 + WIDTH ** 2)
 
+    # The Fleet new cars take their slot in. pos, velocity, dir, wheelAngle,
+    # maxSpeed, friction and maxWheelAngle live in its arrays and are read
+    # and written through the properties below. Reading a vector returns a
+    # FleetVector onto the car's row, so it can be changed in place like the
+    # Vec2d attributes it replaces; assigning one copies the values in.
+    FLEET = Fleet()
+
+    __slots__ = ('fleet', 'slot', 'initialPos', '__weakref__')
+
+    # Every car takes its fleet slot when it is created, so that subclasses
+    # whose __init__ does not call Car.__init__ still have one.
+    def __new__(cls, *args, **kwargs):
+        car = super(Car, cls).__new__(cls)
+        car.fleet = cls.FLEET
+        car.slot = car.fleet.add(car)
+        return car
+
     def __init__(self, pos, dirName, velocity):
         self.initialPos = Vec2d(pos.x, pos.y)
         self.pos = pos
@@ -32,6 +87,39 @@ class Car(object):
         self.friction = Car.FRICTION
         self.maxWheelAngle = Car.MAX_WHEEL_ANGLE
 
+    def setVector(self, array, vector):
+        array[self.slot, 0] = vector.x
+        array[self.slot, 1] = vector.y
+
+    # Moving or turning the car invalidates its cached bounds.
+    def setPos(self, pos):
+        self.setVector(self.fleet.pos, pos)
+        self.fleet.invalidate(self.slot)
+
+    def setDir(self, direction):
+        self.setVector(self.fleet.dir, direction)
+        self.fleet.invalidate(self.slot)
+
+    pos = property(lambda self: FleetVector(self, 'pos'), setPos)
+    velocity = property(lambda self: FleetVector(self, 'velocity'),
+                        lambda self, value: self.setVector(self.fleet.velocity, value))
+    dir = property(lambda self: FleetVector(self, 'dir'), setDir)
+
+    def getScalar(self, array):
+        return float(array[self.slot])
+
+    def setScalar(self, array, value):
+        array[self.slot] = value
+
+    wheelAngle = property(lambda self: self.getScalar(self.fleet.wheelAngle),
+                          lambda self, value: self.setScalar(self.fleet.wheelAngle, value))
+    maxSpeed = property(lambda self: self.getScalar(self.fleet.maxSpeed),
+                        lambda self, value: self.setScalar(self.fleet.maxSpeed, value))
+    friction = property(lambda self: self.getScalar(self.fleet.friction),
+                        lambda self, value: self.setScalar(self.fleet.friction, value))
+    maxWheelAngle = property(lambda self: self.getScalar(self.fleet.maxWheelAngle),
+                             lambda self, value: self.setScalar(self.fleet.maxWheelAngle, value))
+
     def getPos(self):
         return self.pos
 
@@ -64,9 +152,11 @@ class Car(object):
 
 
     def turnCarTowardsWheels(self):
-        if self.velocity.get_length() > 0.0:
-            self.velocity.rotate(self.wheelAngle)
-            self.dir = Vec2d(self.velocity.x, self.velocity.y)
+        velocity = self.velocity
+        if velocity.get_length() > 0.0:
+            velocity.rotate(self.wheelAngle)
+            self.velocity = velocity
+            self.dir = Vec2d(velocity.x, velocity.y)
 
     def update(self):
         self.turnCarTowardsWheels()
@@ -74,6 +164,21 @@ class Car(object):
         self.turnWheelsTowardsStraight()
         self.applyFriction()
 
+    # Same as calling update on each of |cars|, with one vectorized
+    # Fleet.step per fleet.
+    @staticmethod
+    def updateAll(cars):
+        for (fleet, slots) in Car.fleetSlots(cars).items():
+            fleet.step(slots)
+
+    # The slots of |cars|, grouped by fleet.
+    @staticmethod
+    def fleetSlots(cars):
+        slots = dict()
+        for car in cars:
+            slots.setdefault(car.fleet, []).append(car.slot)
+        return slots
+
     def turnWheelsTowardsStraight(self):
         if self.wheelAngle < 0:
             self.wheelAngle += 0.7
@@ -118,45 +223,56 @@ class Car(object):
         amount = min(amount, Car.MAX_ACCELERATION)
         acceleration = Vec2d(self.dir.x, self.dir.y).normalized()
         acceleration *= amount
-        self.velocity += acceleration
-        if (self.velocity.get_length() >= self.maxSpeed):
-            self.velocity.set_length(self.maxSpeed)
+        velocity = self.velocity + acceleration
+        if (velocity.get_length() >= self.maxSpeed):
+            velocity.set_length(self.maxSpeed)
+        self.velocity = velocity
 
     # http://www.gamedev.net/page/resources/_/technical/game-programming/2d-rotated-rectangle-collision-r2604
+    # Thin wrapper over the batched separating axis test in collision.
+    # |otherBounds| is a list of four Vec2d or a (4, 2) array of corners.
     def collides(self, otherPos, otherBounds):
-        diff = otherPos - self.pos
-        dist = diff.get_length()
+        (x, y) = self.fleet.pos[self.slot].tolist()
+        dist = math.sqrt((otherPos.x - x) ** 2 + (otherPos.y - y) ** 2)
         if dist > Car.RADIUS * 2: return False
 
-        bounds = self.getBounds()
-        vec1 = bounds[0] - bounds[1]
-        vec2 = otherBounds[0] - otherBounds[1]
-        axis = [
-            vec1,
-            vec1.perpendicular(),
-            vec2,
-            vec2.perpendicular()
-        ]
-        for vec in axis:
-            (minA, maxA) = Vec2d.projectPoints(bounds, vec)
-            (minB, maxB) = Vec2d.projectPoints(otherBounds, vec)
-            leftmostA = minA <= minB
-            overlap = False
-            if leftmostA and maxA >= minB: overlap = True
-            if not leftmostA and maxB >= minA: overlap = True
-            if not overlap: return False
-        return True
+        if not isinstance(otherBounds, numpy.ndarray):
+            otherBounds = collision.boundsArray([otherBounds])[0]
+        return bool(collision.satCollides(self.getBoundsArray()[None], otherBounds[None])[0])
+
+    # Same as any(car.collides(otherPos, otherBounds) for car in cars), with
+    # the radius check and the separating axis test each done once for all
+    # the cars of a fleet, on their cached corners.
+    @staticmethod
+    def collidesAny(cars, otherPos, otherBounds):
+        if not isinstance(otherBounds, numpy.ndarray):
+            otherBounds = collision.boundsArray([otherBounds])[0]
+        for (fleet, slots) in Car.fleetSlots(cars).items():
+            slots = numpy.asarray(slots, dtype=numpy.int64)
+            offsets = fleet.pos[slots] - (otherPos.x, otherPos.y)
+            near = slots[numpy.einsum('kd,kd->k', offsets, offsets) <= (Car.RADIUS * 2) ** 2]
+            if len(near) == 0: continue
+            bounds = fleet.getBoundsBatch(near, Car.LENGTH, Car.WIDTH)
+            if collision.satCollides(bounds, numpy.broadcast_to(otherBounds, bounds.shape)).any():
+                return True
+        return False
+
+    # Returns every pair of |cars| that collide, using one batched separating
+    # axis test over all pairs within the collides radius.
+    @staticmethod
+    def collidingPairs(cars):
+        bounds = numpy.array([car.getBoundsArray() for car in cars]).reshape(-1, 4, 2)
+        pairs = collision.collidingPairs(bounds, maxDist=Car.RADIUS * 2)
+        return [(cars[i], cars[j]) for (i, j) in pairs.tolist()]
 
     def getBounds(self):
-        normalDir = self.dir.normalized()
-        perpDir = normalDir.perpendicular()
-        bounds = [
-            self.pos + normalDir * Car.LENGTH / 2 + perpDir * Car.WIDTH / 2,
-            self.pos + normalDir * Car.LENGTH / 2 - perpDir * Car.WIDTH / 2,
-            self.pos - normalDir * Car.LENGTH / 2 + perpDir * Car.WIDTH / 2,
-            self.pos - normalDir * Car.LENGTH / 2 - perpDir * Car.WIDTH / 2
-        ]
-        return bounds
+        return [Vec2d(x, y) for (x, y) in self.getBoundsArray().tolist()]
+
+    # The corners of the car as a (4, 2) array, in the order of getBounds.
+    # This is a read only view into the fleet's bounds cache, recomputed
+    # only after the car moved or turned.
+    def getBoundsArray(self):
+        return self.fleet.getBounds(self.slot, Car.LENGTH, Car.WIDTH)
 
     def dirFromName(self, dirName):
         if dirName == 'north': return Vec2d(0, -1)
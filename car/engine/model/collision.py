@@ -0,0 +1,73 @@
+'''
+Batched separating axis collision tests between cars, with all corner and
+axis math done in numpy.
+
+A car's bounds are its four corners in the order of Car.getBounds: front
+left, front right, back left, back right. A batch of n bounds is an
+(n, 4, 2) float array.
+'''
+import numpy
+
+
+# Returns the (n, 4, 2) bounds of cars centred at (xs, ys) and facing
+# (dirXs, dirYs), the same corners Car.getBounds builds one Vec2d at a time.
+def carBounds(xs, ys, dirXs, dirYs, length, width):
+    xs = numpy.asarray(xs, dtype=float)
+    ys = numpy.asarray(ys, dtype=float)
+    dirXs = numpy.asarray(dirXs, dtype=float)
+    dirYs = numpy.asarray(dirYs, dtype=float)
+    norms = numpy.hypot(dirXs, dirYs)
+    norms[norms == 0] = 1.0
+    normal = numpy.stack([dirXs / norms, dirYs / norms], axis=-1) * (length / 2.0)
+    perp = numpy.stack([-dirYs / norms, dirXs / norms], axis=-1) * (width / 2.0)
+    centres = numpy.stack([xs, ys], axis=-1)
+    return numpy.stack([centres + normal + perp,
+                        centres + normal - perp,
+                        centres - normal + perp,
+                        centres - normal - perp], axis=1)
+
+# Converts a list of bounds, each a list of four Vec2d, to an (n, 4, 2) array.
+def boundsArray(boundsList):
+    return numpy.array([[(p.x, p.y) for p in bounds] for bounds in boundsList], dtype=float)
+
+# Separating axis test of boundsA[k] against boundsB[k] for every k. The
+# axes are the edge from corner 0 to corner 1 of each box and its
+# perpendicular; two boxes collide unless their projections onto one of
+# the four axes are disjoint. Both boxes are projected in one einsum, which
+# keeps the small batches of a single query cheap. Returns a boolean array
+# of length n.
+def satCollides(boundsA, boundsB):
+    corners = numpy.concatenate([boundsA, boundsB], axis=1)
+    edges = corners[:, 0::4] - corners[:, 1::4]
+    axes = numpy.concatenate([edges, edges[:, :, ::-1] * (-1.0, 1.0)], axis=1)
+    proj = numpy.einsum('nad,ncd->nac', axes, corners).reshape(-1, 4, 2, 4)
+    (highs, lows) = (proj.max(axis=3), proj.min(axis=3))
+    return ((highs[:, :, 0] >= lows[:, :, 1]) & (highs[:, :, 1] >= lows[:, :, 0])).all(axis=1)
+
+# Returns the (k, 2) index pairs i < j of |bounds| whose centres are at most
+# maxDist apart, the candidates worth a separating axis test.
+def candidatePairs(bounds, maxDist):
+    centres = bounds.mean(axis=1)
+    (first, second) = numpy.triu_indices(len(bounds), k=1)
+    diff = centres[first] - centres[second]
+    close = numpy.einsum('kd,kd->k', diff, diff) <= maxDist * maxDist
+    return numpy.stack([first[close], second[close]], axis=-1)
+
+# Returns the rows of the (k, 2) index array |pairs| whose boxes collide.
+# Without |pairs|, all pairs of boxes closer than maxDist are tested.
+def collidingPairs(bounds, pairs = None, maxDist = numpy.inf):
+    if pairs is None:
+        pairs = candidatePairs(bounds, maxDist)
+    pairs = numpy.asarray(pairs, dtype=numpy.int64).reshape(-1, 2)
+    if len(pairs) == 0:
+        return pairs
+    return pairs[satCollides(bounds[pairs[:, 0]], bounds[pairs[:, 1]])]
+
+# Returns the symmetric (n, n) boolean matrix of which boxes collide, with
+# a False diagonal.
+def collisionMatrix(bounds, maxDist = numpy.inf):
+    matrix = numpy.zeros((len(bounds), len(bounds)), dtype=bool)
+    pairs = collidingPairs(bounds, maxDist=maxDist)
+    matrix[pairs[:, 0], pairs[:, 1]] = True
+    matrix[pairs[:, 1], pairs[:, 0]] = True
+    return matrix
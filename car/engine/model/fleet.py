@@ -0,0 +1,148 @@
+'''
+Struct of arrays storage and vectorized physics for a fleet of cars.
+
+Every Car owns a slot in a Fleet, which holds the position, velocity,
+direction, wheel angle, max speed, friction and max wheel angle of all its
+cars in contiguous numpy arrays; the Car attributes of the same names are
+views onto its slot. Fleet.step advances any set of slots by one tick with
+the same physics as Car.update, without building a Vec2d per car.
+
+The fleet also caches the corners of every car (see collision) in one
+preallocated (capacity, 4, 2) buffer. A car's corners are recomputed only
+after its position or direction changed, and then together with those of
+every other car that moved.
+'''
+from engine.model import collision
+import weakref
+import numpy
+
+
+class Fleet(object):
+
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, capacity = INITIAL_CAPACITY):
+        self.capacity = 0
+        self.size = 0
+        self.pos = numpy.zeros((0, 2))
+        self.velocity = numpy.zeros((0, 2))
+        self.dir = numpy.zeros((0, 2))
+        self.wheelAngle = numpy.zeros(0)
+        self.maxSpeed = numpy.zeros(0)
+        self.friction = numpy.zeros(0)
+        self.maxWheelAngle = numpy.zeros(0)
+        self.active = numpy.zeros(0, dtype=bool)
+        self.bounds = numpy.zeros((0, 4, 2))
+        self.boundsValid = numpy.zeros(0, dtype=bool)
+        self.refs = []
+        self.free = []
+        self.grow(capacity)
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    def grow(self, capacity):
+        extra = capacity - self.capacity
+        for name in ['pos', 'velocity', 'dir']:
+            setattr(self, name, numpy.concatenate([getattr(self, name), numpy.zeros((extra, 2))]))
+        for name in ['wheelAngle', 'maxSpeed', 'friction', 'maxWheelAngle']:
+            setattr(self, name, numpy.concatenate([getattr(self, name), numpy.zeros(extra)]))
+        self.active = numpy.concatenate([self.active, numpy.zeros(extra, dtype=bool)])
+        self.bounds = numpy.concatenate([self.bounds, numpy.zeros((extra, 4, 2))])
+        self.boundsValid = numpy.concatenate([self.boundsValid, numpy.zeros(extra, dtype=bool)])
+        self.refs.extend([None] * extra)
+        self.capacity = capacity
+
+    # Gives |car| a slot and returns it. The slot is freed again when the car
+    # is garbage collected.
+    def add(self, car):
+        if self.free:
+            slot = self.free.pop()
+        else:
+            if self.size == self.capacity:
+                self.grow(max(2 * self.capacity, 1))
+            slot = self.size
+            self.size += 1
+        self.active[slot] = True
+        self.refs[slot] = weakref.ref(car, lambda ref, slot=slot: self.release(slot))
+        return slot
+
+    def release(self, slot):
+        self.active[slot] = False
+        self.refs[slot] = None
+        self.velocity[slot] = 0.0
+        self.boundsValid[slot] = False
+        self.free.append(slot)
+
+    # Marks the cached corners of |slot| as stale. Called whenever the
+    # position or direction of the car changes.
+    def invalidate(self, slot):
+        self.boundsValid[slot] = False
+
+    # Returns the cached (4, 2) corners of the car in |slot|, a read only
+    # view into the bounds buffer. Stale corners of all cars are refreshed in
+    # one batch first.
+    def getBounds(self, slot, length, width):
+        if not self.boundsValid[slot]:
+            self.refreshBounds(length, width)
+        bounds = self.bounds[slot]
+        bounds.flags.writeable = False
+        return bounds
+
+    # Returns the cached corners of the cars in the slot array |slots| as a
+    # (k, 4, 2) array, refreshing stale corners first.
+    def getBoundsBatch(self, slots, length, width):
+        if not self.boundsValid[slots].all():
+            self.refreshBounds(length, width)
+        return self.bounds[slots]
+
+    def refreshBounds(self, length, width):
+        slots = numpy.flatnonzero(self.active[:self.size] & ~self.boundsValid[:self.size])
+        (xs, ys) = self.pos[slots].T
+        (dirXs, dirYs) = self.dir[slots].T
+        self.bounds[slots] = collision.carBounds(xs, ys, dirXs, dirYs, length, width)
+        self.boundsValid[slots] = True
+
+    def getActiveSlots(self):
+        return numpy.flatnonzero(self.active[:self.size])
+
+    # Advances the cars in |slots| (all cars by default) by one tick, like
+    # Car.update: turn the velocity by the wheel angle and point the car
+    # along it, move, turn the wheels 0.7 degrees back towards straight and
+    # slow down by the friction, stopping cars that would reverse.
+    def step(self, slots = None):
+        if slots is None:
+            slots = self.getActiveSlots()
+        slots = numpy.asarray(slots, dtype=numpy.int64)
+        if len(slots) == 0:
+            return
+        (vx, vy) = self.velocity[slots].T
+        wheelAngle = self.wheelAngle[slots]
+
+        moving = numpy.sqrt(vx ** 2 + vy ** 2) > 0.0
+        radians = numpy.radians(wheelAngle)
+        (cos, sin) = (numpy.cos(radians), numpy.sin(radians))
+        (vx, vy) = (numpy.where(moving, vx * cos - vy * sin, vx),
+                    numpy.where(moving, vx * sin + vy * cos, vy))
+        direction = self.dir[slots]
+        direction[moving, 0] = vx[moving]
+        direction[moving, 1] = vy[moving]
+        self.dir[slots] = direction
+
+        self.pos[slots] += numpy.stack([vx, vy], axis=-1)
+        self.boundsValid[slots[moving]] = False
+
+        self.wheelAngle[slots] = numpy.sign(wheelAngle) * numpy.maximum(numpy.abs(wheelAngle) - 0.7, 0.0)
+
+        speed = numpy.sqrt(vx ** 2 + vy ** 2)
+        hasSpeed = speed > 0.0
+        length = numpy.where(hasSpeed, speed, 1.0)
+        friction = self.friction[slots]
+        fx = -vx / length * friction
+        fy = -vy / length * friction
+        (newVx, newVy) = (vx + fx, vy + fy)
+        angle = numpy.degrees(numpy.arctan2(newVx * fy - newVy * fx, newVx * fx + newVy * fy))
+        stopped = hasSpeed & (numpy.abs(angle) < 180)
+        newVx = numpy.where(stopped, 0.0, numpy.where(hasSpeed, newVx, vx))
+        newVy = numpy.where(stopped, 0.0, numpy.where(hasSpeed, newVy, vy))
+        self.velocity[slots] = numpy.stack([newVx, newVy], axis=-1)
@@ -1,9 +1,16 @@
 from engine.const import Const
 
 import math
+import numpy
 
+# Every distance reading is a true distance plus mean-zero Gaussian noise
+# with the standard deviation STD of its sensor. SENSOR is the index of the
+# sensor type in SENSOR_TYPES.
 class SonarObservation(object):
 
+    SENSOR = 0
+    STD = Const.SONAR_STD
+
     def __init__(self, dist):
         self.dist = dist
 
@@ -11,19 +18,44 @@ class SonarObservation(object):
         return self.dist
 
 class RadarObservation(object):
+
+    SENSOR = 1
+    STD = Const.RADAR_NOISE_STD
+
     def __init__(self, dist):
         self.dist = dist
 
     def getDist(self):
         return self.dist
 
+# engine/const.py defines no lidar noise yet; Const.LIDAR_STD overrides
+# this default once it does.
+DEFAULT_LIDAR_STD = 2.0
+
 class LidarObservation(object):
+
+    SENSOR = 2
+    STD = getattr(Const, 'LIDAR_STD', DEFAULT_LIDAR_STD)
+
     def __init__(self, dist):
         self.dist = dist
 
     def getDist(self):
         return self.dist
 
+SENSOR_TYPES = [SonarObservation, RadarObservation, LidarObservation]
+
+# A batch of readings as one structured array, one row per reading:
+# the tracked car it is about, the sensor type, the observed distance and
+# the position of the observing car.
+READING_DTYPE = numpy.dtype([
+    ('target', numpy.int64),
+    ('sensor', numpy.int8),
+    ('dist', numpy.float64),
+    ('agentX', numpy.float64),
+    ('agentY', numpy.float64)
+])
+
 
 class Observation(object):
 
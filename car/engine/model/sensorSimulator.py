@@ -0,0 +1,53 @@
+from engine.model.observation import SENSOR_TYPES, READING_DTYPE
+
+import numpy
+
+# Class: Sensor Simulator
+# ---------------------
+# Simulates the distance sensors of every car in one vectorized step. For
+# each car and each sensor type the reading is the true distance to junior
+# plus Gaussian noise with the sensor's STD, drawn from the simulator's own
+# seeded numpy RandomState. Readings come back as one READING_DTYPE array
+# (target = car index, agentX / agentY = junior's position), ready for
+# sensorFusion, instead of one observation object per reading. Without a
+# seed, the simulator seeds itself from the global numpy random stream, so a
+# run seeded with numpy.random.seed stays reproducible.
+class SensorSimulator(object):
+
+    def __init__(self, seed=None, sensors=SENSOR_TYPES):
+        if seed is None:
+            seed = numpy.random.randint(2 ** 31 - 1)
+        self.randomState = numpy.random.RandomState(seed)
+        self.sensors = sensors
+        self.stds = numpy.array([sensor.STD for sensor in sensors], dtype=float)
+        self.codes = numpy.array([sensor.SENSOR for sensor in sensors], dtype=numpy.int8)
+
+    def seed(self, seed):
+        self.randomState.seed(seed)
+
+    # Function: Simulate
+    # ---------------------
+    # carXs / carYs: positions of the K observed cars. Returns K * S readings
+    # (S sensor types), grouped by car.
+    def simulate(self, carXs, carYs, juniorX, juniorY):
+        carXs = numpy.asarray(carXs, dtype=float)
+        carYs = numpy.asarray(carYs, dtype=float)
+        numCars = len(carXs)
+        numSensors = len(self.sensors)
+        dist = numpy.hypot(carXs - juniorX, carYs - juniorY)
+        noise = self.randomState.standard_normal((numCars, numSensors)) * self.stds
+        readings = numpy.empty(numCars * numSensors, dtype=READING_DTYPE)
+        readings['target'] = numpy.repeat(numpy.arange(numCars), numSensors)
+        readings['sensor'] = numpy.tile(self.codes, numCars)
+        readings['dist'] = (dist[:, None] + noise).ravel()
+        readings['agentX'] = juniorX
+        readings['agentY'] = juniorY
+        return readings
+
+    # Function: Observe Cars
+    # ---------------------
+    # Simulate for a list of Car objects as seen from junior.
+    def observeCars(self, cars, junior):
+        carXs = numpy.array([car.pos.x for car in cars], dtype=float)
+        carYs = numpy.array([car.pos.y for car in cars], dtype=float)
+        return self.simulate(carXs, carYs, junior.pos.x, junior.pos.y)
@@ -0,0 +1,73 @@
+'''
+Uniform grid spatial hash of car positions, used as the broad phase of the
+car to car proximity tests.
+'''
+import math
+
+
+class SpatialHash(object):
+
+    # cellSize should be at least the largest distance a query cares about,
+    # so that a query only has to look at the 3 x 3 cells around its point.
+    def __init__(self, cellSize):
+        self.cellSize = float(cellSize)
+        self.cells = dict()
+        self.carCells = dict()
+        self.members = ()
+
+    def __len__(self):
+        return len(self.carCells)
+
+    def getCell(self, pos):
+        return (int(math.floor(pos.x / self.cellSize)), int(math.floor(pos.y / self.cellSize)))
+
+    def insert(self, car):
+        cell = self.getCell(car.pos)
+        self.carCells[car] = cell
+        self.cells.setdefault(cell, []).append(car)
+
+    def remove(self, car):
+        cell = self.carCells.pop(car)
+        cars = self.cells[cell]
+        cars.remove(car)
+        if not cars:
+            del self.cells[cell]
+
+    # Moves |car| to the cell of its current position. Cheap if it stayed in
+    # the same cell, which is the common case within a tick.
+    def update(self, car):
+        if car not in self.carCells:
+            self.insert(car)
+            return
+        cell = self.getCell(car.pos)
+        if cell != self.carCells[car]:
+            self.remove(car)
+            self.insert(car)
+
+    def rebuild(self, cars):
+        self.cells = dict()
+        self.carCells = dict()
+        self.members = tuple(map(id, cars))
+        for car in cars:
+            self.insert(car)
+
+    # Rebuilds the hash unless it was built from exactly |cars|, in order,
+    # and returns whether it did. Cars are compared by identity; the hash
+    # keeps them alive, so their ids cannot be reused while they are members.
+    def sync(self, cars):
+        if tuple(map(id, cars)) == self.members:
+            return False
+        self.rebuild(cars)
+        return True
+
+    # Returns the cars in the 3 x 3 cells around |pos|; this includes every
+    # car within cellSize of it.
+    def nearby(self, pos):
+        (cx, cy) = self.getCell(pos)
+        found = []
+        for x in range(cx - 1, cx + 2):
+            for y in range(cy - 1, cy + 2):
+                cars = self.cells.get((x, y))
+                if cars:
+                    found.extend(cars)
+        return found
@@ -0,0 +1,278 @@
+'''
+Extended by Peggy Wang @PeggyYuchunWang
+Licensing Information: Please do not distribute or publish solutions to this
+project. You are free to use and extend Driverless Car for educational
+purposes. The Driverless Car project was developed at Stanford, primarily by
+Chris Piech (piech@cs.stanford.edu). It was inspired by the Pacman projects.
+'''
+from engine.const import Const
+from engine.vector import Vec2d
+from engine.model.car.car import Car
+from engine.model.car.agent import Agent
+from engine.model.observation import SENSOR_TYPES, SonarObservation
+from engine.model.sensorSimulator import SensorSimulator
+from inference import TrackedCar
+import particleEngine
+import pathCache
+import importlib, optparse, random, time
+import numpy
+
+
+DEFAULT_TICKS = 1000
+
+# Function: Seed All
+# ---------------------
+# Seeds every random stream of a run from one seed: the random module
+# (Agent speeds and goals, AutoDriver fallbacks) and the global numpy
+# stream (particle initialisation and resampling, transition sampling, and
+# the sensor noise of SensorSimulators created without a seed).
+def seedAll(seed):
+    random.seed(seed)
+    numpy.random.seed(seed)
+
+# Function: Make Model
+# ---------------------
+# Loads the world of |layoutName| the way the GUI controller does, without
+# touching the display. If |driverClass| is given, junior is a car of that
+# class (see installJunior) instead of the AutoDriver the model imports.
+def makeModel(layoutName, driverClass = None):
+    from engine.model.layout import Layout
+    from engine.model.model import Model
+    model = Model(Layout(layoutName))
+    if driverClass is not None:
+        installJunior(model, driverClass)
+    return model
+
+# Function: Install Junior
+# ---------------------
+# Replaces the junior of |model| by a new |driverClass| car in the same
+# state: the physical state held in the fleet, and whatever else the model
+# set up on the old junior that the new one does not set itself. Lists of
+# the model that hold the old junior get the new one in its place.
+def installJunior(model, driverClass):
+    old = model.getJunior()
+    if type(old) is driverClass:
+        return
+    junior = driverClass()
+    for name in ['pos', 'dir', 'velocity', 'wheelAngle', 'maxSpeed', 'friction', 'maxWheelAngle']:
+        setattr(junior, name, getattr(old, name))
+    if hasattr(old, 'initialPos'):
+        junior.initialPos = old.initialPos
+    for (name, value) in getattr(old, '__dict__', {}).items():
+        junior.__dict__.setdefault(name, value)
+    model.junior = junior
+    for value in vars(model).values():
+        if isinstance(value, list) and any(car is old for car in value):
+            value[:] = [junior if car is old else car for car in value]
+
+
+# Class: Fast Forward
+# ---------------------
+# Steps a model without a display and without waiting for the frame rate:
+# every tick the other cars are observed and their inference updated, the
+# beliefs are combined into one belief of other cars, the other cars act and
+# move (one vectorized Agent.updateAll) and junior plans and moves. Stops
+# after |ticks| ticks, when junior collides or when it reaches a terminal
+# node. Timings of the inference and planning parts are kept per tick, and
+# so is the suboptimality bound of a junior with an anytime planner
+# (AutoDriver.getPlanningStats).
+#
+# When the other cars are tracked by one MultiTargetTracker (particleFilter
+# inference), all of them are observed in one batched call and advanced by
+# one elapseTime per tick, and junior may plan against the occupancy the
+# tracker predicts (PREDICT_OCCUPANCY). The sensor readings of all cars are
+# simulated in one vectorized step.
+class FastForward(object):
+
+    # Sensors simulated for every other car each tick.
+    SENSORS = SENSOR_TYPES
+    # Let a junior that supports it (AutoDriver.setOccupancyPredictor) plan
+    # against the tracker's forward-predicted occupancy. Off by default: the
+    # space-time planner then takes precedence over the junior's other
+    # planning modes (see AutoDriver.choseNextId).
+    PREDICT_OCCUPANCY = False
+
+    def __init__(self, model, ticks = DEFAULT_TICKS):
+        self.model = model
+        self.ticks = ticks
+        self.junior = model.getJunior()
+        self.cars = model.getOtherCars()
+        self.agentGraph = model.getAgentGraph()
+        self.numRows = model.getBeliefRows()
+        self.numCols = model.getBeliefCols()
+        self.tick = 0
+        self.collided = False
+        self.reachedGoal = False
+        self.inferenceTimes = []
+        self.planningTimes = []
+        self.planningBounds = []
+        self.sensors = SensorSimulator(sensors=self.SENSORS)
+        inferences = [car.getInference() for car in self.cars]
+        self.tracker = None
+        self.targets = None
+        if inferences and all(isinstance(i, TrackedCar) for i in inferences) and \
+           len(set(id(i.tracker) for i in inferences)) == 1:
+            self.tracker = inferences[0].tracker
+            self.targets = numpy.array([i.target for i in inferences], dtype=numpy.int64)
+            if self.PREDICT_OCCUPANCY and hasattr(self.junior, 'setOccupancyPredictor'):
+                self.junior.setOccupancyPredictor(self.tracker)
+
+    # Function: Update Beliefs
+    # ---------------------
+    # Observes every other car from junior, advances its inference and
+    # returns the combined belief of all of them.
+    def updateBeliefs(self):
+        if Const.INFERENCE == 'none':
+            return particleEngine.ArrayBelief(self.numRows, self.numCols, 0.0)
+        return self.combineBeliefs(self.updateInference())
+
+    # Function: Update Inference
+    # ---------------------
+    # Simulates the SENSORS of every other car in one batch (SensorSimulator),
+    # feeds the readings to the inference of each car and advances it by one
+    # tick. A shared tracker takes all readings in one observeReadings call
+    # and one elapseTime; inference without observeReadings (e.g.
+    # ExactInference) gets the sonar reading of its car. Returns the belief
+    # of every car.
+    def updateInference(self):
+        readings = self.sensors.observeCars(self.cars, self.junior)
+        if self.tracker is not None:
+            readings['target'] = self.targets[readings['target']]
+            self.tracker.observeReadings(readings)
+            if not Const.CARS_PARKED:
+                self.tracker.elapseTime(self.targets)
+            beliefs = self.tracker.getBeliefs()
+            return [beliefs[target] for target in self.targets.tolist()]
+        byCar = readings.reshape(len(self.cars), -1)
+        beliefs = []
+        for (car, carReadings) in zip(self.cars, byCar):
+            inference = car.getInference()
+            if hasattr(inference, 'observeReadings'):
+                inference.observeReadings(carReadings)
+            else:
+                sonar = carReadings[carReadings['sensor'] == SonarObservation.SENSOR][0]
+                inference.observe(sonar['agentX'], sonar['agentY'], sonar['dist'])
+            if not Const.CARS_PARKED:
+                inference.elapseTime()
+            beliefs.append(inference.getBelief())
+        return beliefs
+
+    # Function: Combine Beliefs
+    # ---------------------
+    # The probability that at least one other car is on each tile,
+    # 1 - prod(1 - p) over the beliefs of the cars, the way the model
+    # combines the beliefs of the other cars.
+    def combineBeliefs(self, beliefs):
+        belief = particleEngine.ArrayBelief(self.numRows, self.numCols, 0.0)
+        free = numpy.ones(self.numRows * self.numCols)
+        for carBelief in beliefs:
+            free *= 1.0 - particleEngine.beliefProbs(carBelief)
+        belief.probs[:] = 1.0 - free
+        return belief
+
+    def moveJunior(self, belief):
+        actions = self.junior.getAutonomousActions(belief, self.agentGraph)
+        if Car.TURN_WHEEL in actions:
+            self.junior.setWheelAngle(actions[Car.TURN_WHEEL])
+        if Car.DRIVE_FORWARD in actions:
+            self.junior.accelerate(actions[Car.DRIVE_FORWARD] * Car.MAX_ACCELERATION)
+        self.junior.update()
+
+    def checkCollision(self):
+        juniorPos = self.junior.getPos()
+        juniorBounds = self.junior.getBoundsArray()
+        return Car.collidesAny(self.cars, juniorPos, juniorBounds)
+
+    # The nearest node search reads the position once per node, so it gets a
+    # plain Vec2d copy rather than the fleet backed junior.pos.
+    def checkGoal(self):
+        pos = self.junior.getPos()
+        pos = Vec2d(pos.x, pos.y)
+        nodeId = self.agentGraph.getNearestNode(pos)
+        return self.agentGraph.isTerminal(nodeId) and self.agentGraph.atNode(nodeId, pos)
+
+    # Function: Step
+    # ---------------------
+    # Runs one tick. Returns False once the run is over.
+    def step(self):
+        start = time.time()
+        belief = self.updateBeliefs()
+        self.inferenceTimes.append(time.time() - start)
+        for car in self.cars:
+            car.action()
+        Agent.updateAll(self.cars)
+        start = time.time()
+        self.moveJunior(belief)
+        self.planningTimes.append(time.time() - start)
+        planningStats = self.junior.getPlanningStats() if hasattr(self.junior, 'getPlanningStats') else None
+        if planningStats is not None:
+            self.planningBounds.append(planningStats[0])
+        self.tick += 1
+        self.collided = self.checkCollision()
+        self.reachedGoal = self.checkGoal()
+        return self.tick < self.ticks and not self.collided and not self.reachedGoal
+
+    # Function: Run
+    # ---------------------
+    # Steps until the run is over and returns its statistics.
+    def run(self):
+        start = time.time()
+        while self.step():
+            pass
+        elapsed = time.time() - start
+        return {
+            'ticks': self.tick,
+            'seconds': elapsed,
+            'ticksPerSecond': self.tick / elapsed if elapsed > 0 else float('inf'),
+            'collided': self.collided,
+            'reachedGoal': self.reachedGoal,
+            'meanInferenceTime': numpy.mean(self.inferenceTimes) if self.inferenceTimes else 0.0,
+            'maxInferenceTime': max(self.inferenceTimes) if self.inferenceTimes else 0.0,
+            'meanPlanningTime': numpy.mean(self.planningTimes) if self.planningTimes else 0.0,
+            'maxPlanningTime': max(self.planningTimes) if self.planningTimes else 0.0,
+            'meanPlanningBound': numpy.mean(self.planningBounds) if self.planningBounds else float('nan'),
+            'maxPlanningBound': max(self.planningBounds) if self.planningBounds else float('nan')
+        }
+
+# Function: Run Headless
+# ---------------------
+# Sets up Const for a headless run of |layoutName| with |inference|, seeds
+# everything with |seed| and fast-forwards at most |ticks| ticks, with
+# junior driven by |driverClass| (by default the model's AutoDriver). The
+# process wide path cache is emptied first, so that runs with the same seed
+# in the same process do not depend on what ran before, and its counters
+# are added to the statistics of the run.
+def runHeadless(layoutName, inference, ticks = DEFAULT_TICKS, seed = 0, auto = True, driverClass = None):
+    Const.HEADLESS = True
+    Const.AUTO = auto
+    Const.LAYOUT = layoutName
+    Const.INFERENCE = inference
+    seedAll(seed)
+    cache = pathCache.getPathCache()
+    cache.clear()
+    cache.resetStats()
+    stats = FastForward(makeModel(layoutName, driverClass), ticks).run()
+    cacheStats = cache.getStats()
+    stats.update({
+        'pathCacheHits': cacheStats['hits'],
+        'pathCacheMisses': cacheStats['misses'],
+        'pathCacheInvalidations': cacheStats['invalidations'],
+        'pathCacheHitRate': cacheStats['hitRate']
+    })
+    return stats
+
+# Headless counterpart of drive.py:
+#   python fastForward.py -a -d autoDriverAStar -i particleFilter -l lombard -t 2000 -s 0
+if __name__ == '__main__':
+    parser = optparse.OptionParser()
+    parser.add_option('-a', '--auto', action='store_true', dest='auto', default=False)
+    parser.add_option('-d', '--driver', dest='driver', default=None)
+    parser.add_option('-i', '--inference', dest='inference', default='none')
+    parser.add_option('-l', '--layout', dest='layout', default='small')
+    parser.add_option('-t', '--ticks', dest='ticks', type='int', default=DEFAULT_TICKS)
+    parser.add_option('-s', '--seed', dest='seed', type='int', default=0)
+    (options, args) = parser.parse_args()
+    driverClass = importlib.import_module(options.driver).AutoDriver if options.driver else None
+    stats = runHeadless(options.layout, options.inference, options.ticks, options.seed, options.auto, driverClass)
+    for key in sorted(stats):
+        print('%-18s %s' % (key, stats[key]))
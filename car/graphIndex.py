@@ -0,0 +1,159 @@
+'''
+Extended by Peggy Wang @PeggyYuchunWang
+Licensing Information: Please do not distribute or publish solutions to this
+project. You are free to use and extend Driverless Car for educational
+purposes. The Driverless Car project was developed at Stanford, primarily by
+Chris Piech (piech@cs.stanford.edu). It was inspired by the Pacman projects.
+'''
+import particleEngine
+import util
+import hashlib
+import heapq
+import math
+import weakref
+import numpy
+
+
+_graphs = weakref.WeakKeyDictionary()
+_indexes = dict()
+
+# Function: Get Graph Index
+# ---------------------
+# Returns the GraphIndex of |agentGraph|, building it the first time the
+# graph is seen. Graphs with the same nodes and edges (the same layout
+# loaded again, e.g. for every episode of a batch) share one index, with
+# its goal distance fields, by fingerprint.
+def getGraphIndex(agentGraph):
+    index = _graphs.get(agentGraph)
+    if index is None:
+        index = GraphIndex(agentGraph)
+        index = _indexes.setdefault(index.fingerprint, index)
+        _graphs[agentGraph] = index
+    return index
+
+
+# Class: Graph Index
+# ---------------------
+# Everything the planners need from agentGraph, computed once per road
+# graph: a dense index for the node ids, node coordinates as flat arrays,
+# successor and predecessor lists, the terminal nodes, for every goal a
+# reverse Dijkstra field of road distances to it, and for every belief grid
+# size the belief tile of every node. The fingerprint identifies the graph
+# (nodes, positions, edges and terminals) for the caches built on it.
+class GraphIndex(object):
+
+    def __init__(self, agentGraph):
+        self.nodeIds = list(agentGraph.nodeMap)
+        self.index = dict((nodeId, i) for i, nodeId in enumerate(self.nodeIds))
+        self.xs = numpy.array([agentGraph.getNodeX(n) for n in self.nodeIds], dtype=float)
+        self.ys = numpy.array([agentGraph.getNodeY(n) for n in self.nodeIds], dtype=float)
+        self.positions = list(zip(self.xs.tolist(), self.ys.tolist()))
+        self.successors = dict()
+        self.predecessors = dict((nodeId, []) for nodeId in self.nodeIds)
+        for nodeId in self.nodeIds:
+            self.successors[nodeId] = list(agentGraph.getNextNodeIds(nodeId))
+            for nextId in self.successors[nodeId]:
+                self.predecessors[nextId].append(nodeId)
+        self.terminals = [n for n in self.nodeIds if agentGraph.isTerminal(n)]
+        self.fingerprint = self.computeFingerprint()
+        self.goalDistances = dict()
+        self.tiles = dict()
+        self.tileNodeLists = dict()
+
+    def getNumNodes(self):
+        return len(self.nodeIds)
+
+    def computeFingerprint(self):
+        digest = hashlib.sha1()
+        for part in [self.nodeIds, [self.successors[n] for n in self.nodeIds], self.terminals]:
+            digest.update(repr(part).encode('utf-8'))
+        digest.update(self.xs.tobytes())
+        digest.update(self.ys.tobytes())
+        return digest.hexdigest()[:16]
+
+    # Function: Distance
+    # ---------------------
+    # Straight line distance between two nodes.
+    def distance(self, fromId, toId):
+        (x1, y1) = self.positions[self.index[fromId]]
+        (x2, y2) = self.positions[self.index[toId]]
+        return math.sqrt((x1 - x2) ** 2 + (y1 - y2) ** 2)
+
+    # Function: Goal Distance Field
+    # ---------------------
+    # Flat array, indexed like nodeIds, of the shortest road distance from
+    # every node to |goal| (inf where the goal cannot be reached). Computed
+    # once per goal with a reverse Dijkstra search.
+    def goalDistanceField(self, goal):
+        if goal not in self.goalDistances:
+            self.goalDistances[goal] = self.reverseDijkstra([goal])
+        return self.goalDistances[goal]
+
+    # Function: Goal Distance
+    # ---------------------
+    # O(1) road distance from a node to |goal|.
+    def goalDistance(self, nodeId, goal):
+        return float(self.goalDistanceField(goal)[self.index[nodeId]])
+
+    # Function: Node Tiles
+    # ---------------------
+    # Flat array, indexed like nodeIds, of the belief tile id
+    # (row * numCols + col) each node lies in, clamped to the grid.
+    def nodeTiles(self, numRows, numCols):
+        if (numRows, numCols) not in self.tiles:
+            rows = numpy.array([util.yToRow(y) for y in self.ys.tolist()], dtype=numpy.int64)
+            cols = numpy.array([util.xToCol(x) for x in self.xs.tolist()], dtype=numpy.int64)
+            rows = numpy.clip(rows, 0, numRows - 1)
+            cols = numpy.clip(cols, 0, numCols - 1)
+            self.tiles[(numRows, numCols)] = rows * numCols + cols
+        return self.tiles[(numRows, numCols)]
+
+    # Function: Tile Nodes
+    # ---------------------
+    # The inverse of nodeTiles, CSR style: (offsets, nodes) where
+    # nodes[offsets[t]:offsets[t + 1]] are the positions in nodeIds of the
+    # nodes on tile t.
+    def tileNodes(self, numRows, numCols):
+        if (numRows, numCols) not in self.tileNodeLists:
+            tiles = self.nodeTiles(numRows, numCols)
+            nodes = numpy.argsort(tiles, kind='mergesort')
+            offsets = numpy.searchsorted(tiles[nodes], numpy.arange(numRows * numCols + 1))
+            self.tileNodeLists[(numRows, numCols)] = (offsets, nodes)
+        return self.tileNodeLists[(numRows, numCols)]
+
+    # Function: Node Risks
+    # ---------------------
+    # The belief that another car is at each node, for all nodes (in nodeIds
+    # order) or for the given |nodeIds|. A single gather from the belief's
+    # grid, which is an array for an ArrayBelief and nested lists for a
+    # util.Belief; only a handful of |nodeIds| on a list grid are read tile
+    # by tile instead of converting the whole grid.
+    def nodeRisks(self, belief, nodeIds = None):
+        tiles = self.nodeTiles(belief.getNumRows(), belief.getNumCols())
+        if nodeIds is not None:
+            tiles = tiles[[self.index[n] for n in nodeIds]]
+        grid = getattr(belief, 'grid', None)
+        if isinstance(grid, numpy.ndarray) or (grid is not None and nodeIds is None):
+            return particleEngine.beliefProbs(belief)[tiles]
+        numCols = belief.getNumCols()
+        return numpy.array([belief.getProb(t // numCols, t % numCols) for t in tiles.tolist()], dtype=float)
+
+    def reverseDijkstra(self, goals):
+        distances = numpy.full(len(self.nodeIds), numpy.inf)
+        pq = []
+        for goal in goals:
+            distances[self.index[goal]] = 0.0
+            pq.append((0.0, self.index[goal]))
+        heapq.heapify(pq)
+        while pq:
+            (dist, i) = heapq.heappop(pq)
+            if dist > distances[i]:
+                continue
+            nodeId = self.nodeIds[i]
+            for prevId in self.predecessors[nodeId]:
+                j = self.index[prevId]
+                newDist = dist + self.distance(prevId, nodeId)
+                if newDist < distances[j]:
+                    distances[j] = newDist
+                    heapq.heappush(pq, (newDist, j))
+        return distances
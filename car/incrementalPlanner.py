@@ -0,0 +1,153 @@
+'''
+Extended by Peggy Wang @PeggyYuchunWang
+Licensing Information: Please do not distribute or publish solutions to this
+project. You are free to use and extend Driverless Car for educational
+purposes. The Driverless Car project was developed at Stanford, primarily by
+Chris Piech (piech@cs.stanford.edu). It was inspired by the Pacman projects.
+'''
+import heapq
+import numpy
+
+INF = float('inf')
+
+# Class: D Star Lite
+# ---------------------
+# Incremental shortest paths to a fixed goal over the road graph (Koenig and
+# Likhachev's D* Lite). The search runs backwards from the goal and keeps its
+# g / rhs values between calls, so when the car moves on or the belief of
+# other cars changes only the affected part of the graph is repaired.
+#
+# The graph comes from a graphIndex.GraphIndex. The cost of the edge u -> v
+# is its length plus riskWeight * risk[v], where the risk of a node is the
+# belief of other cars on its (numRows x numCols) belief tile. The planner
+# is fed the belief by tile id and only looks at the tiles that moved more
+# than RISK_TOLERANCE away from the value the current search state was
+# built with, so an update costs one vectorized comparison over the tiles
+# plus work proportional to the nodes on the changed tiles.
+class DStarLite(object):
+
+    RISK_TOLERANCE = 0.01
+
+    def __init__(self, graphIndex, goal, riskWeight, numRows, numCols):
+        self.graphIndex = graphIndex
+        self.goal = goal
+        self.riskWeight = riskWeight
+        self.nodeIds = graphIndex.nodeIds
+        self.index = graphIndex.index
+        self.successors = graphIndex.successors
+        self.predecessors = graphIndex.predecessors
+        self.distance = graphIndex.distance
+        self.risks = numpy.zeros(len(self.nodeIds))
+        self.tileRisks = numpy.zeros(numRows * numCols)
+        (self.tileOffsets, self.tileNodes) = graphIndex.tileNodes(numRows, numCols)
+        self.tileHasNodes = self.tileOffsets[1:] > self.tileOffsets[:-1]
+        self.g = dict()
+        self.rhs = {goal: 0.0}
+        self.openKeys = dict()
+        self.pq = []
+        self.counter = 0
+        self.km = 0.0
+        self.start = None
+        self.insert(goal, (self.heuristic(goal), 0.0))
+
+    def heuristic(self, nodeId):
+        if self.start is None:
+            return 0.0
+        return self.distance(self.start, nodeId)
+
+    def cost(self, fromId, toId):
+        return self.distance(fromId, toId) + self.riskWeight * self.risks[self.index[toId]]
+
+    def calculateKey(self, nodeId):
+        m = min(self.g.get(nodeId, INF), self.rhs.get(nodeId, INF))
+        return (m + self.heuristic(nodeId) + self.km, m)
+
+    def insert(self, nodeId, key):
+        self.openKeys[nodeId] = key
+        self.counter += 1
+        heapq.heappush(self.pq, (key, self.counter, nodeId))
+
+    # Pops stale heap entries (lazy deletion) and returns the top key.
+    def topKey(self):
+        while self.pq:
+            (key, _, nodeId) = self.pq[0]
+            if self.openKeys.get(nodeId) == key:
+                return key
+            heapq.heappop(self.pq)
+        return (INF, INF)
+
+    def updateVertex(self, nodeId):
+        if nodeId != self.goal:
+            best = INF
+            for nextId in self.successors[nodeId]:
+                best = min(best, self.cost(nodeId, nextId) + self.g.get(nextId, INF))
+            self.rhs[nodeId] = best
+        self.openKeys.pop(nodeId, None)
+        if self.g.get(nodeId, INF) != self.rhs.get(nodeId, INF):
+            self.insert(nodeId, self.calculateKey(nodeId))
+
+    def computeShortestPath(self):
+        while (self.topKey() < self.calculateKey(self.start) or
+               self.rhs.get(self.start, INF) != self.g.get(self.start, INF)):
+            kOld = self.topKey()
+            if kOld == (INF, INF):
+                return
+            nodeId = heapq.heappop(self.pq)[2]
+            del self.openKeys[nodeId]
+            kNew = self.calculateKey(nodeId)
+            if kOld < kNew:
+                self.insert(nodeId, kNew)
+            elif self.g.get(nodeId, INF) > self.rhs.get(nodeId, INF):
+                self.g[nodeId] = self.rhs[nodeId]
+                for prevId in self.predecessors[nodeId]:
+                    self.updateVertex(prevId)
+            else:
+                self.g[nodeId] = INF
+                self.updateVertex(nodeId)
+                for prevId in self.predecessors[nodeId]:
+                    self.updateVertex(prevId)
+
+    # Function: Update Risks
+    # ---------------------
+    # Takes the current belief by tile id and repairs the edges into every
+    # node on a tile whose belief moved past RISK_TOLERANCE. Returns the
+    # number of such nodes.
+    def updateRisks(self, tileRisks):
+        tileRisks = numpy.asarray(tileRisks, dtype=float)
+        changed = numpy.flatnonzero((numpy.abs(tileRisks - self.tileRisks) > self.RISK_TOLERANCE) &
+                                    self.tileHasNodes)
+        self.tileRisks[changed] = tileRisks[changed]
+        numChanged = 0
+        for tile in changed.tolist():
+            nodes = self.tileNodes[self.tileOffsets[tile]:self.tileOffsets[tile + 1]]
+            self.risks[nodes] = tileRisks[tile]
+            numChanged += len(nodes)
+            for i in nodes.tolist():
+                for prevId in self.predecessors[self.nodeIds[i]]:
+                    self.updateVertex(prevId)
+        return numChanged
+
+    # Function: Plan
+    # ---------------------
+    # Returns the cheapest path from |start| to the goal under the belief
+    # |tileRisks| (by tile id) as a list of node ids, or [start] if the goal
+    # cannot be reached.
+    def plan(self, start, tileRisks):
+        if self.start is not None:
+            self.km += self.distance(self.start, start)
+        self.start = start
+        self.updateRisks(tileRisks)
+        self.computeShortestPath()
+        if self.g.get(start, INF) == INF:
+            return [start]
+        path = [start]
+        visited = set(path)
+        nodeId = start
+        while nodeId != self.goal:
+            nextIds = [n for n in self.successors[nodeId] if n not in visited]
+            if not nextIds:
+                return [start]
+            nodeId = min(nextIds, key=lambda n: self.cost(path[-1], n) + self.g.get(n, INF))
+            path.append(nodeId)
+            visited.add(nodeId)
+        return path
@@ -7,52 +7,97 @@ Chris Piech (piech@cs.stanford.edu). It was inspired by the Pacman projects.
 '''
 from engine.const import Const
 import util, math, random, collections
+import numpy
+import particleEngine
+import transitionModel
+import emissionModel
+import sensorFusion
 
 
 # Class: Particle Filter
 # ----------------------
 # Maintain and update a belief distribution over the probability of a car
-# being in a tile using a set of particles.
+# being in a tile using a set of weighted particles. Particles are held as a
+# numpy array of integer tile ids (row * numCols + col), see particleEngine,
+# with a parallel array of normalized log weights. Particles are only
+# resampled once the effective sample size drops below RESAMPLE_THRESHOLD
+# times the particle count.
 class ParticleFilter(object):
 
     NUM_PARTICLES = 500
+    RESAMPLE_THRESHOLD = 0.5
+
+    # KLD-adaptive sample size, opt-in. When ADAPTIVE is set the particle
+    # count moves between MIN_PARTICLES and MAX_PARTICLES following the KLD
+    # bound over the belief tiles (error KLD_EPSILON, normal quantile KLD_Z),
+    # and jumps back to MAX_PARTICLES when the observation likelihood drops
+    # below COLLAPSE_RATIO times its running (geometric) average. An adaptive
+    # filter starts with MAX_PARTICLES, so it only pays off for filters that
+    # live long enough to shrink. It is also resampled when it holds more
+    # than SHRINK_RATIO times the particles the KLD bound asks for the tiles
+    # they occupy, so that it shrinks even while its weights stay even.
+    # MultiTargetTracker, which the agents use, is adaptive by default.
+    ADAPTIVE = False
+    MIN_PARTICLES = 100
+    MAX_PARTICLES = 5000
+    KLD_EPSILON = 0.05
+    KLD_Z = 2.326
+    SHRINK_RATIO = 2.0
+    COLLAPSE_RATIO = 0.1
+    LIKELIHOOD_SMOOTHING = 0.2
+    TELEMETRY_SIZE = 10000
 
     # Function: Init
     # --------------
     # Constructor that initializes an ParticleFilter object which has
     # (numRows x numCols) number of tiles.
     def __init__(self, numRows, numCols):
-        self.belief = util.Belief(numRows, numCols)
+        self.belief = particleEngine.ArrayBelief(numRows, numCols)
+        self.numRows = numRows
+        self.numCols = numCols
+        self.emissionModel = emissionModel.getEmissionModel(numRows, numCols, Const.SENSOR_STD)
+        self.sensorFusion = sensorFusion.getSensorFusion(numRows, numCols)
 
-        # Load the transition probabilities and store them in an integer-valued defaultdict.
-        # Use self.transProbDict[oldTile][newTile] to get the probability of transitioning from oldTile to newTile.
-        self.transProb = util.loadTransProb()
-        self.transProbDict = dict()
-        for (oldTile, newTile) in self.transProb:
-            if not oldTile in self.transProbDict:
-                self.transProbDict[oldTile] = collections.defaultdict(int)
-            self.transProbDict[oldTile][newTile] = self.transProb[(oldTile, newTile)]
+        # Load the compiled transition model. It is memory-mapped and shared
+        # by every filter of the layout, see transitionModel.
+        self.transitionSampler = transitionModel.loadTransitionSampler(numRows, numCols)
 
-        # Initialize the particles randomly.
-        self.particles = collections.defaultdict(int)
-        potentialParticles = self.transProbDict.keys()
-        for i in range(self.NUM_PARTICLES):
-            particleIndex = int(random.random() * len(potentialParticles))
-            self.particles[potentialParticles[particleIndex]] += 1
+        # Running average of the log observation likelihood and the particle
+        # count after every observation (see getParticleCounts).
+        self.logLikelihood = None
+        self.particleCounts = collections.deque(maxlen=self.TELEMETRY_SIZE)
+        # Cached result of predictOccupancy, dropped whenever the particles
+        # change.
+        self.prediction = None
 
+        # Initialize the particles randomly.
+        self.potentialParticles = self.transitionSampler.sourceIds
+        self.initParticles()
         self.updateBelief()
 
+    # Function: Init Particles
+    # ------------------------
+    # Spreads equally weighted particles uniformly over the tiles that have
+    # outgoing transitions: MAX_PARTICLES when adaptive, NUM_PARTICLES
+    # otherwise.
+    def initParticles(self):
+        numParticles = self.MAX_PARTICLES if self.ADAPTIVE else self.NUM_PARTICLES
+        indices = numpy.random.randint(len(self.potentialParticles), size=numParticles)
+        self.particles = self.potentialParticles[indices]
+        self.logWeights = numpy.full(numParticles, -math.log(numParticles))
+        self.logLikelihood = None
+        self.prediction = None
+
     # Function: Update Belief
     # ---------------------
     # Updates |self.belief| with the probability that the car is in each tile
-    # based on |self.particles|, which is a defaultdict from particle to
-    # probability (which should sum to 1).
+    # based on |self.particles|, an array of particle tile ids, and their
+    # weights. The belief is updated in place and only on the tiles that
+    # held or hold particles.
     def updateBelief(self):
-        newBelief = util.Belief(self.belief.getNumRows(), self.belief.getNumCols(), 0)
-        for tile in self.particles:
-            newBelief.setProb(tile[0], tile[1], self.particles[tile])
-        newBelief.normalize()
-        self.belief = newBelief
+        if len(self.particles) == 0: return
+        tiles, probs = particleEngine.sparseHistogram(self.particles, numpy.exp(self.logWeights))
+        self.belief.setSparse(tiles, probs)
 
     ##################################################################################
     # Function: Observe:
@@ -61,30 +106,92 @@ class ParticleFilter(object):
     # $d_t$ and your position $a_t$.
     #
     # This algorithm takes two steps:
-    # 1. Re-weight the particles based on the observation.
-    # 2. Re-sample the particles.
+    # 1. Re-weight the particles based on the observation (in log space).
+    # 2. If the effective sample size fell below RESAMPLE_THRESHOLD times the
+    #    particle count, re-sample the particles (systematic resampling, O(N)),
+    #    or, when ADAPTIVE, KLD-sample as many particles as the posterior needs.
     #
     # - agentX: x location of your car (not the one you are tracking)
     # - agentY: y location of your car (not the one you are tracking)
     # - observedDist: true distance plus a mean-zero Gaussian with standard deviation Const.SENSOR_STD
     #
+    # If no particles are left the particles are re-initialized.
     ##################################################################################
     def observe(self, agentX, agentY, observedDist):
-        distDict = {}
-        for (r, c) in self.particles:
-            numPar = self.particles[(r, c)]
-            x = util.colToX(c)
-            y = util.rowToY(r)
-            d = math.sqrt((x - agentX)**2 + (y - agentY)**2)
-            emissionProb = util.pdf(d, Const.SENSOR_STD, observedDist)
-            distDict[(r, c)] = emissionProb * float(numPar)/float(self.NUM_PARTICLES)
-        newParticles = collections.defaultdict(int)
-        for i in range(self.NUM_PARTICLES):
-            newParticles[util.weightedRandomChoice(distDict)] += 1
-        self.particles = newParticles
+        if len(self.particles) == 0:
+            self.initParticles()
+        d = self.emissionModel.distances(self.particles, agentX, agentY)
+        self.reweight(self.emissionModel.logLikelihood(d, observedDist))
+
+    # Function: Observe Readings
+    # --------------------------
+    # Like observe, but fuses a whole batch of Sonar / Radar / Lidar readings
+    # (a READING_DTYPE array, see engine.model.observation) into a single
+    # re-weighting step.
+    def observeReadings(self, readings):
+        if len(self.particles) == 0:
+            self.initParticles()
+        self.reweight(self.sensorFusion.logLikelihood(self.particles, readings), len(readings))
+
+    # Function: Reweight
+    # ------------------
+    # Adds |logEmissions| to the particle log weights, renormalizes and
+    # resamples if needed (steps 1 and 2 of observe). An adaptive filter also
+    # resamples, with all MAX_PARTICLES, when the observation likelihood
+    # collapsed, and when it holds more particles than it needs.
+    # |numReadings| is the number of readings fused into |logEmissions|; the
+    # likelihood is tracked per reading, so that a car seen by more sensors
+    # than usual does not look collapsed.
+    def reweight(self, logEmissions, numReadings=1):
+        logWeights = self.logWeights + logEmissions
+        logLikelihood = float(particleEngine.logSumExp(logWeights))
+        self.logWeights = logWeights - logLikelihood
+        collapsed = self.trackLikelihood(logLikelihood / numReadings)
+        numParticles = len(self.particles)
+        lowEss = particleEngine.effectiveSampleSize(self.logWeights) < self.RESAMPLE_THRESHOLD * numParticles
+        if self.ADAPTIVE and not lowEss:
+            numTiles = len(numpy.unique(self.particles))
+            lowEss = collapsed or numParticles > self.SHRINK_RATIO * \
+                particleEngine.kldSampleSize(numTiles, self.KLD_EPSILON, self.KLD_Z)
+        if lowEss:
+            weights = numpy.exp(self.logWeights)
+            if self.ADAPTIVE:
+                minParticles = self.MAX_PARTICLES if collapsed else self.MIN_PARTICLES
+                # Spread out again, the filter starts a new running average.
+                if collapsed: self.logLikelihood = None
+                indices = particleEngine.kldResample(weights, self.particles, minParticles,
+                                                     self.MAX_PARTICLES, self.KLD_EPSILON, self.KLD_Z)
+            else:
+                indices = particleEngine.systematicResample(weights, self.NUM_PARTICLES)
+            self.particles = self.particles[indices]
+            self.logWeights = numpy.full(len(indices), -math.log(len(indices)))
+        self.particleCounts.append(len(self.particles))
+        self.prediction = None
 
         self.updateBelief()
 
+    # Function: Track Likelihood
+    # --------------------------
+    # Folds the log observation likelihood of every observation into its
+    # running average and returns whether it collapsed, i.e. fell below
+    # COLLAPSE_RATIO times the average of the observations before it.
+    def trackLikelihood(self, logLikelihood):
+        if not numpy.isfinite(logLikelihood):
+            return True
+        if self.logLikelihood is None:
+            self.logLikelihood = logLikelihood
+            return False
+        collapsed = logLikelihood < math.log(self.COLLAPSE_RATIO) + self.logLikelihood
+        self.logLikelihood += self.LIKELIHOOD_SMOOTHING * (logLikelihood - self.logLikelihood)
+        return collapsed
+
+    # Function: Get Particle Counts
+    # -----------------------------
+    # Returns the number of particles after each of the most recent
+    # observations (at most TELEMETRY_SIZE), oldest first.
+    def getParticleCounts(self):
+        return list(self.particleCounts)
+
     ##################################################################################
     # Function: Elapse Time (propose a new belief distribution based on a learned transition model)
     # ---------------------
@@ -92,24 +199,361 @@ class ParticleFilter(object):
     # writes an updated |self.particles| with particle locations at time $t+1$.
     #
     # This algorithm takes one step:
-    # 1. Proposal based on the particle distribution at current time $t$.
+    # 1. Proposal based on the particle distribution at current time $t$,
+    #    drawn for all particles at once from precompiled alias tables.
+    #
+    # Particles on tiles without outgoing transitions are dropped.
     ##################################################################################
     def elapseTime(self):
-        newParticles = collections.defaultdict(int)
-        for oldTile in self.particles:
-            weightDict = collections.defaultdict(int)
-            numPar = self.particles[oldTile]
-            if oldTile not in self.transProbDict:
-                continue
-            for newTile in self.transProbDict[oldTile]:
-                weightDict[newTile] = self.transProbDict[oldTile][newTile] * float(numPar)/float(self.NUM_PARTICLES)
-            for i in range(numPar):
-                newParticles[util.weightedRandomChoice(weightDict)] += 1
-        self.particles = newParticles
+        particles, alive = self.transitionSampler.advance(self.particles)
+        self.particles = particles[alive]
+        self.logWeights = self.logWeights[alive]
+        if len(self.particles) > 0:
+            self.logWeights -= particleEngine.logSumExp(self.logWeights)
+        self.prediction = None
+
+    # Function: Predict Occupancy
+    # ---------------------------
+    # Rolls the particles forward |steps| ticks with the transition model,
+    # without changing the filter, and returns a read-only
+    # (steps + 1 x numRows * numCols) array: row s is the probability that
+    # the car is on each tile (by tile id) s ticks from now. Cached until
+    # the next observe / elapseTime.
+    def predictOccupancy(self, steps):
+        if self.prediction is None or len(self.prediction) <= steps:
+            self.prediction = particleEngine.predictOccupancy(
+                self.transitionSampler, self.particles, numpy.exp(self.logWeights),
+                steps, self.numRows * self.numCols)
+            self.prediction.flags.writeable = False
+        return self.prediction[:steps + 1]
 
     # Function: Get Belief
     # ---------------------
     # Returns your belief of the probability that the car is in each tile.
-    # Belief probabilities should sum to 1.
+    # Belief probabilities should sum to 1. The same ArrayBelief is returned
+    # on every call and kept up to date; use getGrid for a read-only array.
     def getBelief(self):
         return self.belief
+
+
+# Class: Multi Target Tracker
+# ---------------------------
+# A particle filter for every tracked car at once. The particles of all K
+# cars live in one (K x W) array of tile ids, so observe and elapseTime
+# update every car in a single vectorized call instead of stepping K
+# ParticleFilter objects. Use addTarget to register a car; it returns a
+# TrackedCar with the ParticleFilter interface for code that handles one
+# car at a time.
+#
+# Like an ADAPTIVE ParticleFilter, every car KLD-samples as many particles
+# as its posterior needs (between MIN_PARTICLES and MAX_PARTICLES) whenever
+# it is resampled, and goes back to MAX_PARTICLES when its observation
+# likelihood collapses. Car k uses the first counts[k] columns; W is the
+# largest count and the columns after a car's count are padding with a log
+# weight of -inf. With ADAPTIVE off every car keeps NUM_PARTICLES.
+class MultiTargetTracker(object):
+
+    NUM_PARTICLES = ParticleFilter.NUM_PARTICLES
+    RESAMPLE_THRESHOLD = ParticleFilter.RESAMPLE_THRESHOLD
+
+    ADAPTIVE = True
+    MIN_PARTICLES = ParticleFilter.MIN_PARTICLES
+    MAX_PARTICLES = ParticleFilter.MAX_PARTICLES
+    KLD_EPSILON = ParticleFilter.KLD_EPSILON
+    KLD_Z = ParticleFilter.KLD_Z
+    SHRINK_RATIO = ParticleFilter.SHRINK_RATIO
+    COLLAPSE_RATIO = ParticleFilter.COLLAPSE_RATIO
+    LIKELIHOOD_SMOOTHING = ParticleFilter.LIKELIHOOD_SMOOTHING
+    TELEMETRY_SIZE = ParticleFilter.TELEMETRY_SIZE
+
+    # Function: Init
+    # --------------
+    # Creates an empty tracker over (numRows x numCols) tiles.
+    def __init__(self, numRows, numCols):
+        self.numRows = numRows
+        self.numCols = numCols
+        self.emissionModel = emissionModel.getEmissionModel(numRows, numCols, Const.SENSOR_STD)
+        self.sensorFusion = sensorFusion.getSensorFusion(numRows, numCols)
+        self.transitionSampler = transitionModel.loadTransitionSampler(numRows, numCols)
+        self.potentialParticles = self.transitionSampler.sourceIds
+        self.particles = numpy.zeros((0, 0), dtype=numpy.int64)
+        # Normalized log weight of every particle. A particle that hit a tile
+        # without outgoing transitions gets -inf until it is resampled.
+        self.logWeights = numpy.zeros((0, 0))
+        self.counts = numpy.zeros(0, dtype=numpy.int64)
+        # Running average of every car's log observation likelihood (nan
+        # before its first observation) and its particle count after each
+        # observation.
+        self.logLikelihoods = numpy.zeros(0)
+        self.particleCounts = []
+        self.dirty = numpy.zeros(0, dtype=bool)
+        self.beliefs = []
+        self.prediction = None
+
+    # Function: Add Target
+    # --------------------
+    # Starts tracking one more car with uniformly initialized particles.
+    def addTarget(self):
+        target = len(self.particles)
+        width = self.particles.shape[1]
+        self.particles = numpy.vstack([self.particles, numpy.zeros((1, width), dtype=numpy.int64)])
+        self.logWeights = numpy.vstack([self.logWeights, numpy.full((1, width), -numpy.inf)])
+        self.counts = numpy.append(self.counts, 0)
+        self.logLikelihoods = numpy.append(self.logLikelihoods, numpy.nan)
+        self.particleCounts.append(collections.deque(maxlen=self.TELEMETRY_SIZE))
+        self.dirty = numpy.append(self.dirty, True)
+        self.beliefs.append(particleEngine.ArrayBelief(self.numRows, self.numCols))
+        self.initTargets(numpy.array([target]))
+        return TrackedCar(self, target)
+
+    def getNumTargets(self):
+        return len(self.particles)
+
+    # Function: Get Particle Counts
+    # -----------------------------
+    # ParticleFilter.getParticleCounts of one tracked car.
+    def getParticleCounts(self, target):
+        return list(self.particleCounts[target])
+
+    def selectTargets(self, targets):
+        if targets is None:
+            return numpy.arange(len(self.particles))
+        return numpy.asarray(targets, dtype=numpy.int64)
+
+    # Spreads MAX_PARTICLES (NUM_PARTICLES when not adaptive) equally
+    # weighted particles of every car in |targets| uniformly over the tiles
+    # that have outgoing transitions.
+    def initTargets(self, targets):
+        numParticles = self.MAX_PARTICLES if self.ADAPTIVE else self.NUM_PARTICLES
+        indices = numpy.random.randint(len(self.potentialParticles), size=(len(targets), numParticles))
+        self.setParticles(targets, self.potentialParticles[indices],
+                          numpy.full(len(targets), numParticles, dtype=numpy.int64))
+        self.logLikelihoods[targets] = numpy.nan
+
+    # Gives every car in |targets| the first counts[i] particles of row i of
+    # |particles|, equally weighted, and makes W the largest count.
+    def setParticles(self, targets, particles, counts):
+        self.counts[targets] = counts
+        self.resize(int(self.counts.max()))
+        width = self.particles.shape[1]
+        live = numpy.arange(width) < counts[:, None]
+        block = numpy.zeros((len(targets), width), dtype=numpy.int64)
+        n = min(width, particles.shape[1])
+        block[:, :n] = particles[:, :n]
+        self.particles[targets] = numpy.where(live, block, 0)
+        self.logWeights[targets] = numpy.where(live, -numpy.log(counts)[:, None], -numpy.inf)
+
+    # Pads or cuts the particle arrays to |width| columns.
+    def resize(self, width):
+        (numTargets, oldWidth) = self.particles.shape
+        if width < oldWidth:
+            self.particles = self.particles[:, :width].copy()
+            self.logWeights = self.logWeights[:, :width].copy()
+        elif width > oldWidth:
+            extra = width - oldWidth
+            self.particles = numpy.hstack([self.particles, numpy.zeros((numTargets, extra), dtype=numpy.int64)])
+            self.logWeights = numpy.hstack([self.logWeights, numpy.full((numTargets, extra), -numpy.inf)])
+
+    # Mask of the particles of |targets| that are not padding.
+    def liveMask(self, targets):
+        return numpy.arange(self.particles.shape[1]) < self.counts[targets][:, None]
+
+    # The number of distinct tiles the particles of each car in |targets|
+    # are on.
+    def occupiedTiles(self, targets):
+        return particleEngine.countDistinct(numpy.where(self.liveMask(targets), self.particles[targets], -1))
+
+    # Function: Observe
+    # -----------------
+    # ParticleFilter.observe for several cars in one pass. |observedDists|
+    # holds one reading per car in |targets| (all cars by default);
+    # agentX / agentY may be scalars or one position per car. Only the cars
+    # whose effective sample size dropped below RESAMPLE_THRESHOLD (or, when
+    # adaptive, whose likelihood collapsed or that hold more particles than
+    # they need) are resampled; cars without any live particle are
+    # re-initialized.
+    def observe(self, agentX, agentY, observedDists, targets=None):
+        targets = self.selectTargets(targets)
+        particles = self.particles[targets]
+        if numpy.ndim(agentX) > 0 or numpy.ndim(agentY) > 0:
+            agentX = numpy.reshape(agentX, (-1, 1))
+            agentY = numpy.reshape(agentY, (-1, 1))
+        d = self.emissionModel.distances(particles, agentX, agentY)
+        logEmissions = self.emissionModel.logLikelihood(d, numpy.reshape(observedDists, (-1, 1)))
+        self.reweight(targets, logEmissions)
+
+    # Function: Observe Readings
+    # --------------------------
+    # Fuses a batch of Sonar / Radar / Lidar readings about any of the
+    # tracked cars (a READING_DTYPE array whose target field is the car
+    # index) into one re-weighting step for every car that was observed.
+    def observeReadings(self, readings):
+        targets = numpy.unique(readings['target'])
+        logEmissions = self.sensorFusion.batchLogLikelihood(self.particles, readings)
+        numReadings = numpy.bincount(readings['target'])[targets]
+        self.reweight(targets, logEmissions[targets], numReadings)
+
+    # Function: Reweight
+    # ------------------
+    # Adds the (len(targets) x W) |logEmissions| to the log weights of
+    # |targets|, renormalizes and resamples the cars that need it.
+    # |numReadings| is ParticleFilter.reweight's, one per car or shared.
+    def reweight(self, targets, logEmissions, numReadings=1):
+        particles = self.particles[targets]
+        logWeights = self.logWeights[targets] + logEmissions
+        logTotals = particleEngine.logSumExp(logWeights)
+        valid = numpy.isfinite(logTotals)
+        logWeights[valid] -= logTotals[valid, None]
+        collapsed = self.trackLikelihoods(targets, logTotals / numReadings)
+
+        resample = numpy.zeros(len(targets), dtype=bool)
+        resample[valid] = particleEngine.effectiveSampleSize(logWeights[valid]) < \
+            self.RESAMPLE_THRESHOLD * self.counts[targets[valid]]
+        if self.ADAPTIVE:
+            needed = particleEngine.kldSampleSize(self.occupiedTiles(targets), self.KLD_EPSILON, self.KLD_Z)
+            resample |= valid & (collapsed | (self.counts[targets] > self.SHRINK_RATIO * needed))
+        self.particles[targets] = particles
+        self.logWeights[targets] = logWeights
+        if self.ADAPTIVE:
+            # Collapsed cars draw all MAX_PARTICLES, so they are resampled
+            # apart from the others, which draw only what their bound asks.
+            self.logLikelihoods[targets[resample & collapsed]] = numpy.nan
+            for (group, minCount) in [(resample & collapsed, self.MAX_PARTICLES),
+                                      (resample & ~collapsed, self.MIN_PARTICLES)]:
+                if group.any():
+                    (indices, counts) = particleEngine.kldResampleRows(
+                        numpy.exp(logWeights[group]), particles[group], minCount,
+                        self.MAX_PARTICLES, self.KLD_EPSILON, self.KLD_Z)
+                    self.setParticles(targets[group], numpy.take_along_axis(particles[group], indices, axis=1),
+                                      counts)
+        elif resample.any():
+            indices = particleEngine.systematicResampleRows(numpy.exp(logWeights[resample]))[0]
+            self.setParticles(targets[resample], numpy.take_along_axis(particles[resample], indices, axis=1),
+                              numpy.full(len(indices), indices.shape[1], dtype=numpy.int64))
+        if not valid.all():
+            self.initTargets(targets[~valid])
+        for (target, count) in zip(targets.tolist(), self.counts[targets].tolist()):
+            self.particleCounts[target].append(count)
+        self.dirty[targets] = True
+        self.prediction = None
+
+    # ParticleFilter.trackLikelihood for the cars in |targets|, given their
+    # log observation likelihoods |logTotals|. Returns which collapsed.
+    def trackLikelihoods(self, targets, logTotals):
+        previous = self.logLikelihoods[targets]
+        known = ~numpy.isnan(previous)
+        finite = numpy.isfinite(logTotals)
+        collapsed = ~finite
+        collapsed[known & finite] = logTotals[known & finite] < \
+            math.log(self.COLLAPSE_RATIO) + previous[known & finite]
+        updated = numpy.where(known, previous + self.LIKELIHOOD_SMOOTHING * (logTotals - previous), logTotals)
+        self.logLikelihoods[targets[finite]] = updated[finite]
+        return collapsed
+
+    # Function: Elapse Time
+    # ---------------------
+    # ParticleFilter.elapseTime for several cars (all by default) in one
+    # batched draw from the shared transition model. Like ParticleFilter,
+    # the beliefs keep showing the last observation until the next observe.
+    def elapseTime(self, targets=None):
+        targets = self.selectTargets(targets)
+        particles = self.particles[targets]
+        logWeights = self.logWeights[targets]
+        live = self.liveMask(targets)
+        if live.all():
+            particles, alive = self.transitionSampler.advance(particles)
+        else:
+            (particles[live], liveAlive) = self.transitionSampler.advance(particles[live])
+            alive = numpy.zeros_like(live)
+            alive[live] = liveAlive
+        logWeights[~alive] = -numpy.inf
+        self.particles[targets] = particles
+        self.logWeights[targets] = logWeights
+        self.prediction = None
+
+    # Function: Predict Occupancy
+    # ---------------------------
+    # Rolls every car's particles forward |steps| ticks in one batched pass,
+    # without changing the tracker, and returns a read-only
+    # (steps + 1 x numRows * numCols) array: row s is the expected number of
+    # tracked cars on each tile (by tile id) s ticks from now. Cached until
+    # the next observe / elapseTime, so every planner query in a tick
+    # shares one prediction.
+    def predictOccupancy(self, steps):
+        if self.prediction is None or len(self.prediction) <= steps:
+            self.prediction = particleEngine.predictOccupancy(
+                self.transitionSampler, self.particles, numpy.exp(self.logWeights),
+                steps, self.numRows * self.numCols)
+            self.prediction.flags.writeable = False
+        return self.prediction[:steps + 1]
+
+    # Function: Get Beliefs
+    # ---------------------
+    # Returns one belief layer per tracked car, in the order the cars were
+    # added. Each car keeps one ArrayBelief that is updated in place; only
+    # cars observed since the last call are recomputed, all of them with a
+    # single sparse histogram.
+    def getBeliefs(self):
+        self.updateBeliefs(numpy.flatnonzero(self.dirty))
+        return list(self.beliefs)
+
+    # Function: Get Belief
+    # ---------------------
+    # Returns the belief layer of a single tracked car.
+    def getBelief(self, target):
+        if self.dirty[target]:
+            self.updateBeliefs(numpy.array([target]))
+        return self.beliefs[target]
+
+    # Recomputes the beliefs of |targets|. Weights are taken relative to the
+    # largest weight of each car so they cannot all underflow to 0; a car
+    # without any live particle mass gets a uniform belief.
+    def updateBeliefs(self, targets):
+        if len(targets) == 0: return
+        numTiles = self.numRows * self.numCols
+        live = self.liveMask(targets)
+        keys = self.particles[targets] + numpy.arange(len(targets))[:, None] * numTiles
+        logWeights = self.logWeights[targets]
+        maxLogWeights = logWeights.max(axis=1)
+        maxLogWeights[~numpy.isfinite(maxLogWeights)] = 0.0
+        weights = numpy.exp(logWeights - maxLogWeights[:, None])
+        keys, probs = particleEngine.sparseHistogram(keys[live], weights[live])
+        # keys are sorted, so every car owns one contiguous run of them.
+        rows = keys // numTiles
+        bounds = numpy.searchsorted(rows, numpy.arange(len(targets) + 1))
+        for i, target in enumerate(targets):
+            start, end = bounds[i], bounds[i + 1]
+            carProbs = probs[start:end]
+            total = carProbs.sum()
+            if total > 0:
+                self.beliefs[target].setSparse(keys[start:end] - i * numTiles, carProbs / total)
+            else:
+                self.beliefs[target].setUniform()
+        self.dirty[targets] = False
+
+
+# Class: Tracked Car
+# ------------------
+# One car of a MultiTargetTracker behind the ParticleFilter interface.
+class TrackedCar(object):
+
+    def __init__(self, tracker, target):
+        self.tracker = tracker
+        self.target = target
+
+    def observe(self, agentX, agentY, observedDist):
+        self.tracker.observe(agentX, agentY, [observedDist], [self.target])
+
+    def observeReadings(self, readings):
+        readings = readings.copy()
+        readings['target'] = self.target
+        self.tracker.observeReadings(readings)
+
+    def elapseTime(self):
+        self.tracker.elapseTime([self.target])
+
+    def getBelief(self):
+        return self.tracker.getBelief(self.target)
+
+    def getParticleCounts(self):
+        return self.tracker.getParticleCounts(self.target)
@@ -0,0 +1,412 @@
+'''
+Extended by Peggy Wang @PeggyYuchunWang
+Licensing Information: Please do not distribute or publish solutions to this
+project. You are free to use and extend Driverless Car for educational
+purposes. The Driverless Car project was developed at Stanford, primarily by
+Chris Piech (piech@cs.stanford.edu). It was inspired by the Pacman projects.
+'''
+import util
+import math
+import numpy
+
+
+# Array-backed helpers for the particle filter. A tile (row, col) is stored
+# as the integer id row * numCols + col so that a whole particle set is a
+# single numpy int array and per-tile quantities are flat float arrays.
+
+SQRT_2PI = math.sqrt(2 * math.pi)
+
+_tileCenters = dict()
+
+# Function: Tile Id
+# ---------------------
+# Converts a (row, col) tile into its flat integer id.
+def tileId(tile, numCols):
+    return tile[0] * numCols + tile[1]
+
+# Function: Tile From Id
+# ---------------------
+# Converts a flat integer id back into a (row, col) tile.
+def tileFromId(tileIndex, numCols):
+    return (int(tileIndex) // numCols, int(tileIndex) % numCols)
+
+# Function: Tile Centers
+# ---------------------
+# Returns two flat read-only arrays (xs, ys) holding the world coordinates
+# of the centre of every tile, indexed by tile id. They are computed once per
+# grid size and shared; util.colToX / util.rowToY are only evaluated once per
+# column and once per row.
+def tileCenters(numRows, numCols):
+    if (numRows, numCols) not in _tileCenters:
+        colXs = numpy.array([util.colToX(c) for c in range(numCols)], dtype=float)
+        rowYs = numpy.array([util.rowToY(r) for r in range(numRows)], dtype=float)
+        xs = numpy.tile(colXs, numRows)
+        ys = numpy.repeat(rowYs, numCols)
+        xs.flags.writeable = False
+        ys.flags.writeable = False
+        _tileCenters[(numRows, numCols)] = (xs, ys)
+    return _tileCenters[(numRows, numCols)]
+
+# Function: Gaussian Pdf
+# ---------------------
+# Vectorized equivalent of util.pdf(mean, std, value).
+def gaussianPdf(mean, std, value):
+    u = (value - mean) / float(abs(std))
+    return numpy.exp(-0.5 * u * u) / (SQRT_2PI * abs(std))
+
+# Function: Gaussian Log Pdf
+# ---------------------
+# log(util.pdf(mean, std, value)), vectorized. Never underflows to -inf for
+# finite arguments.
+def gaussianLogPdf(mean, std, value):
+    u = (value - mean) / float(abs(std))
+    return -0.5 * u * u - math.log(SQRT_2PI * abs(std))
+
+# Function: Log Sum Exp
+# ---------------------
+# log(sum(exp(logWeights))) over the last axis, computed stably. Rows that
+# are entirely -inf give -inf.
+def logSumExp(logWeights):
+    m = numpy.max(logWeights, axis=-1)
+    m = numpy.where(numpy.isfinite(m), m, 0.0)
+    with numpy.errstate(divide='ignore'):
+        return numpy.log(numpy.sum(numpy.exp(logWeights - m[..., None]), axis=-1)) + m
+
+# Function: Effective Sample Size
+# ---------------------
+# 1 / sum(w^2) over the last axis for normalized log weights.
+def effectiveSampleSize(logWeights):
+    return 1.0 / numpy.sum(numpy.exp(2 * logWeights), axis=-1)
+
+# Function: Systematic Resample
+# ---------------------
+# Draws |n| indices into |weights| with a single random offset and |n|
+# evenly spaced pointers. Runs in O(n + len(weights)). Returns None when
+# the weights carry no mass.
+def systematicResample(weights, n):
+    return _resample(weights, (numpy.random.random() + numpy.arange(n)) / n)
+
+# Function: Stratified Resample
+# ---------------------
+# Like systematicResample, but every one of the |n| strata gets its own
+# independent random offset.
+def stratifiedResample(weights, n):
+    return _resample(weights, (numpy.random.random(n) + numpy.arange(n)) / n)
+
+# Function: KLD Sample Size
+# ---------------------
+# Fox's KLD-sampling bound: the number of samples needed so that, with
+# probability 1 - delta, the K-L divergence between the sample based and the
+# true posterior over |k| occupied bins stays below |epsilon|. |z| is the
+# upper 1 - delta quantile of the standard normal. Works on arrays of k.
+def kldSampleSize(k, epsilon, z):
+    dof = numpy.maximum(numpy.asarray(k, dtype=float) - 1, 1)
+    a = 2.0 / (9.0 * dof)
+    return numpy.ceil(dof / (2.0 * epsilon) * (1 - a + numpy.sqrt(a) * z) ** 3)
+
+# Function: Count Distinct
+# ---------------------
+# The number of distinct non-negative values in every row of a 2-D integer
+# array (negative values mark empty slots).
+def countDistinct(values):
+    values = numpy.sort(values, axis=1)
+    return (numpy.diff(values, axis=1) != 0).sum(axis=1) + 1 - (values[:, 0] < 0)
+
+# Function: KLD Resample
+# ---------------------
+# Draws between |minN| and |maxN| indices into |weights|, stopping as soon as
+# the sample size exceeds the KLD bound for the number of distinct tiles
+# (bins) drawn so far. |tiles| gives the tile id of every weight. The draws
+# can never reach more bins than the tiles that carry weight, so only
+# max(minN, bound for those tiles) candidates are drawn, all at once, and
+# the cut-off is found with a cumulative count of first occurrences.
+# Returns None when the weights carry no mass.
+def kldResample(weights, tiles, minN, maxN, epsilon, z):
+    cumulative = numpy.cumsum(weights, dtype=float)
+    total = cumulative[-1] if len(cumulative) else 0.0
+    if not total > 0:
+        return None
+    numTiles = len(numpy.unique(tiles[weights > 0]))
+    draws = int(min(maxN, max(minN, kldSampleSize(numTiles, epsilon, z))))
+    candidates = numpy.searchsorted(cumulative, numpy.random.random(draws) * total, side='right')
+    candidates = numpy.minimum(candidates, len(cumulative) - 1)
+    firstIndices = numpy.unique(tiles[candidates], return_index=True)[1]
+    isNewBin = numpy.zeros(draws, dtype=bool)
+    isNewBin[firstIndices] = True
+    required = kldSampleSize(numpy.cumsum(isNewBin), epsilon, z)
+    enough = numpy.flatnonzero(numpy.arange(1, draws + 1) >= required)
+    n = enough[0] + 1 if len(enough) else draws
+    return candidates[:max(minN, min(n, maxN))]
+
+# Function: KLD Resample Rows
+# ---------------------
+# kldResample for every row of a (K x N) weight matrix at once; |tiles| is
+# the (K x N) matrix of tile ids and |minN| may be one minimum per row.
+# Returns (indices, counts): a (K x D) array of column indices, of which
+# the first counts[k] are the sample of row k (D is the largest number of
+# draws any row needs). Every row must carry mass.
+def kldResampleRows(weights, tiles, minN, maxN, epsilon, z):
+    (k, n) = weights.shape
+    numTiles = countDistinct(numpy.where(weights > 0, tiles, -1))
+    draws = int(min(maxN, numpy.max(numpy.maximum(minN, kldSampleSize(numTiles, epsilon, z)))))
+    cumulative = numpy.cumsum(weights, axis=1, dtype=float)
+    rowIndex = numpy.arange(k)[:, None]
+    # The row shift of systematicResampleRows: one searchsorted for all rows.
+    cumulative = cumulative / cumulative[:, -1:] + rowIndex
+    positions = numpy.random.random((k, draws)) + rowIndex
+    candidates = numpy.searchsorted(cumulative.ravel(), positions.ravel(), side='right').reshape(k, draws)
+    candidates = numpy.clip(candidates - rowIndex * n, 0, n - 1)
+    bins = numpy.take_along_axis(tiles, candidates, axis=1) + rowIndex * (int(tiles.max()) + 1)
+    isNewBin = numpy.zeros(k * draws, dtype=bool)
+    isNewBin[numpy.unique(bins.ravel(), return_index=True)[1]] = True
+    required = kldSampleSize(numpy.cumsum(isNewBin.reshape(k, draws), axis=1), epsilon, z)
+    enough = numpy.arange(1, draws + 1) >= required
+    counts = numpy.where(enough.any(axis=1), enough.argmax(axis=1) + 1, draws)
+    return candidates, numpy.clip(counts, minN, maxN)
+
+# Function: Systematic Resample Rows
+# ---------------------
+# Systematic resampling of every row of a (K x N) weight matrix at once.
+# Returns (indices, valid): indices is a (K x N) array of column indices and
+# valid marks the rows that carried any mass (other rows are meaningless).
+def systematicResampleRows(weights):
+    (k, n) = weights.shape
+    cumulative = numpy.cumsum(weights, axis=1, dtype=float)
+    totals = cumulative[:, -1].copy()
+    valid = totals > 0
+    totals[~valid] = 1.0
+    rowIndex = numpy.arange(k)[:, None]
+    # Shifting row r into [r, r + 1] makes the flattened array monotone, so
+    # one searchsorted call serves every row.
+    cumulative = cumulative / totals[:, None] + rowIndex
+    positions = (numpy.random.random((k, 1)) + numpy.arange(n)) / n + rowIndex
+    indices = numpy.searchsorted(cumulative.ravel(), positions.ravel(), side='right').reshape(k, n)
+    indices = numpy.clip(indices - rowIndex * n, 0, n - 1)
+    return indices, valid
+
+# Function: Sparse Histogram
+# ---------------------
+# Returns (tiles, probs): the sorted distinct tile ids of |particles| and
+# their normalized total weight. Costs O(N log N) in the particle count and
+# nothing in the size of the map.
+def sparseHistogram(particles, weights):
+    tiles, inverse = numpy.unique(particles, return_inverse=True)
+    mass = numpy.bincount(inverse.ravel(), weights=weights)
+    total = mass.sum()
+    return tiles, mass / total if total > 0 else mass
+
+def _resample(weights, positions):
+    cumulative = numpy.cumsum(weights, dtype=float)
+    total = cumulative[-1] if len(cumulative) else 0.0
+    if not total > 0:
+        return None
+    indices = numpy.searchsorted(cumulative, positions * total, side='right')
+    return numpy.minimum(indices, len(cumulative) - 1)
+
+# Class: Array Belief
+# ---------------------
+# A persistent, numpy backed drop-in for util.Belief. The probabilities live
+# in one flat array that is updated in place: setSparse only touches the
+# tiles that held mass before and the tiles that hold mass now, so a particle
+# filter pays O(occupied tiles) per update instead of O(rows x cols).
+# getGrid hands out a read-only (numRows x numCols) view without copying.
+class ArrayBelief(object):
+
+    def __init__(self, numRows, numCols, value = None):
+        self.numRows = numRows
+        self.numCols = numCols
+        if value is None:
+            value = 1.0 / (numRows * numCols)
+        self.probs = numpy.full(numRows * numCols, value, dtype=float)
+        self.grid = self.probs.reshape(numRows, numCols)
+        # Tiles that may be non-zero, or None when any tile may be.
+        self.tiles = None
+
+    def getProb(self, row, col):
+        return self.grid[row, col]
+
+    def setProb(self, row, col, p):
+        self.grid[row, col] = p
+        self.tiles = None
+
+    def addProb(self, row, col, delta):
+        self.grid[row, col] += delta
+        assert self.grid[row, col] >= 0.0
+        self.tiles = None
+
+    def getNumRows(self):
+        return self.numRows
+
+    def getNumCols(self):
+        return self.numCols
+
+    def getSum(self):
+        return self.probs.sum()
+
+    def normalize(self):
+        self.probs /= self.probs.sum()
+
+    def setUniform(self):
+        self.probs[:] = 1.0 / len(self.probs)
+        self.tiles = None
+
+    # Function: Get Grid
+    # ---------------------
+    # Returns a read-only (numRows x numCols) view of the probabilities. The
+    # view follows later updates of the belief.
+    def getGrid(self):
+        view = self.grid.view()
+        view.flags.writeable = False
+        return view
+
+    # Function: Set Sparse
+    # ---------------------
+    # Makes |probs| at tile ids |tiles| the whole distribution; every other
+    # tile becomes 0.
+    def setSparse(self, tiles, probs):
+        if self.tiles is None:
+            self.probs[:] = 0
+        else:
+            self.probs[self.tiles] = 0
+        self.probs[tiles] = probs
+        self.tiles = tiles
+
+# Function: Belief Probs
+# ---------------------
+# The probabilities of |belief| as a flat array by tile id: a view of an
+# ArrayBelief, or one conversion of the nested lists of a util.Belief grid.
+# Beliefs without a grid are read through getProb.
+def beliefProbs(belief):
+    grid = getattr(belief, 'grid', None)
+    if grid is None:
+        grid = [[belief.getProb(r, c) for c in range(belief.getNumCols())]
+                for r in range(belief.getNumRows())]
+    return numpy.asarray(grid, dtype=float).reshape(-1)
+
+# Class: Transition Sampler
+# ---------------------
+# The transition model compiled into per-tile alias tables (Walker / Vose),
+# stored CSR style: the table of old tile id t occupies the slots
+# offsets[t]:offsets[t + 1] of newIds / accept / alias. Moving every
+# particle one step is then a single batched O(N) draw. The arrays are never
+# written to, so they may be read-only memory maps (see transitionModel).
+class TransitionSampler(object):
+
+    # Function: Init
+    # ---------------------
+    # Wraps already compiled CSR alias table arrays.
+    def __init__(self, numRows, numCols, offsets, newIds, accept, alias):
+        self.numRows = numRows
+        self.numCols = numCols
+        self.offsets = offsets
+        self.newIds = newIds
+        self.accept = accept
+        self.alias = alias
+        # Tiles with at least one outgoing transition.
+        self.sourceIds = numpy.flatnonzero(numpy.diff(offsets) > 0)
+
+    # Function: Sample
+    # ---------------------
+    # Returns the particles advanced by one step. Particles on tiles without
+    # outgoing transitions are dropped.
+    def sample(self, particles):
+        starts = self.offsets[particles]
+        lengths = self.offsets[particles + 1] - starts
+        keep = lengths > 0
+        starts = starts[keep]
+        lengths = lengths[keep]
+        n = len(starts)
+        slots = starts + numpy.minimum((numpy.random.random(n) * lengths).astype(numpy.int64), lengths - 1)
+        useAlias = numpy.random.random(n) >= self.accept[slots]
+        slots[useAlias] = self.alias[slots[useAlias]]
+        return self.newIds[slots]
+
+    # Function: Advance
+    # ---------------------
+    # Like sample, but keeps the shape of |particles|: returns the advanced
+    # particles together with a mask of the ones that had a transition. The
+    # others are left where they were.
+    def advance(self, particles):
+        alive = self.offsets[particles + 1] > self.offsets[particles]
+        newParticles = particles.copy()
+        newParticles[alive] = self.sample(particles[alive])
+        return newParticles, alive
+
+# Function: Predict Occupancy
+# ---------------------
+# Rolls weighted particles forward |steps| times with |sampler| and returns a
+# (steps + 1 x numTiles) array whose row s is the expected number of tracked
+# cars on every tile s steps from now (row 0 is the present). |particles| and
+# |weights| are (N,) for one car or (K x N) for K cars; each car's weights
+# are renormalized every step so it always contributes a mass of 1. Works on
+# copies, the caller's arrays are left alone.
+def predictOccupancy(sampler, particles, weights, steps, numTiles):
+    numParticles = particles.shape[-1]
+    particles = particles.reshape(-1, numParticles)
+    weights = weights.reshape(-1, numParticles).astype(float)
+    stack = numpy.zeros((steps + 1, numTiles))
+    for step in range(steps + 1):
+        if step > 0:
+            particles, alive = sampler.advance(particles.ravel())
+            particles = particles.reshape(-1, numParticles)
+            weights = weights * alive.reshape(-1, numParticles)
+        totals = weights.sum(axis=1)
+        totals[totals == 0] = 1.0
+        weights = weights / totals[:, None]
+        stack[step] = numpy.bincount(particles.ravel(), weights=weights.ravel(), minlength=numTiles)
+    return stack
+
+# Function: Build Transition Sampler
+# ---------------------
+# Compiles a transProbDict (oldTile -> newTile -> prob) into a
+# TransitionSampler over a (numRows x numCols) grid.
+def buildTransitionSampler(transProbDict, numRows, numCols):
+    numTiles = numRows * numCols
+    rowLengths = numpy.zeros(numTiles, dtype=numpy.int64)
+    rows = dict()
+    for oldTile in transProbDict:
+        newTiles = [t for t in transProbDict[oldTile] if transProbDict[oldTile][t] > 0]
+        if not newTiles: continue
+        oldId = tileId(oldTile, numCols)
+        rows[oldId] = (oldTile, newTiles)
+        rowLengths[oldId] = len(newTiles)
+    offsets = numpy.zeros(numTiles + 1, dtype=numpy.int64)
+    numpy.cumsum(rowLengths, out=offsets[1:])
+    newIds = numpy.zeros(offsets[-1], dtype=numpy.int64)
+    accept = numpy.ones(offsets[-1], dtype=numpy.float64)
+    alias = numpy.zeros(offsets[-1], dtype=numpy.int64)
+    for oldId in rows:
+        (oldTile, newTiles) = rows[oldId]
+        probs = [transProbDict[oldTile][t] for t in newTiles]
+        rowAccept, rowAlias = buildAliasTable(probs)
+        start = offsets[oldId]
+        end = start + len(newTiles)
+        newIds[start:end] = [tileId(t, numCols) for t in newTiles]
+        accept[start:end] = rowAccept
+        alias[start:end] = numpy.asarray(rowAlias) + start
+    return TransitionSampler(numRows, numCols, offsets, newIds, accept, alias)
+
+# Function: Build Alias Table
+# ---------------------
+# Vose's alias method. Given k (unnormalized) probabilities returns
+# (accept, alias) lists so that drawing slot i uniformly and keeping it with
+# probability accept[i], else taking alias[i], samples the distribution.
+def buildAliasTable(probs):
+    k = len(probs)
+    total = float(sum(probs))
+    scaled = [p * k / total for p in probs]
+    accept = [1.0] * k
+    alias = list(range(k))
+    small = [i for i in range(k) if scaled[i] < 1.0]
+    large = [i for i in range(k) if scaled[i] >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        accept[s] = scaled[s]
+        alias[s] = l
+        scaled[l] = scaled[l] + scaled[s] - 1.0
+        if scaled[l] < 1.0:
+            small.append(l)
+        else:
+            large.append(l)
+    return accept, alias
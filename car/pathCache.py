@@ -0,0 +1,102 @@
+'''
+Extended by Peggy Wang @PeggyYuchunWang
+Licensing Information: Please do not distribute or publish solutions to this
+project. You are free to use and extend Driverless Car for educational
+purposes. The Driverless Car project was developed at Stanford, primarily by
+Chris Piech (piech@cs.stanford.edu). It was inspired by the Pacman projects.
+'''
+import collections
+import numpy
+
+
+_cache = None
+
+# Function: Get Path Cache
+# ---------------------
+# Returns the PathCache shared by all drivers of the process.
+def getPathCache():
+    global _cache
+    if _cache is None:
+        _cache = PathCache()
+    return _cache
+
+
+# Class: Path Cache
+# ---------------------
+# Planned paths keyed by (start node, goal, road graph fingerprint), evicted
+# least recently used first once CAPACITY entries are held. Storing a path
+# also stores every suffix of it, so the next node arrivals along the path
+# hit the cache.
+#
+# Each entry remembers the summed risk (belief that another car is there) of
+# the nodes the path drives onto at the time it was planned. A lookup only
+# reuses the path if that sum under the current belief is still within
+# RISK_TOLERANCE of it; otherwise the entry is dropped and the caller plans
+# again.
+class PathCache(object):
+
+    CAPACITY = 1024
+    RISK_TOLERANCE = 0.05
+
+    def __init__(self):
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    # Function: Get
+    # ---------------------
+    # The cached path from |start| to |goal| on the road graph of
+    # |graphIndex| (a graphIndex.GraphIndex) if it is still valid under
+    # |belief|, otherwise None.
+    def get(self, start, goal, graphIndex, belief):
+        key = (start, goal, graphIndex.fingerprint)
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            (path, offset, risk) = entry
+            currentRisk = graphIndex.nodeRisks(belief, path[offset + 1:]).sum()
+            if abs(currentRisk - risk) <= self.RISK_TOLERANCE:
+                self.entries[key] = entry
+                self.hits += 1
+                return path[offset:]
+            self.invalidations += 1
+        self.misses += 1
+        return None
+
+    # Function: Put
+    # ---------------------
+    # Stores |path| (a list of node ids ending at |goal|) and all its
+    # suffixes, along with their summed risk under |belief|.
+    def put(self, goal, path, graphIndex, belief):
+        if len(path) < 2 or path[-1] != goal:
+            return
+        risks = graphIndex.nodeRisks(belief, path[1:])
+        suffixRisks = numpy.cumsum(risks[::-1])[::-1].tolist()
+        for (offset, nodeId) in enumerate(path[:-1]):
+            key = (nodeId, goal, graphIndex.fingerprint)
+            self.entries.pop(key, None)
+            if len(self.entries) >= self.CAPACITY:
+                self.entries.popitem(last=False)
+            self.entries[key] = (path, offset, suffixRisks[offset])
+
+    def clear(self):
+        self.entries.clear()
+
+    # Function: Get Stats
+    # ---------------------
+    # Hit / miss counters, for measuring how many searches the cache saves.
+    # Misses include the lookups that found an invalidated entry.
+    def getStats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hitRate': float(self.hits) / lookups if lookups else 0.0,
+            'size': len(self.entries)
+        }
+
+    def resetStats(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
@@ -0,0 +1,77 @@
+'''
+Extended by Peggy Wang @PeggyYuchunWang
+Licensing Information: Please do not distribute or publish solutions to this
+project. You are free to use and extend Driverless Car for educational
+purposes. The Driverless Car project was developed at Stanford, primarily by
+Chris Piech (piech@cs.stanford.edu). It was inspired by the Pacman projects.
+'''
+from engine.model.observation import SENSOR_TYPES
+import emissionModel
+import numpy
+
+
+_fusions = dict()
+
+# Function: Get Sensor Fusion
+# ---------------------
+# Returns the SensorFusion shared by every filter on a (numRows x numCols)
+# grid.
+def getSensorFusion(numRows, numCols):
+    if (numRows, numCols) not in _fusions:
+        _fusions[(numRows, numCols)] = SensorFusion(numRows, numCols)
+    return _fusions[(numRows, numCols)]
+
+
+# Class: Sensor Fusion
+# ---------------------
+# Turns a batch of heterogeneous distance readings (a READING_DTYPE array,
+# see engine.model.observation) into one log-likelihood per particle. Each
+# sensor type has its own EmissionModel built from its noise STD; the
+# readings of one type are evaluated together, so the cost is linear in the
+# number of readings times the number of particles and there is one Python
+# level step per sensor type, not per reading. Readings are assumed
+# conditionally independent given the car's tile, so their log-likelihoods
+# add up.
+class SensorFusion(object):
+
+    def __init__(self, numRows, numCols):
+        self.models = [emissionModel.getEmissionModel(numRows, numCols, sensor.STD)
+                       for sensor in SENSOR_TYPES]
+        self.tiles = numpy.arange(numRows * numCols)
+
+    # Function: Log Likelihood
+    # ---------------------
+    # Summed log-likelihood of |readings| for every particle in |particles|,
+    # a 1-D array of tile ids. The readings' target field is ignored.
+    def logLikelihood(self, particles, readings):
+        total = numpy.zeros(len(particles))
+        for (sensor, rows) in self.bySensor(readings):
+            total += self.readingLogLikelihoods(sensor, particles[None, :], rows).sum(axis=0)
+        return total
+
+    # Function: Batch Log Likelihood
+    # ---------------------
+    # Summed log-likelihood for a (K x N) particle matrix where every reading
+    # applies to row readings['target'] only. Returns a (K x N) matrix. When
+    # the rows are wider than the grid has tiles, every reading is scored
+    # once per tile instead and the particles look their tile up.
+    def batchLogLikelihood(self, particles, readings):
+        if particles.shape[1] > len(self.tiles):
+            table = numpy.zeros((len(particles), len(self.tiles)))
+            for (sensor, rows) in self.bySensor(readings):
+                numpy.add.at(table, rows['target'], self.readingLogLikelihoods(sensor, self.tiles[None, :], rows))
+            return table[numpy.arange(len(particles))[:, None], particles]
+        total = numpy.zeros(particles.shape)
+        for (sensor, rows) in self.bySensor(readings):
+            targets = rows['target']
+            numpy.add.at(total, targets, self.readingLogLikelihoods(sensor, particles[targets], rows))
+        return total
+
+    def bySensor(self, readings):
+        for sensor in numpy.unique(readings['sensor']):
+            yield sensor, readings[readings['sensor'] == sensor]
+
+    def readingLogLikelihoods(self, sensor, particles, rows):
+        model = self.models[sensor]
+        d = model.distances(particles, rows['agentX'][:, None], rows['agentY'][:, None])
+        return model.logLikelihood(d, rows['dist'][:, None])
@@ -0,0 +1,61 @@
+'''
+Shared setup of the planner tests: a small grid road network with some
+roads missing or one way and the first node a dead end, a driver heading
+for the far corner, and the path checks every planner is held to.
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.fixtures import GridGraph
+import autoDriverAStar
+import graphIndex
+import particleEngine
+import random, unittest
+
+INF = float('inf')
+NUM_ROWS = 8
+NUM_COLS = 10
+
+# A belief with |numCars| tiles that hold another car and no belief anywhere
+# else, so that every risk is far from the D* Lite RISK_TOLERANCE.
+def carBelief(rng, numCars):
+    belief = particleEngine.ArrayBelief(NUM_ROWS, NUM_COLS, 0.0)
+    for tile in rng.sample(range(NUM_ROWS * NUM_COLS), numCars):
+        belief.probs[tile] = rng.uniform(0.3, 1.0)
+    return belief
+
+def emptyBelief():
+    return particleEngine.ArrayBelief(NUM_ROWS, NUM_COLS, 0.0)
+
+
+class PlannerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = GridGraph(NUM_ROWS, NUM_COLS, dropRate=0.15, seed=1)
+        self.graph.nextIds[0] = []
+        self.index = graphIndex.getGraphIndex(self.graph)
+        self.goal = self.graph.terminal
+        self.driver = autoDriverAStar.AutoDriver()
+        self.driver.terminalState = self.goal
+        self.rng = random.Random(2)
+        self.field = self.index.goalDistanceField(self.goal)
+
+    def reachable(self, nodeId):
+        return self.field[self.index.index[nodeId]] < INF
+
+    # The risk-weighted cost of |path|, which must follow the roads.
+    def pathCost(self, path, belief):
+        risks = self.driver.getNodeRisks(belief, self.graph)
+        for (fromId, toId) in zip(path, path[1:]):
+            self.assertIn(toId, self.graph.getNextNodeIds(fromId))
+        return sum(self.driver.edgeCost(risks, self.graph, fromId, toId)
+                   for (fromId, toId) in zip(path, path[1:]))
+
+    # The cost of the AutoDriver.aStar path from |start|, INF if it found none.
+    def aStarCost(self, start, belief):
+        self.driver.nodeId = start
+        path = self.driver.aStar(self.graph, belief)
+        self.assertEqual(path[0], start)
+        if start != self.goal and len(path) == 1:
+            return INF
+        return self.pathCost(path, belief)
@@ -0,0 +1,78 @@
+'''
+Tests of the anytime planner (ARA*): every published path is within its
+bound of the optimum, work left when the budget runs out is resumed by the
+next improve call, and run down to epsilon 1 it finds what aStar finds.
+
+Usage (from the car directory):
+  python -m unittest discover tests
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from plannerTestCase import INF, PlannerTestCase, carBelief
+from anytimePlanner import AnytimePlanner
+import autoDriverAStar
+import unittest
+
+
+class AnytimePlannerTest(PlannerTestCase):
+
+    def setUp(self):
+        PlannerTestCase.setUp(self)
+        self.planner = AnytimePlanner(self.index, self.driver.RISK_WEIGHT)
+        self.others = [n for n in self.index.nodeIds if n != self.goal]
+
+    def testMatchesAStarAtEpsilonOne(self):
+        starts = [self.rng.choice(self.others) for k in range(30)] + [0]
+        for start in starts:
+            belief = carBelief(self.rng, 6)
+            self.planner.start(start, self.goal, self.driver.getNodeRisks(belief, self.graph))
+            path = self.planner.improve()
+            self.assertTrue(self.planner.isDone())
+            if not self.reachable(start):
+                self.assertEqual(path, None)
+                continue
+            self.assertEqual(self.planner.getBound(), 1.0)
+            self.assertEqual((path[0], path[-1]), (start, self.goal))
+            self.assertAlmostEqual(self.pathCost(path, belief), self.aStarCost(start, belief))
+
+    def testFirstPathIsWithinBound(self):
+        starts = [n for n in self.others if self.reachable(n)]
+        for k in range(20):
+            start = self.rng.choice(starts)
+            belief = carBelief(self.rng, 6)
+            self.planner.start(start, self.goal, self.driver.getNodeRisks(belief, self.graph))
+            # One weighted A* pass at INITIAL_EPSILON.
+            self.assertTrue(self.planner.improvePath(INF))
+            self.planner.publish()
+            bound = self.planner.getBound()
+            self.assertTrue(1.0 <= bound <= AnytimePlanner.INITIAL_EPSILON)
+            optimal = self.aStarCost(start, belief)
+            firstCost = self.pathCost(self.planner.bestPath, belief)
+            self.assertTrue(firstCost <= bound * optimal + 1e-6)
+            self.assertTrue(self.pathCost(self.planner.improve(), belief) <= firstCost + 1e-6)
+
+    def testWorkIsResumed(self):
+        start = [n for n in self.others if self.reachable(n)][0]
+        belief = carBelief(self.rng, 6)
+        self.planner.start(start, self.goal, self.driver.getNodeRisks(belief, self.graph))
+        self.assertEqual(self.planner.improve(0.0), None)
+        self.assertFalse(self.planner.isDone())
+        path = self.planner.improve()
+        self.assertTrue(self.planner.isDone())
+        self.assertAlmostEqual(self.pathCost(path, belief), self.aStarCost(start, belief))
+
+    def testDriverReportsPlanningStats(self):
+        class Driver(autoDriverAStar.AutoDriver):
+            PLANNING_BUDGET = 10.0
+        driver = Driver()
+        driver.terminalState = self.goal
+        self.assertEqual(driver.getPlanningStats(), None)
+        driver.nodeId = [n for n in self.others if self.reachable(n)][0]
+        driver.choseNextId(self.graph, carBelief(self.rng, 6))
+        (bound, seconds) = driver.getPlanningStats()
+        self.assertEqual(bound, 1.0)
+        self.assertTrue(0.0 <= seconds < Driver.PLANNING_BUDGET)
+
+if __name__ == '__main__':
+    unittest.main()
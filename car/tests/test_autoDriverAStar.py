@@ -0,0 +1,125 @@
+'''
+Tests of AutoDriver.aStar: it finds a path exactly from the nodes that can
+reach the terminal, and its paths cost what a plain Dijkstra search over
+the risk-weighted roads finds. Also tests of the space-time planner, which
+may wait for a predicted car to pass and stops at its deadline.
+
+Usage (from the car directory):
+  python -m unittest discover tests
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from plannerTestCase import INF, PlannerTestCase, carBelief, emptyBelief
+from benchmarks.fixtures import GridGraph
+import autoDriverAStar
+import particleEngine
+import heapq, unittest
+import numpy
+
+
+class AStarTest(PlannerTestCase):
+
+    # Cheapest risk-weighted cost from |start| to the goal, by Dijkstra.
+    def dijkstraCost(self, start, belief):
+        risks = self.driver.getNodeRisks(belief, self.graph)
+        costs = {start: 0.0}
+        pq = [(0.0, start)]
+        while pq:
+            (cost, nodeId) = heapq.heappop(pq)
+            if nodeId == self.goal:
+                return cost
+            if cost > costs[nodeId]:
+                continue
+            for nextId in self.graph.getNextNodeIds(nodeId):
+                nextCost = cost + self.driver.edgeCost(risks, self.graph, nodeId, nextId)
+                if nextCost < costs.get(nextId, INF):
+                    costs[nextId] = nextCost
+                    heapq.heappush(pq, (nextCost, nextId))
+        return INF
+
+    def testReachability(self):
+        for start in self.index.nodeIds:
+            self.assertEqual(self.aStarCost(start, emptyBelief()) < INF, self.reachable(start))
+
+    def testMatchesDijkstra(self):
+        for k in range(30):
+            start = self.rng.choice(self.index.nodeIds)
+            belief = carBelief(self.rng, 6)
+            self.assertAlmostEqual(self.aStarCost(start, belief), self.dijkstraCost(start, belief))
+
+    def testStartAtGoal(self):
+        self.driver.nodeId = self.goal
+        self.assertEqual(self.driver.aStar(self.graph, emptyBelief()), [self.goal])
+
+
+# A predictor that always returns the same (steps + 1 x tiles) occupancy.
+class FixedOccupancy(object):
+
+    def __init__(self, occupancy):
+        self.occupancy = occupancy
+
+    def predictOccupancy(self, steps):
+        return self.occupancy[:steps + 1]
+
+
+class SpaceTimeAStarTest(PlannerTestCase):
+
+    def setUp(self):
+        PlannerTestCase.setUp(self)
+        self.driver.INCREMENTAL = False
+        self.driver.PATH_CACHE = False
+
+    def occupancy(self, numTiles):
+        return numpy.zeros((self.driver.PREDICTION_STEPS + 1, numTiles))
+
+    # Follows the roads, or stays on a node for a tick.
+    def assertMoves(self, path, graph):
+        for (fromId, toId) in zip(path, path[1:]):
+            self.assertTrue(toId == fromId or toId in graph.getNextNodeIds(fromId))
+
+    def testMatchesAStarWithoutTraffic(self):
+        occupancy = self.occupancy(len(emptyBelief().probs))
+        self.driver.setOccupancyPredictor(FixedOccupancy(occupancy))
+        for start in [n for n in self.index.nodeIds if self.reachable(n)][:20]:
+            self.driver.nodeId = start
+            path = self.driver.spaceTimeAStar(self.graph, emptyBelief())
+            self.assertEqual((path[0], path[-1]), (start, self.goal))
+            self.assertAlmostEqual(self.pathCost(path, emptyBelief()), self.aStarCost(start, emptyBelief()))
+
+    def testWaitsForPassingCar(self):
+        # A one lane road 0 -> 5: a car is predicted on node 1 for ten ticks.
+        graph = GridGraph(1, 6)
+        belief = particleEngine.ArrayBelief(1, 6, 0.0)
+        occupancy = self.occupancy(6)
+        occupancy[:10, 1] = 1.0
+        self.driver.terminalState = graph.terminal
+        self.driver.setOccupancyPredictor(FixedOccupancy(occupancy))
+        self.driver.nodeId = 0
+        path = self.driver.spaceTimeAStar(graph, belief)
+        self.assertMoves(path, graph)
+        self.assertEqual((path[:2], path[-1]), ([0, 0], graph.terminal))
+        self.driver.choseNextId(graph, belief)
+        self.assertEqual((self.driver.nextId, self.driver.waiting), (0, True))
+        # Once the car is gone, drive on.
+        self.driver.setOccupancyPredictor(FixedOccupancy(self.occupancy(6)))
+        self.driver.choseNextId(graph, belief)
+        self.assertEqual((self.driver.nextId, self.driver.waiting), (1, False))
+
+    def testStopsAtDeadline(self):
+        class Driver(autoDriverAStar.AutoDriver):
+            PLANNING_BUDGET = 0.0
+            DEADLINE_CHECK = 5
+        driver = Driver()
+        driver.terminalState = self.goal
+        driver.nodeId = 11
+        driver.setOccupancyPredictor(FixedOccupancy(self.occupancy(len(emptyBelief().probs))))
+        path = driver.spaceTimeAStar(self.graph, emptyBelief())
+        self.assertMoves(path, self.graph)
+        self.assertEqual(path[0], 11)
+        self.assertTrue(1 < len(path) <= 5)
+        self.assertNotEqual(path[-1], self.goal)
+        self.assertTrue(self.index.goalDistance(path[-1], self.goal) < self.index.goalDistance(11, self.goal))
+
+if __name__ == '__main__':
+    unittest.main()
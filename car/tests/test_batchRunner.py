@@ -0,0 +1,65 @@
+'''
+Tests of the batch runner's results file: rows go to one shard per
+SAVE_INTERVAL while the batch runs and can be read back before it ends,
+close merges the shards into the results file in the order the rows were
+written, and a new batch starts from an empty file.
+
+Usage (from the car directory):
+  python -m unittest discover tests
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import batchRunner
+import shutil, tempfile, unittest
+
+
+class Writer(batchRunner.ResultsWriter):
+    SAVE_INTERVAL = 3
+
+def makeRow(seed):
+    row = dict((name, 0) for (name, dtype) in batchRunner.COLUMNS)
+    row.update({'layout': 'small', 'inference': 'none', 'driver': 'autoDriverAStar',
+                'seed': seed, 'reachedGoal': seed % 2 == 0, 'pathCacheHitRate': seed / 10.0})
+    return row
+
+
+class ResultsWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'results.npz')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testShardsAreMergedOnClose(self):
+        writer = Writer(self.path)
+        for seed in range(7):
+            writer.write(makeRow(seed))
+        self.assertEqual(len(batchRunner.shardPaths(self.path)), 2)
+        self.assertEqual(batchRunner.loadResults(self.path)['seed'].tolist(), list(range(6)))
+        writer.close()
+        self.assertEqual(writer.numRows, 7)
+        self.assertEqual(os.listdir(self.directory), ['results.npz'])
+        results = batchRunner.loadResults(self.path)
+        self.assertEqual(sorted(results), sorted(name for (name, dtype) in batchRunner.COLUMNS))
+        self.assertEqual(results['seed'].tolist(), list(range(7)))
+        self.assertEqual(results['reachedGoal'].tolist(), [seed % 2 == 0 for seed in range(7)])
+        self.assertEqual(results['driver'].tolist(), ['autoDriverAStar'] * 7)
+        self.assertAlmostEqual(results['pathCacheHitRate'][6], 0.6)
+
+    def testNewBatchStartsEmpty(self):
+        writer = Writer(self.path)
+        for seed in range(4):
+            writer.write(makeRow(seed))
+        writer.close()
+        writer = Writer(self.path)
+        self.assertFalse(os.path.exists(self.path))
+        writer.close()
+        results = batchRunner.loadResults(self.path)
+        self.assertEqual(len(results), len(batchRunner.COLUMNS))
+        self.assertEqual(len(results['seed']), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+'''
+Tests of the car collision code on the fleet arrays: the batched
+separating axis test against a plain loop over the four axes, and
+Car.collidingPairs and Car.collidesAny against Car.collides on every pair.
+
+Usage (from the car directory):
+  python -m unittest discover tests
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.fixtures import DIR_NAMES
+from engine.model.car.car import Car
+from engine.model import collision
+from engine.vector import Vec2d
+import math, random, unittest
+import numpy
+
+# Separating axis test of two (4, 2) corner arrays, one axis at a time.
+def referenceCollides(boundsA, boundsB):
+    for bounds in [boundsA, boundsB]:
+        edge = bounds[0] - bounds[1]
+        for axis in [edge, numpy.array([-edge[1], edge[0]])]:
+            projA = [float(numpy.dot(axis, p)) for p in boundsA]
+            projB = [float(numpy.dot(axis, p)) for p in boundsB]
+            if max(projA) < min(projB) or max(projB) < min(projA):
+                return False
+    return True
+
+def randomCar(rng, side):
+    car = Car(Vec2d(rng.uniform(0, side), rng.uniform(0, side)), rng.choice(DIR_NAMES), Vec2d(0, 0))
+    angle = rng.uniform(0, 2 * math.pi)
+    car.dir = Vec2d(math.cos(angle), math.sin(angle))
+    return car
+
+
+class CollisionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(0)
+
+    def testSatMatchesReference(self):
+        n = 500
+        centres = numpy.array([[self.rng.uniform(0, 60), self.rng.uniform(0, 60)] for i in range(2 * n)])
+        angles = numpy.array([self.rng.uniform(0, 2 * math.pi) for i in range(2 * n)])
+        bounds = collision.carBounds(centres[:, 0], centres[:, 1], numpy.cos(angles), numpy.sin(angles),
+                                     Car.LENGTH, Car.WIDTH)
+        result = collision.satCollides(bounds[:n], bounds[n:])
+        expected = [referenceCollides(bounds[k], bounds[n + k]) for k in range(n)]
+        self.assertEqual(result.tolist(), expected)
+        self.assertTrue(0 < sum(expected) < n)
+
+    def testAxisAlignedCases(self):
+        car = Car(Vec2d(100, 100), 'east', Vec2d(0, 0))
+        near = Car(Vec2d(100, 100 + Car.WIDTH - 1), 'east', Vec2d(0, 0))
+        apart = Car(Vec2d(100, 100 + Car.WIDTH + 1), 'east', Vec2d(0, 0))
+        self.assertTrue(car.collides(near.pos, near.getBoundsArray()))
+        self.assertFalse(car.collides(apart.pos, apart.getBoundsArray()))
+        self.assertTrue(car.collides(near.pos, near.getBounds()))
+
+    def testCollidingPairsMatchesCollides(self):
+        cars = [randomCar(self.rng, 200) for i in range(60)]
+        pairs = set((cars.index(a), cars.index(b)) for (a, b) in Car.collidingPairs(cars))
+        expected = set()
+        for i in range(len(cars)):
+            for j in range(i + 1, len(cars)):
+                if cars[i].collides(cars[j].pos, cars[j].getBoundsArray()):
+                    expected.add((i, j))
+        self.assertEqual(pairs, expected)
+        self.assertTrue(expected)
+
+    def testCollidesAnyMatchesCollides(self):
+        cars = [randomCar(self.rng, 200) for i in range(60)]
+        hits = 0
+        for other in cars:
+            group = self.rng.sample(cars, 5)
+            expected = any(car.collides(other.pos, other.getBoundsArray()) for car in group)
+            self.assertEqual(Car.collidesAny(group, other.pos, other.getBoundsArray()), expected)
+            self.assertEqual(Car.collidesAny(group, other.pos, other.getBounds()), expected)
+            hits += expected
+        self.assertTrue(0 < hits < len(cars))
+        self.assertFalse(Car.collidesAny([], cars[0].pos, cars[0].getBoundsArray()))
+
+if __name__ == '__main__':
+    unittest.main()
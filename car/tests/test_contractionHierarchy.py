@@ -0,0 +1,61 @@
+'''
+Tests of the contraction hierarchy: on a small road graph its queries find
+paths of the same cost as AutoDriver.aStar, start from the cheapest of
+several sources, and survive a save / load round trip, while a hierarchy
+saved for another road graph is not loaded.
+
+Usage (from the car directory):
+  python -m unittest discover tests
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from plannerTestCase import INF, PlannerTestCase, emptyBelief
+from benchmarks.fixtures import GridGraph
+from contractionHierarchy import ContractionHierarchy
+import graphIndex
+import shutil, tempfile, unittest
+
+
+class ContractionHierarchyTest(PlannerTestCase):
+
+    def setUp(self):
+        PlannerTestCase.setUp(self)
+        self.hierarchy = ContractionHierarchy.build(self.index)
+
+    def testMatchesAStar(self):
+        belief = emptyBelief()
+        for start in self.index.nodeIds:
+            (cost, path) = self.hierarchy.query({start: 0.0}, self.goal)
+            if not self.reachable(start):
+                self.assertEqual((cost, path), (INF, None))
+                continue
+            self.assertEqual((path[0], path[-1]), (start, self.goal))
+            self.assertAlmostEqual(cost, self.aStarCost(start, belief))
+            self.assertAlmostEqual(self.pathCost(path, belief), cost)
+
+    def testCheapestSourceWins(self):
+        starts = [n for n in self.index.nodeIds if self.reachable(n) and n != self.goal]
+        for k in range(20):
+            sources = dict((n, self.rng.uniform(0.0, 100.0)) for n in self.rng.sample(starts, 3))
+            (cost, path) = self.hierarchy.query(sources, self.goal)
+            self.assertIn(path[0], sources)
+            self.assertAlmostEqual(cost, min(self.hierarchy.query({n: 0.0}, self.goal)[0] + spent
+                                             for (n, spent) in sources.items()))
+
+    def testSaveAndLoad(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'hierarchy.npz')
+            self.hierarchy.save(path)
+            loaded = ContractionHierarchy.load(self.index, path)
+            for start in self.index.nodeIds:
+                self.assertEqual(loaded.query({start: 0.0}, self.goal),
+                                 self.hierarchy.query({start: 0.0}, self.goal))
+            other = graphIndex.getGraphIndex(GridGraph(8, 10, dropRate=0.15, seed=5))
+            self.assertEqual(ContractionHierarchy.load(other, path), None)
+        finally:
+            shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    unittest.main()
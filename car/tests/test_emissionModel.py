@@ -0,0 +1,74 @@
+'''
+Tests of the emission lookup tables: the quantized log likelihood stays
+within the table's resolution of the exact Gaussian, residuals past the
+table read its last entry, and the cached distance fields give the same
+distances as the direct computation.
+
+Usage (from the car directory):
+  python -m unittest discover tests
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import emissionModel
+import particleEngine
+import unittest
+import numpy
+
+NUM_ROWS = 6
+NUM_COLS = 8
+STD = 10.0
+
+
+class EmissionTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = emissionModel.EmissionModel(NUM_ROWS, NUM_COLS, STD)
+
+    def testMatchesGaussian(self):
+        distances = numpy.linspace(0.0, 300.0, 1001)
+        observed = 117.3
+        exact = particleEngine.gaussianLogPdf(observed, STD, distances)
+        # Rounding the residual to the nearest step moves u by at most
+        # h = step / (2 * std), so -u^2 / 2 moves by at most |u| * h + h^2 / 2.
+        h = 0.5 / emissionModel.EmissionModel.RESOLUTION
+        bound = numpy.abs(distances - observed) / STD * h + 0.5 * h * h + 1e-12
+        self.assertTrue((numpy.abs(self.model.logLikelihood(distances, observed) - exact) <= bound).all())
+
+    def testFarResidualsReadLastEntry(self):
+        far = STD * (emissionModel.EmissionModel.TABLE_SIGMAS + 5)
+        logLikelihoods = self.model.logLikelihood(numpy.array([far, 10 * far]), 0.0)
+        self.assertTrue(numpy.isfinite(logLikelihoods).all())
+        self.assertEqual(logLikelihoods.tolist(), [self.model.logTable[-1]] * 2)
+
+    def testModelsAreShared(self):
+        model = emissionModel.getEmissionModel(NUM_ROWS, NUM_COLS, STD)
+        self.assertTrue(emissionModel.getEmissionModel(NUM_ROWS, NUM_COLS, STD) is model)
+        self.assertFalse(emissionModel.getEmissionModel(NUM_ROWS, NUM_COLS, 2 * STD) is model)
+
+
+class DistanceFieldTest(unittest.TestCase):
+
+    class Model(emissionModel.EmissionModel):
+        USE_DISTANCE_FIELDS = True
+        MAX_DISTANCE_FIELDS = 3
+
+    def testMatchesDirectDistances(self):
+        model = self.Model(NUM_ROWS, NUM_COLS, STD)
+        direct = emissionModel.EmissionModel(NUM_ROWS, NUM_COLS, STD)
+        tiles = numpy.arange(NUM_ROWS * NUM_COLS)
+        for (agentX, agentY) in [(0.0, 0.0), (31.0, 57.0), (31.0, 57.0), (200.0, 12.0)]:
+            self.assertTrue(numpy.allclose(model.distances(tiles, agentX, agentY),
+                                           direct.distances(tiles, agentX, agentY)))
+        # Per-particle agent positions skip the fields.
+        agentXs = numpy.array([[0.0], [31.0]])
+        self.assertEqual(model.distances(tiles[None, :], agentXs, 5.0).shape, (2, len(tiles)))
+
+    def testLeastRecentlyUsedFieldIsDropped(self):
+        model = self.Model(NUM_ROWS, NUM_COLS, STD)
+        for (agentX, agentY) in [(0.0, 0.0), (1.0, 0.0), (2.0, 0.0), (0.0, 0.0), (3.0, 0.0)]:
+            model.distances(numpy.arange(3), agentX, agentY)
+        self.assertEqual(list(model.distanceFields), [(2, 0), (0, 0), (3, 0)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+'''
+Tests of the fleet physics: Fleet.step against Car.update, the fleet
+backed pos / velocity / dir vectors, the slots every car takes and gives
+back when it is collected, and the cached corners, which follow every move
+and are read only.
+
+Usage (from the car directory):
+  python -m unittest discover tests
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.fixtures import DIR_NAMES
+from engine.model.car.car import Car
+from engine.model import collision
+from engine.model.fleet import Fleet
+from engine.vector import Vec2d
+import gc, math, random, unittest
+import numpy
+
+def randomCar(rng, side):
+    car = Car(Vec2d(rng.uniform(0, side), rng.uniform(0, side)), rng.choice(DIR_NAMES), Vec2d(0, 0))
+    angle = rng.uniform(0, 2 * math.pi)
+    car.dir = Vec2d(math.cos(angle), math.sin(angle))
+    return car
+
+# The corners of |car| computed from scratch.
+def freshBounds(car):
+    return collision.carBounds([car.pos.x], [car.pos.y], [car.dir.x], [car.dir.y], Car.LENGTH, Car.WIDTH)[0]
+
+
+class FleetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(1)
+
+    def assertVectorsEqual(self, a, b):
+        self.assertAlmostEqual(a.x, b.x, places=9)
+        self.assertAlmostEqual(a.y, b.y, places=9)
+
+    def testStepMatchesUpdate(self):
+        cars = [randomCar(self.rng, 500) for i in range(20)]
+        twins = [Car(Vec2d(car.pos.x, car.pos.y), 'east', Vec2d(0, 0)) for car in cars]
+        for (car, twin) in zip(cars, twins):
+            twin.dir = car.dir
+        for tick in range(30):
+            for (car, twin) in zip(cars, twins):
+                angle = self.rng.uniform(-Car.MAX_WHEEL_ANGLE, Car.MAX_WHEEL_ANGLE) / 10.0
+                amount = self.rng.uniform(0, Car.MAX_ACCELERATION)
+                for c in [car, twin]:
+                    c.setWheelAngle(angle)
+                    c.accelerate(amount)
+            for car in cars:
+                car.update()
+            Car.updateAll(twins)
+            for (car, twin) in zip(cars, twins):
+                self.assertVectorsEqual(car.pos, twin.pos)
+                self.assertVectorsEqual(car.velocity, twin.velocity)
+                self.assertVectorsEqual(car.dir, twin.dir)
+                self.assertAlmostEqual(car.wheelAngle, twin.wheelAngle, places=9)
+
+    def testStepOnlyMovesItsSlots(self):
+        cars = [Car(Vec2d(10 * i, 0), 'east', Vec2d(5, 0)) for i in range(3)]
+        Car.updateAll(cars[:2])
+        self.assertEqual([car.pos.x for car in cars], [5.0, 15.0, 20.0])
+
+    def testVectorsAreViews(self):
+        car = Car(Vec2d(10, 20), 'east', Vec2d(3, 0))
+        pos = car.pos
+        before = car.getBoundsArray().copy()
+        car.pos += Vec2d(1, 2)
+        self.assertEqual((pos.x, pos.y), (11.0, 22.0))
+        self.assertTrue(numpy.allclose(car.getBoundsArray(), before + (1, 2)))
+        car.velocity.rotate(90)
+        self.assertAlmostEqual(car.velocity.x, 0.0)
+        self.assertAlmostEqual(car.velocity.y, 3.0)
+        assigned = Vec2d(5, 5)
+        car.pos = assigned
+        assigned.x = 7
+        self.assertEqual(car.pos.x, 5.0)
+
+    def testEveryCarHasItsOwnSlot(self):
+        class Parked(Car):
+            def __init__(self):
+                pass
+        cars = [Parked(), Car(Vec2d(0, 0), 'north', Vec2d(0, 0)), Parked()]
+        slots = [(id(car.fleet), car.slot) for car in cars]
+        self.assertEqual(len(set(slots)), len(cars))
+        self.assertTrue(all(car.fleet is Car.FLEET for car in cars))
+
+    def testCollectedCarsFreeTheirSlots(self):
+        class FleetCar(Car):
+            FLEET = Fleet(capacity=2)
+        fleet = FleetCar.FLEET
+        cars = [FleetCar(Vec2d(i, 0), 'east', Vec2d(1, 0)) for i in range(3)]
+        self.assertEqual((len(fleet), fleet.capacity), (3, 4))
+        slot = cars[1].slot
+        del cars[1]
+        gc.collect()
+        self.assertEqual(len(fleet), 2)
+        self.assertEqual(fleet.velocity[slot].tolist(), [0.0, 0.0])
+        self.assertEqual(FleetCar(Vec2d(0, 0), 'east', Vec2d(0, 0)).slot, slot)
+
+
+class BoundsCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(2)
+
+    def testBoundsFollowEveryMove(self):
+        cars = [randomCar(self.rng, 500) for i in range(10)]
+        for car in cars:
+            car.getBoundsArray()
+        cars[0].pos = Vec2d(1, 2)
+        cars[1].pos += Vec2d(3, 4)
+        cars[2].dir = Vec2d(0, 1)
+        cars[3].dir.rotate(30)
+        for car in cars[4:]:
+            car.velocity = Vec2d(2, 1)
+            car.setWheelAngle(10)
+        Car.updateAll(cars[4:])
+        for car in cars:
+            self.assertTrue(numpy.allclose(car.getBoundsArray(), freshBounds(car)))
+        slots = numpy.array([car.slot for car in cars])
+        batch = Car.FLEET.getBoundsBatch(slots, Car.LENGTH, Car.WIDTH)
+        self.assertTrue(numpy.allclose(batch, [freshBounds(car) for car in cars]))
+
+    def testUnmovedBoundsAreKept(self):
+        (car, other) = [randomCar(self.rng, 500) for i in range(2)]
+        car.getBoundsArray()
+        other.pos += Vec2d(1, 0)
+        self.assertFalse(Car.FLEET.boundsValid[other.slot])
+        other.getBoundsArray()
+        self.assertTrue(Car.FLEET.boundsValid[car.slot] and Car.FLEET.boundsValid[other.slot])
+
+    def testBoundsAreReadOnly(self):
+        car = Car(Vec2d(10, 20), 'east', Vec2d(0, 0))
+        bounds = car.getBoundsArray()
+        self.assertRaises(ValueError, bounds.__setitem__, (0, 0), 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+'''
+Tests of D* Lite (incrementalPlanner): its repaired paths cost what a fresh
+AutoDriver.aStar search finds, and it only repairs the tiles whose belief
+moved past RISK_TOLERANCE.
+
+Usage (from the car directory):
+  python -m unittest discover tests
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from plannerTestCase import NUM_ROWS, NUM_COLS, PlannerTestCase, carBelief
+from incrementalPlanner import DStarLite
+import particleEngine
+import unittest
+import numpy
+
+
+class IncrementalPlannerTest(PlannerTestCase):
+
+    def setUp(self):
+        PlannerTestCase.setUp(self)
+        self.planner = DStarLite(self.index, self.goal, self.driver.RISK_WEIGHT, NUM_ROWS, NUM_COLS)
+
+    def testMatchesAStar(self):
+        starts = [self.rng.choice(self.index.nodeIds) for k in range(30)] + [0]
+        for start in starts:
+            belief = carBelief(self.rng, 6)
+            path = self.planner.plan(start, particleEngine.beliefProbs(belief))
+            self.assertEqual(path[0], start)
+            if not self.reachable(start):
+                self.assertEqual(path, [start])
+                continue
+            self.assertEqual(path[-1], self.goal)
+            self.assertAlmostEqual(self.pathCost(path, belief), self.aStarCost(start, belief))
+
+    def testOnlyChangedTilesAreRepaired(self):
+        tileRisks = numpy.zeros(NUM_ROWS * NUM_COLS)
+        self.planner.plan(5, tileRisks)
+        tileRisks[12] = DStarLite.RISK_TOLERANCE / 2
+        self.assertEqual(self.planner.updateRisks(tileRisks), 0)
+        tileRisks[12] = 0.5
+        tileRisks[40] = 0.5
+        self.assertEqual(self.planner.updateRisks(tileRisks), 2)
+        self.assertEqual(self.planner.updateRisks(tileRisks), 0)
+
+    def testUnchangedBeliefNeedsNoSearch(self):
+        tileRisks = particleEngine.beliefProbs(carBelief(self.rng, 6))
+        path = self.planner.plan(5, tileRisks)
+        counter = self.planner.counter
+        self.assertEqual(self.planner.plan(5, tileRisks), path)
+        self.assertEqual(self.planner.counter, counter)
+
+if __name__ == '__main__':
+    unittest.main()
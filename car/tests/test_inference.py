@@ -0,0 +1,212 @@
+'''
+Tests of ParticleFilter's log-domain weights and of the MultiTargetTracker:
+its beliefs stay normalized, a TrackedCar only touches its own car, and a
+tracked car goes through observe / elapseTime exactly like a ParticleFilter
+seeded the same way.
+
+Usage (from the car directory):
+  python -m unittest discover tests
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.fixtures import makeTransProb
+from engine.const import Const
+from inference import ParticleFilter, MultiTargetTracker
+import particleEngine
+import transitionModel
+import random, shutil, tempfile, unittest
+import numpy
+
+NUM_ROWS = 6
+NUM_COLS = 8
+
+# Installs the synthetic transition model as the current layout's, in a
+# temporary learned directory.
+class InferenceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.learnedDir = transitionModel.LEARNED_DIR
+        self.layout = getattr(Const, 'LAYOUT', None)
+        transitionModel.LEARNED_DIR = tempfile.mkdtemp()
+        Const.LAYOUT = 'testInference'
+        transitionModel.installModel(Const.LAYOUT, NUM_ROWS, NUM_COLS, makeTransProb(NUM_ROWS, NUM_COLS, 1))
+        self.agentX = NUM_COLS * Const.BELIEF_TILE_SIZE / 2.0
+        self.agentY = NUM_ROWS * Const.BELIEF_TILE_SIZE / 2.0
+
+    def tearDown(self):
+        shutil.rmtree(transitionModel.LEARNED_DIR)
+        transitionModel.LEARNED_DIR = self.learnedDir
+        Const.LAYOUT = self.layout
+
+    def assertNormalized(self, belief):
+        probs = particleEngine.beliefProbs(belief)
+        self.assertTrue(numpy.isfinite(probs).all())
+        self.assertTrue((probs >= 0).all())
+        self.assertAlmostEqual(probs.sum(), 1.0)
+
+
+class TrackerTest(InferenceTestCase):
+
+    NUM_CARS = 4
+
+    def setUp(self):
+        InferenceTestCase.setUp(self)
+        self.tracker = MultiTargetTracker(NUM_ROWS, NUM_COLS)
+        self.cars = [self.tracker.addTarget() for i in range(self.NUM_CARS)]
+
+    def testBeliefsSumToOne(self):
+        for tick in range(10):
+            dists = numpy.random.uniform(0, self.agentX, self.NUM_CARS)
+            self.tracker.observe(self.agentX, self.agentY, dists)
+            self.tracker.elapseTime()
+            for belief in self.tracker.getBeliefs():
+                self.assertNormalized(belief)
+
+    def testSingleCarInterface(self):
+        car = self.cars[1]
+        before = particleEngine.beliefProbs(self.tracker.getBeliefs()[0]).copy()
+        car.observe(self.agentX, self.agentY, 10.0)
+        car.elapseTime()
+        self.assertNormalized(car.getBelief())
+        self.assertTrue(numpy.array_equal(particleEngine.beliefProbs(self.tracker.getBeliefs()[0]), before))
+
+    def testImpossibleReadingKeepsBeliefs(self):
+        self.tracker.observe(self.agentX, self.agentY, numpy.full(self.NUM_CARS, 1e9))
+        for belief in self.tracker.getBeliefs():
+            self.assertNormalized(belief)
+
+
+# Log-domain weights of ParticleFilter: they survive likelihoods far below
+# the float range, and the particles are only resampled once the effective
+# sample size drops below RESAMPLE_THRESHOLD.
+class LogWeightTest(InferenceTestCase):
+
+    def setUp(self):
+        InferenceTestCase.setUp(self)
+        self.filter = ParticleFilter(NUM_ROWS, NUM_COLS)
+        self.numParticles = len(self.filter.particles)
+
+    def testLogSumExpAndEffectiveSampleSize(self):
+        logWeights = numpy.array([[-1000.0, -1000.0], [0.0, -numpy.inf]])
+        self.assertTrue(numpy.allclose(particleEngine.logSumExp(logWeights), [-1000.0 + numpy.log(2), 0.0]))
+        uniform = numpy.full(self.numParticles, -numpy.log(self.numParticles))
+        self.assertAlmostEqual(particleEngine.effectiveSampleSize(uniform), self.numParticles)
+        self.assertAlmostEqual(particleEngine.effectiveSampleSize(logWeights[1]), 1.0)
+
+    def testSystematicResample(self):
+        numpy.random.seed(2)
+        indices = particleEngine.systematicResample(numpy.array([0.5, 0.0, 1.5]), 8)
+        self.assertEqual(numpy.bincount(indices, minlength=3).tolist(), [2, 0, 6])
+        self.assertTrue(particleEngine.systematicResample(numpy.zeros(3), 8) is None)
+
+    def testEvenWeightsAreNotResampled(self):
+        particles = self.filter.particles.copy()
+        logEmissions = numpy.zeros(self.numParticles)
+        logEmissions[::2] = -0.5
+        self.filter.reweight(logEmissions)
+        self.assertTrue(numpy.array_equal(self.filter.particles, particles))
+        self.assertAlmostEqual(numpy.exp(self.filter.logWeights).sum(), 1.0)
+        self.assertTrue(self.filter.logWeights[1] > self.filter.logWeights[0])
+
+    def testTinyLikelihoodsDoNotUnderflow(self):
+        logEmissions = numpy.full(self.numParticles, -5000.0)
+        logEmissions[:3] = -4900.0
+        heavy = self.filter.particles[:3].copy()
+        self.filter.reweight(logEmissions)
+        self.assertTrue(numpy.isin(self.filter.particles, heavy).all())
+        self.assertTrue(numpy.allclose(self.filter.logWeights, -numpy.log(self.numParticles)))
+        self.assertNormalized(self.filter.getBelief())
+
+
+# One tracked car and one ParticleFilter with the same ADAPTIVE setting, fed
+# the same readings from the same random stream, draw the same particles, so
+# their beliefs must agree after every observe and every elapseTime.
+class TrackerMatchesParticleFilterTest(InferenceTestCase):
+
+    TICKS = 15
+
+    def runFilter(self, makeFilter, readings):
+        numpy.random.seed(4)
+        inference = makeFilter()
+        beliefs = [particleEngine.beliefProbs(inference.getBelief()).copy()]
+        for (agentX, agentY, dist) in readings:
+            inference.observe(agentX, agentY, dist)
+            beliefs.append(particleEngine.beliefProbs(inference.getBelief()).copy())
+            inference.elapseTime()
+            beliefs.append(particleEngine.beliefProbs(inference.getBelief()).copy())
+        return (beliefs, inference.getParticleCounts())
+
+    def assertSameBeliefs(self, adaptive):
+        class Filter(ParticleFilter):
+            ADAPTIVE = adaptive
+        class Tracker(MultiTargetTracker):
+            ADAPTIVE = adaptive
+        rng = random.Random(3)
+        readings = [(rng.uniform(0, 2 * self.agentX), rng.uniform(0, 2 * self.agentY), rng.uniform(0, 150))
+                    for tick in range(self.TICKS)]
+        (filterBeliefs, filterCounts) = self.runFilter(lambda: Filter(NUM_ROWS, NUM_COLS), readings)
+        (trackerBeliefs, trackerCounts) = self.runFilter(lambda: Tracker(NUM_ROWS, NUM_COLS).addTarget(), readings)
+        self.assertEqual(trackerCounts, filterCounts)
+        for (expected, actual) in zip(filterBeliefs, trackerBeliefs):
+            self.assertTrue(numpy.allclose(actual, expected))
+        # The belief after elapseTime is the one of the observe before it.
+        self.assertTrue(numpy.array_equal(trackerBeliefs[1], trackerBeliefs[2]))
+
+    def testSameBeliefs(self):
+        self.assertSameBeliefs(False)
+
+    def testSameAdaptiveBeliefs(self):
+        self.assertSameBeliefs(True)
+
+
+# KLD-adaptive sizing of the tracker: readings of a parked car from around
+# it make its posterior peak on a few tiles.
+class AdaptiveTrackerTest(InferenceTestCase):
+
+    def setUp(self):
+        InferenceTestCase.setUp(self)
+        self.tracker = MultiTargetTracker(NUM_ROWS, NUM_COLS)
+        self.car = self.tracker.addTarget()
+        self.other = self.tracker.addTarget()
+        (self.carX, self.carY) = (2.5 * Const.BELIEF_TILE_SIZE, 3.5 * Const.BELIEF_TILE_SIZE)
+
+    def observeParkedCar(self, ticks):
+        corners = [(0, 0), (NUM_COLS, 0), (0, NUM_ROWS), (NUM_COLS, NUM_ROWS)]
+        for tick in range(ticks):
+            (col, row) = corners[tick % len(corners)]
+            (agentX, agentY) = (col * Const.BELIEF_TILE_SIZE, row * Const.BELIEF_TILE_SIZE)
+            dist = ((agentX - self.carX) ** 2 + (agentY - self.carY) ** 2) ** 0.5
+            self.car.observe(agentX, agentY, dist)
+
+    def testCountsShrinkOnPeakedPosterior(self):
+        self.observeParkedCar(12)
+        counts = self.car.getParticleCounts()
+        self.assertEqual(len(counts), 12)
+        self.assertTrue(counts[-1] < MultiTargetTracker.MAX_PARTICLES / 5)
+        self.assertTrue(counts[-1] >= MultiTargetTracker.MIN_PARTICLES)
+        self.assertEqual(self.tracker.counts.tolist(), [counts[-1], MultiTargetTracker.MAX_PARTICLES])
+        self.assertNormalized(self.car.getBelief())
+        belief = particleEngine.beliefProbs(self.car.getBelief())
+        self.assertEqual(belief.argmax(), 3 * NUM_COLS + 2)
+
+    def testCountsGrowWhenLikelihoodCollapses(self):
+        self.observeParkedCar(12)
+        self.car.elapseTime()
+        self.car.observe(0.0, 0.0, 0.0)
+        self.assertEqual(self.car.getParticleCounts()[-1], MultiTargetTracker.MAX_PARTICLES)
+        self.assertNormalized(self.car.getBelief())
+
+    def testPaddingIsIgnored(self):
+        self.observeParkedCar(12)
+        self.tracker.observe(0.0, 0.0, [200.0, 200.0])
+        self.tracker.elapseTime()
+        self.assertEqual(self.tracker.particles.shape[1], max(self.tracker.counts))
+        padding = ~self.tracker.liveMask(numpy.arange(2))
+        self.assertTrue(numpy.isneginf(self.tracker.logWeights[padding]).all())
+        for belief in self.tracker.getBeliefs():
+            self.assertNormalized(belief)
+
+if __name__ == '__main__':
+    unittest.main()
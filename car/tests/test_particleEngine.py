@@ -0,0 +1,56 @@
+'''
+Tests of the alias tables and the transition sampler built from them,
+which moves particle arrays of any shape.
+
+Usage (from the car directory):
+  python -m unittest discover tests
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import particleEngine
+import random, unittest
+import numpy
+
+# The distribution an alias table samples from.
+def aliasProbs(accept, alias):
+    k = len(accept)
+    probs = [a / k for a in accept]
+    for (i, a) in enumerate(accept):
+        probs[alias[i]] += (1.0 - a) / k
+    return probs
+
+
+class AliasSamplerTest(unittest.TestCase):
+
+    def testAliasTableIsExact(self):
+        rng = random.Random(0)
+        for k in [1, 2, 5, 17]:
+            weights = [rng.uniform(0.1, 3.0) for i in range(k)]
+            (accept, alias) = particleEngine.buildAliasTable(weights)
+            expected = [w / sum(weights) for w in weights]
+            self.assertTrue(numpy.allclose(aliasProbs(accept, alias), expected))
+
+    def testSampleFrequencies(self):
+        numpy.random.seed(0)
+        weights = {(0, 0): 1.0, (0, 1): 2.0, (1, 0): 3.0, (1, 1): 4.0}
+        sampler = particleEngine.buildTransitionSampler({(0, 0): weights}, 2, 2)
+        particles = numpy.zeros(200000, dtype=numpy.int64)
+        counts = numpy.bincount(sampler.sample(particles), minlength=4)
+        self.assertTrue(numpy.allclose(counts / float(len(particles)), [0.1, 0.2, 0.3, 0.4], atol=0.01))
+
+    def testTilesWithoutTransitionsStay(self):
+        sampler = particleEngine.buildTransitionSampler({(0, 0): {(0, 1): 1.0}}, 2, 2)
+        (particles, alive) = sampler.advance(numpy.array([0, 3, 0], dtype=numpy.int64))
+        self.assertEqual(particles.tolist(), [1, 3, 1])
+        self.assertEqual(alive.tolist(), [True, False, True])
+
+    def testAdvanceKeepsShape(self):
+        numpy.random.seed(1)
+        sampler = particleEngine.buildTransitionSampler({(0, 0): {(0, 1): 1.0}, (0, 1): {(1, 1): 1.0}}, 2, 2)
+        (particles, alive) = sampler.advance(numpy.array([[0, 1, 2], [1, 0, 3]], dtype=numpy.int64))
+        self.assertEqual(particles.tolist(), [[1, 3, 2], [3, 1, 3]])
+        self.assertEqual(alive.tolist(), [[True, True, False], [True, True, False]])
+
+if __name__ == '__main__':
+    unittest.main()
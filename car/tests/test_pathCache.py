@@ -0,0 +1,94 @@
+'''
+Tests of the PathCache: a stored path also answers lookups from every node
+along it, an entry whose risk has moved by more than RISK_TOLERANCE is
+dropped, the least recently used entry is evicted first, and a driver
+arriving at the next node of its path reuses the path instead of planning.
+
+Usage (from the car directory):
+  python -m unittest discover tests
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from plannerTestCase import PlannerTestCase, emptyBelief
+from benchmarks.fixtures import GridGraph
+import graphIndex
+import pathCache
+import unittest
+
+
+class PathCacheTest(PlannerTestCase):
+
+    def setUp(self):
+        PlannerTestCase.setUp(self)
+        self.cache = pathCache.PathCache()
+        self.belief = emptyBelief()
+        starts = [n for n in self.index.nodeIds if self.reachable(n)]
+        self.driver.nodeId = max(starts, key=lambda n: self.field[self.index.index[n]])
+        self.path = self.driver.aStar(self.graph, self.belief)
+        self.assertTrue(len(self.path) > 2)
+
+    def testSuffixesHit(self):
+        self.cache.put(self.goal, self.path, self.index, self.belief)
+        for offset in range(len(self.path) - 1):
+            self.assertEqual(self.cache.get(self.path[offset], self.goal, self.index, self.belief),
+                             self.path[offset:])
+        self.assertEqual(self.cache.get(self.goal, self.goal, self.index, self.belief), None)
+        stats = self.cache.getStats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']),
+                         (len(self.path) - 1, 1, len(self.path) - 1))
+        self.cache.resetStats()
+        self.assertEqual(self.cache.getStats()['hitRate'], 0.0)
+
+    def testRiskChangesInvalidate(self):
+        self.cache.put(self.goal, self.path, self.index, self.belief)
+        start = self.path[0]
+        # Summed over the path, the risk moves by less than the tolerance.
+        self.belief.probs[:] = 0.5 * pathCache.PathCache.RISK_TOLERANCE / len(self.path)
+        self.assertEqual(self.cache.get(start, self.goal, self.index, self.belief), self.path)
+        self.belief.probs[:] = 0.5
+        self.assertEqual(self.cache.get(start, self.goal, self.index, self.belief), None)
+        self.assertEqual(self.cache.getStats()['invalidations'], 1)
+        # The invalidated entry is gone, even once the risk is back.
+        self.belief.probs[:] = 0.0
+        self.assertEqual(self.cache.get(start, self.goal, self.index, self.belief), None)
+        self.assertEqual(self.cache.getStats()['invalidations'], 1)
+
+    def testLeastRecentlyUsedIsEvicted(self):
+        class Cache(pathCache.PathCache):
+            CAPACITY = 2
+        cache = Cache()
+        cache.put(self.goal, self.path[-3:], self.index, self.belief)
+        (first, second) = self.path[-3:-1]
+        cache.get(first, self.goal, self.index, self.belief)
+        # A third entry evicts the least recently used one, |second|'s.
+        cache.put(second, [first, second], self.index, self.belief)
+        self.assertEqual(len(cache.entries), 2)
+        self.assertEqual(cache.get(second, self.goal, self.index, self.belief), None)
+        self.assertEqual(cache.get(first, self.goal, self.index, self.belief), self.path[-3:])
+
+    def testOtherGraphsMiss(self):
+        self.cache.put(self.goal, self.path, self.index, self.belief)
+        other = graphIndex.getGraphIndex(GridGraph(8, 10, dropRate=0.15, seed=5))
+        self.assertEqual(self.cache.get(self.path[0], self.goal, other, self.belief), None)
+
+    def testPathsThatMissTheGoalAreNotStored(self):
+        self.cache.put(self.goal, self.path[:-1], self.index, self.belief)
+        self.cache.put(self.goal, [self.goal], self.index, self.belief)
+        self.assertEqual(len(self.cache.entries), 0)
+
+    def testDriverReusesPath(self):
+        cache = pathCache.getPathCache()
+        cache.clear()
+        cache.resetStats()
+        self.driver.nodeId = self.path[0]
+        self.driver.choseNextId(self.graph, self.belief)
+        self.assertEqual(self.driver.nextId, self.path[1])
+        self.driver.nodeId = self.driver.nextId
+        self.driver.choseNextId(self.graph, self.belief)
+        self.assertEqual(self.driver.nextId, self.path[2])
+        self.assertEqual((cache.getStats()['hits'], cache.getStats()['misses']), (1, 1))
+        cache.clear()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+'''
+Tests of SensorFusion: a batch of mixed Sonar / Radar / Lidar readings
+scores every particle with the sum of the readings' emission models, and
+the batched form only applies a reading to the car it is about.
+
+Usage (from the car directory):
+  python -m unittest discover tests
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from engine.model.observation import READING_DTYPE, SENSOR_TYPES
+import emissionModel
+import sensorFusion
+import unittest
+import numpy
+
+NUM_ROWS = 6
+NUM_COLS = 8
+
+
+class SensorFusionTest(unittest.TestCase):
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.fusion = sensorFusion.getSensorFusion(NUM_ROWS, NUM_COLS)
+        # (target, sensor, dist, agentX, agentY)
+        self.readings = numpy.array([
+            (0, 0, 40.0, 10.0, 20.0),
+            (1, 1, 75.0, 100.0, 5.0),
+            (0, 2, 12.0, 30.0, 30.0),
+            (2, 0, 150.0, 0.0, 0.0),
+            (0, 1, 60.0, 10.0, 20.0)], dtype=READING_DTYPE)
+
+    # The log likelihood of |readings| computed reading by reading.
+    def expected(self, particles, readings):
+        total = numpy.zeros(len(particles))
+        for reading in readings:
+            model = emissionModel.getEmissionModel(NUM_ROWS, NUM_COLS, SENSOR_TYPES[reading['sensor']].STD)
+            d = model.distances(particles, reading['agentX'], reading['agentY'])
+            total += model.logLikelihood(d, reading['dist'])
+        return total
+
+    def testSumsEveryReading(self):
+        particles = numpy.random.randint(NUM_ROWS * NUM_COLS, size=50)
+        self.assertTrue(numpy.allclose(self.fusion.logLikelihood(particles, self.readings),
+                                       self.expected(particles, self.readings)))
+        # The order of the readings does not matter.
+        self.assertTrue(numpy.allclose(self.fusion.logLikelihood(particles, self.readings[::-1]),
+                                       self.fusion.logLikelihood(particles, self.readings)))
+
+    def testBatchAppliesReadingsToTheirTarget(self):
+        # 20 columns are evaluated per particle, 100 through the tile table.
+        for width in [20, 100]:
+            particles = numpy.random.randint(NUM_ROWS * NUM_COLS, size=(4, width))
+            batch = self.fusion.batchLogLikelihood(particles, self.readings)
+            self.assertEqual(batch.shape, particles.shape)
+            for target in range(4):
+                readings = self.readings[self.readings['target'] == target]
+                self.assertTrue(numpy.allclose(batch[target], self.expected(particles[target], readings)))
+            # Car 3 has no readings.
+            self.assertEqual(batch[3].tolist(), [0.0] * width)
+
+    def testFusionsAreShared(self):
+        self.assertTrue(sensorFusion.getSensorFusion(NUM_ROWS, NUM_COLS) is self.fusion)
+
+if __name__ == '__main__':
+    unittest.main()
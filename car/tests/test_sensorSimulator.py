@@ -0,0 +1,61 @@
+'''
+Tests of the SensorSimulator: one READING_DTYPE row per car and sensor,
+noise with every sensor's STD, and reproducible streams from a seed or
+from the global numpy random state.
+
+Usage (from the car directory):
+  python -m unittest discover tests
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from engine.model.observation import SENSOR_TYPES
+from engine.model.sensorSimulator import SensorSimulator
+import collections, unittest
+import numpy
+
+Pos = collections.namedtuple('Pos', ['x', 'y'])
+
+class Body(object):
+
+    def __init__(self, x, y):
+        self.pos = Pos(x, y)
+
+
+class SensorSimulatorTest(unittest.TestCase):
+
+    def testReadingLayout(self):
+        readings = SensorSimulator(seed=0).simulate([30.0, 0.0], [40.0, 10.0], 0.0, 0.0)
+        numSensors = len(SENSOR_TYPES)
+        self.assertEqual(len(readings), 2 * numSensors)
+        self.assertEqual(readings['target'].tolist(), [0] * numSensors + [1] * numSensors)
+        self.assertEqual(readings['sensor'].tolist(), [sensor.SENSOR for sensor in SENSOR_TYPES] * 2)
+        self.assertTrue((readings['agentX'] == 0.0).all() and (readings['agentY'] == 0.0).all())
+
+    def testNoiseMatchesSensors(self):
+        numCars = 20000
+        readings = SensorSimulator(seed=1).simulate(numpy.full(numCars, 30.0), numpy.full(numCars, 40.0), 0.0, 0.0)
+        for sensor in SENSOR_TYPES:
+            dists = readings['dist'][readings['sensor'] == sensor.SENSOR]
+            self.assertAlmostEqual(dists.mean(), 50.0, delta=5 * sensor.STD / numCars ** 0.5)
+            self.assertAlmostEqual(dists.std(), sensor.STD, delta=0.05 * sensor.STD)
+
+    def testSeedsAreReproducible(self):
+        simulator = SensorSimulator(seed=7)
+        first = simulator.simulate([1.0, 2.0], [3.0, 4.0], 5.0, 6.0)
+        simulator.seed(7)
+        self.assertEqual(simulator.simulate([1.0, 2.0], [3.0, 4.0], 5.0, 6.0).tolist(), first.tolist())
+        numpy.random.seed(3)
+        unseeded = SensorSimulator().simulate([1.0], [2.0], 0.0, 0.0)
+        numpy.random.seed(3)
+        self.assertEqual(SensorSimulator().simulate([1.0], [2.0], 0.0, 0.0).tolist(), unseeded.tolist())
+
+    def testObserveCars(self):
+        cars = [Body(30.0, 40.0), Body(-3.0, 4.0)]
+        junior = Body(0.0, 0.0)
+        readings = SensorSimulator(seed=2).observeCars(cars, junior)
+        expected = SensorSimulator(seed=2).simulate([30.0, -3.0], [40.0, 4.0], 0.0, 0.0)
+        self.assertEqual(readings.tolist(), expected.tolist())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+'''
+Tests of the SpatialHash broad phase: nearby never misses a car within
+cellSize of the query point, update follows moving cars, and sync rebuilds
+whenever the cars it was built from change. The hash of the agents lives
+on their agentComm, follows them through Agent.updateAll without being
+rebuilt, and is freed along with them and their fleet slots.
+
+Usage (from the car directory):
+  python -m unittest discover tests
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.fixtures import makeAgents
+from engine.const import Const
+from engine.model.car.agent import Agent
+from engine.model.car.car import Car
+from engine.model.spatialHash import SpatialHash
+from engine.vector import Vec2d
+import gc, random, unittest, weakref
+
+CELL_SIZE = 2 * Car.RADIUS
+
+def randomCar(rng, side):
+    return Car(Vec2d(rng.uniform(-side, side), rng.uniform(-side, side)), 'north', Vec2d(0, 0))
+
+def within(car, pos):
+    return (car.pos - pos).get_length() <= CELL_SIZE
+
+
+class SpatialHashTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(0)
+        self.cars = [randomCar(self.rng, 400) for i in range(200)]
+        self.hash = SpatialHash(CELL_SIZE)
+        self.hash.rebuild(self.cars)
+
+    def assertFindsNeighbours(self):
+        for car in self.cars:
+            pos = Vec2d(car.pos.x, car.pos.y)
+            found = set(map(id, self.hash.nearby(pos)))
+            expected = set(id(other) for other in self.cars if within(other, pos))
+            self.assertTrue(expected <= found)
+
+    def testNearbyIsSuperset(self):
+        self.assertEqual(len(self.hash), len(self.cars))
+        self.assertFindsNeighbours()
+
+    def testUpdateFollowsCars(self):
+        for car in self.cars:
+            car.pos += Vec2d(self.rng.uniform(-100, 100), self.rng.uniform(-100, 100))
+            self.hash.update(car)
+        self.assertEqual(len(self.hash), len(self.cars))
+        self.assertFindsNeighbours()
+
+    def testSyncRebuildsOnChangedMembers(self):
+        cells = self.hash.cells
+        self.hash.sync(self.cars)
+        self.assertTrue(self.hash.cells is cells)
+
+        old = self.cars[5]
+        self.cars[5] = randomCar(self.rng, 400)
+        self.hash.sync(self.cars)
+        self.assertFalse(self.hash.cells is cells)
+        members = set(map(id, self.hash.nearby(self.cars[5].pos)))
+        self.assertIn(id(self.cars[5]), members)
+        self.assertNotIn(old, self.hash.carCells)
+        self.assertEqual(len(self.hash), len(self.cars))
+        self.assertFalse(self.hash.sync(self.cars))
+
+
+class AgentSpatialHashTest(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(0)
+        self.parked = getattr(Const, 'CARS_PARKED', None)
+        Const.CARS_PARKED = False
+
+    def tearDown(self):
+        Const.CARS_PARKED = self.parked
+
+    def testHashFollowsAgents(self):
+        agents = makeAgents(100)
+        spatialHash = agents[0].getSpatialHash()
+        self.assertTrue(agents[0].agentComm.spatialHash is spatialHash)
+        agents[0].isCloseToOtherCar()
+        cells = spatialHash.cells
+        for agent in agents:
+            agent.accelerate(Agent.ACCELERATION)
+        for tick in range(20):
+            Agent.updateAll(agents)
+        self.assertTrue(spatialHash.cells is cells)
+        for agent in agents:
+            self.assertEqual(spatialHash.carCells[agent], spatialHash.getCell(agent.pos))
+
+    def testJoiningAgentIsFound(self):
+        agents = makeAgents(10)
+        agents[0].isCloseToOtherCar()
+        newcomer = makeAgents(1)[0]
+        newcomer.agentComm = agents[0].agentComm
+        # makeAgents returns the agent list of the agentComm.
+        agents.append(newcomer)
+        newcomer.isCloseToOtherCar()
+        self.assertIn(newcomer, agents[0].getSpatialHash().carCells)
+
+    def testFreedAfterEpisode(self):
+        gc.collect()
+        numCars = len(Car.FLEET)
+        agents = makeAgents(30)
+        agentComm = weakref.ref(agents[0].agentComm)
+        agents[0].isCloseToOtherCar()
+        Agent.updateAll(agents)
+        self.assertEqual(len(Car.FLEET), numCars + 30)
+        del agents
+        gc.collect()
+        self.assertEqual(agentComm(), None)
+        self.assertEqual(len(Car.FLEET), numCars)
+
+if __name__ == '__main__':
+    unittest.main()
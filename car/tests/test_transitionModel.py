@@ -0,0 +1,121 @@
+'''
+Tests of the compiled (CSR) transition model file: it loads back the alias
+tables it was compiled from, is compiled again when the probabilities
+change, and is memory-mapped without reading the learned pickle while the
+pickle is unchanged.
+
+Usage (from the car directory):
+  python -m unittest discover tests
+'''
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.fixtures import makeTransProb
+from engine.const import Const
+import particleEngine
+import transitionModel
+import util
+import pickle, shutil, tempfile, unittest
+import numpy
+
+NUM_ROWS = 6
+NUM_COLS = 8
+
+
+class CompiledModelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.learnedDir = transitionModel.LEARNED_DIR
+        transitionModel.LEARNED_DIR = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(transitionModel.LEARNED_DIR)
+        transitionModel.LEARNED_DIR = self.learnedDir
+
+    def testRoundTrip(self):
+        transProb = makeTransProb(NUM_ROWS, NUM_COLS, 0)
+        path = transitionModel.compiledPath('test', NUM_ROWS, NUM_COLS)
+        transitionModel.compileModel(transProb, NUM_ROWS, NUM_COLS, path, (12, 34))
+        loaded = transitionModel.loadModel(path)
+        transProbDict = dict()
+        for ((oldTile, newTile), prob) in transProb.items():
+            transProbDict.setdefault(oldTile, dict())[newTile] = prob
+        built = particleEngine.buildTransitionSampler(transProbDict, NUM_ROWS, NUM_COLS)
+        for name in ['offsets', 'newIds', 'accept', 'alias', 'sourceIds']:
+            self.assertTrue(numpy.array_equal(getattr(loaded, name), getattr(built, name)), name)
+        self.assertEqual(transitionModel.readFingerprint(path), transitionModel.sourceFingerprint(transProb))
+        self.assertEqual(transitionModel.readStamp(path), (12, 34))
+
+    def testRecompilesChangedModel(self):
+        transProb = makeTransProb(NUM_ROWS, NUM_COLS, 0)
+        sampler = transitionModel.installModel('test', NUM_ROWS, NUM_COLS, transProb)
+        path = transitionModel.compiledPath('test', NUM_ROWS, NUM_COLS)
+        modified = os.path.getmtime(path)
+        self.assertTrue(numpy.array_equal(
+            transitionModel.installModel('test', NUM_ROWS, NUM_COLS, transProb).accept, sampler.accept))
+        self.assertEqual(os.path.getmtime(path), modified)
+
+        transProb[((0, 0), (0, 0))] += 1.0
+        changed = transitionModel.installModel('test', NUM_ROWS, NUM_COLS, transProb)
+        self.assertEqual(transitionModel.readFingerprint(path), transitionModel.sourceFingerprint(transProb))
+        self.assertFalse(numpy.array_equal(changed.accept, sampler.accept))
+
+
+# loadTransitionSampler on a layout with a learned pickle, counting the
+# times it falls back to util.loadTransProb.
+class SourceStampTest(unittest.TestCase):
+
+    LAYOUT = 'testStamp'
+
+    def setUp(self):
+        self.learnedDir = transitionModel.LEARNED_DIR
+        self.layout = getattr(Const, 'LAYOUT', None)
+        self.loadTransProb = util.loadTransProb
+        transitionModel.LEARNED_DIR = tempfile.mkdtemp()
+        Const.LAYOUT = self.LAYOUT
+        util.loadTransProb = self.countingLoad
+        self.loads = 0
+        self.writeSource(makeTransProb(NUM_ROWS, NUM_COLS, 0))
+
+    def tearDown(self):
+        shutil.rmtree(transitionModel.LEARNED_DIR)
+        transitionModel.LEARNED_DIR = self.learnedDir
+        Const.LAYOUT = self.layout
+        util.loadTransProb = self.loadTransProb
+        transitionModel._samplers.pop((self.LAYOUT, NUM_ROWS, NUM_COLS), None)
+
+    def writeSource(self, transProb):
+        with open(transitionModel.sourcePath(self.LAYOUT), 'wb') as f:
+            pickle.dump(transProb, f)
+
+    def countingLoad(self):
+        self.loads += 1
+        with open(transitionModel.sourcePath(self.LAYOUT), 'rb') as f:
+            return pickle.load(f)
+
+    # A fresh process: nothing loaded yet.
+    def load(self):
+        transitionModel._samplers.pop((self.LAYOUT, NUM_ROWS, NUM_COLS), None)
+        return transitionModel.loadTransitionSampler(NUM_ROWS, NUM_COLS)
+
+    def testFreshModelSkipsPickle(self):
+        first = self.load()
+        self.assertEqual(self.loads, 1)
+        second = self.load()
+        self.assertEqual(self.loads, 1)
+        self.assertTrue(numpy.array_equal(first.accept, second.accept))
+
+    def testChangedPickleIsCompiled(self):
+        first = self.load()
+        transProb = makeTransProb(NUM_ROWS, NUM_COLS, 1)
+        transProb[((0, 0), (5, 7))] = 1.0
+        self.writeSource(transProb)
+        changed = self.load()
+        self.assertEqual(self.loads, 2)
+        self.assertEqual(len(changed.newIds), len(first.newIds) + 1)
+        path = transitionModel.compiledPath(self.LAYOUT, NUM_ROWS, NUM_COLS)
+        self.assertEqual(transitionModel.readStamp(path),
+                         transitionModel.sourceStamp(transitionModel.sourcePath(self.LAYOUT)))
+
+if __name__ == '__main__':
+    unittest.main()
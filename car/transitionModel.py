@@ -0,0 +1,196 @@
+'''
+Extended by Peggy Wang @PeggyYuchunWang
+Licensing Information: Please do not distribute or publish solutions to this
+project. You are free to use and extend Driverless Car for educational
+purposes. The Driverless Car project was developed at Stanford, primarily by
+Chris Piech (piech@cs.stanford.edu). It was inspired by the Pacman projects.
+'''
+from engine.const import Const
+import util
+import particleEngine
+import collections, hashlib, os, sys
+import numpy
+
+
+# Compiled transition model
+# ---------------------
+# The learned transition probabilities are compiled once per layout into a
+# flat binary file holding the CSR alias tables of particleEngine:
+#
+#   header   int64[HEADER_SIZE]  MAGIC, VERSION, numRows, numCols, nnz,
+#                                source fingerprint, source mtime (us),
+#                                source size
+#   offsets  int64[numRows * numCols + 1]
+#   newIds   int64[nnz]
+#   alias    int64[nnz]
+#   accept   float64[nnz]
+#
+# The loader memory-maps the file read-only, so every filter in a process
+# (and every process on the machine) shares one copy through the page cache.
+# The source fingerprint is a hash of the transProb dict the file was
+# compiled from, and the source stamp the modification time and size of the
+# learned pickle it was read from. loadTransitionSampler only compares the
+# stamp with the pickle on disk, so a fresh file is mapped without reading
+# the pickle; the pickle is only loaded (and fingerprinted) to compile.
+
+MAGIC = 0x5452414e53505242
+VERSION = 3
+HEADER_SIZE = 8
+LEARNED_DIR = 'learned'
+# Stamp of a file compiled from probabilities that did not come from a
+# learned pickle.
+NO_STAMP = (0, 0)
+
+_samplers = dict()
+
+# Function: Compiled Path
+# ---------------------
+# Where the compiled model of a layout with a (numRows x numCols) belief
+# grid is stored.
+def compiledPath(layout, numRows, numCols):
+    fileName = '%sTransProb.%dx%d.csr' % (layout, numRows, numCols)
+    return os.path.join(LEARNED_DIR, fileName)
+
+# Function: Source Path
+# ---------------------
+# The learned pickle util.loadTransProb reads the probabilities of |layout|
+# from.
+def sourcePath(layout):
+    return os.path.join(LEARNED_DIR, layout + 'TransProb.p')
+
+# Function: Source Stamp
+# ---------------------
+# (mtime in microseconds, size) of the file at |path|, or None if there is
+# none.
+def sourceStamp(path):
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return (int(round(stat.st_mtime * 1e6)), int(stat.st_size))
+
+# Function: Source Fingerprint
+# ---------------------
+# 63 bit hash of a transProb dict, stored in the header of the file compiled
+# from it.
+def sourceFingerprint(transProb):
+    digest = hashlib.sha1(repr(sorted(transProb.items())).encode('utf-8')).hexdigest()
+    return int(digest[:15], 16)
+
+# Function: Read Header
+# ---------------------
+# The header of a compiled model, or None if |path| does not hold a model
+# of the current VERSION.
+def readHeader(path):
+    if not os.path.exists(path):
+        return None
+    header = numpy.fromfile(path, dtype=numpy.int64, count=HEADER_SIZE)
+    if len(header) != HEADER_SIZE or header[0] != MAGIC or header[1] != VERSION:
+        return None
+    return header
+
+# Function: Read Fingerprint
+# ---------------------
+# The source fingerprint of a compiled model, or None.
+def readFingerprint(path):
+    header = readHeader(path)
+    return None if header is None else int(header[5])
+
+# Function: Read Stamp
+# ---------------------
+# The source stamp of a compiled model, or None.
+def readStamp(path):
+    header = readHeader(path)
+    return None if header is None else (int(header[6]), int(header[7]))
+
+# Function: Compile Model
+# ---------------------
+# Compiles a transProb dict ((oldTile, newTile) -> prob, as returned by
+# util.loadTransProb) and writes it to |path|, with the |stamp| of the file
+# it was read from. The file is written next to its destination and renamed
+# into place so readers never see a partial file.
+def compileModel(transProb, numRows, numCols, path, stamp = NO_STAMP):
+    transProbDict = dict()
+    for (oldTile, newTile) in transProb:
+        if not oldTile in transProbDict:
+            transProbDict[oldTile] = collections.defaultdict(int)
+        transProbDict[oldTile][newTile] = transProb[(oldTile, newTile)]
+    sampler = particleEngine.buildTransitionSampler(transProbDict, numRows, numCols)
+
+    header = numpy.zeros(HEADER_SIZE, dtype=numpy.int64)
+    header[:] = [MAGIC, VERSION, numRows, numCols, len(sampler.newIds), sourceFingerprint(transProb),
+                 stamp[0], stamp[1]]
+    tmpPath = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmpPath, 'wb') as f:
+        for array in [header, sampler.offsets, sampler.newIds, sampler.alias]:
+            f.write(numpy.ascontiguousarray(array, dtype=numpy.int64).tobytes())
+        f.write(numpy.ascontiguousarray(sampler.accept, dtype=numpy.float64).tobytes())
+    os.rename(tmpPath, path)
+
+# Function: Load Model
+# ---------------------
+# Memory-maps a compiled model read-only and wraps it in a TransitionSampler.
+def loadModel(path):
+    header = readHeader(path)
+    if header is None:
+        raise Exception(path + ' is not a compiled transition model')
+    (numRows, numCols, nnz) = [int(v) for v in header[2:5]]
+    sizes = [numRows * numCols + 1, nnz, nnz, nnz]
+    dtypes = [numpy.int64, numpy.int64, numpy.int64, numpy.float64]
+    sections = []
+    offset = HEADER_SIZE * 8
+    for (size, dtype) in zip(sizes, dtypes):
+        sections.append(numpy.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(size,)))
+        offset += size * 8
+    (offsets, newIds, alias, accept) = sections
+    return particleEngine.TransitionSampler(numRows, numCols, offsets, newIds, accept, alias)
+
+# Function: Install Model
+# ---------------------
+# Makes |transProb| the transition model of |layout| on a (numRows x
+# numCols) grid for this process: the compiled file is reused if it was
+# compiled from the same probabilities with the same source |stamp|, and
+# compiled again otherwise. |layout| may be None for a process that only
+# ever loads one layout; the file is then named after the source
+# fingerprint.
+def installModel(layout, numRows, numCols, transProb, stamp = NO_STAMP):
+    fingerprint = sourceFingerprint(transProb)
+    name = layout if layout is not None else '%015x' % fingerprint
+    path = compiledPath(name, numRows, numCols)
+    if readFingerprint(path) != fingerprint or readStamp(path) != stamp:
+        compileModel(transProb, numRows, numCols, path, stamp)
+    _samplers[(layout, numRows, numCols)] = loadModel(path)
+    return _samplers[(layout, numRows, numCols)]
+
+# Function: Load Transition Sampler
+# ---------------------
+# Returns the process wide TransitionSampler of the current layout. The
+# layout is Const.LAYOUT when the entry point set it (fastForward and the
+# runners built on it do). A compiled file whose source stamp matches the
+# layout's learned pickle is memory-mapped straight away; otherwise the
+# pickle is loaded with util.loadTransProb() and compiled. Without a layout
+# the process is assumed to drive a single layout, and the probabilities
+# are loaded once per grid size to find its file by fingerprint.
+def loadTransitionSampler(numRows, numCols):
+    layout = getattr(Const, 'LAYOUT', None)
+    key = (layout, numRows, numCols)
+    if key not in _samplers:
+        stamp = sourceStamp(sourcePath(layout)) if layout is not None else None
+        path = compiledPath(layout, numRows, numCols) if layout is not None else None
+        if stamp is not None and readStamp(path) == stamp:
+            _samplers[key] = loadModel(path)
+        else:
+            installModel(layout, numRows, numCols, util.loadTransProb(), stamp or NO_STAMP)
+    return _samplers[key]
+
+# Offline compile step:
+#   python transitionModel.py <layout> <numRows> <numCols>
+if __name__ == '__main__':
+    if len(sys.argv) != 4:
+        print('usage: python transitionModel.py <layout> <numRows> <numCols>')
+        sys.exit(1)
+    Const.LAYOUT = sys.argv[1]
+    numRows = int(sys.argv[2])
+    numCols = int(sys.argv[3])
+    installModel(Const.LAYOUT, numRows, numCols, util.loadTransProb(),
+                 sourceStamp(sourcePath(Const.LAYOUT)) or NO_STAMP)
+    print('wrote ' + compiledPath(Const.LAYOUT, numRows, numCols))